@@ -7,8 +7,45 @@ Data: 2024-01-15
 import os
 import sys
 import json
+import argparse
 from datetime import datetime
 
+OPZIONI = {
+    'PROFILA': False,  # 🔥 --profile: salva anche un profilo cProfile in outputs/reports/
+    'STREAM': False,   # 🔥 --stream: risultati scritti riga per riga in NDJSON
+    'RUN_ID': None,    # 🔥 --run-id: riprende un run in streaming interrotto
+    'UNIVERSO': None,  # 🔥 --universo: file in data/universi/ (None = lista integrata)
+    'FILTRI': {},      # 🔥 --tag chiave=valore sulle colonne del file universo
+    'SHARD': None      # 🔥 --shard i/N: questo processo analizza solo lo shard i di N
+}
+
+def tickers_selezionati():
+    """Ticker da analizzare secondo --universo/--tag/--shard (None = lista integrata completa)"""
+    tickers = None
+    if OPZIONI['UNIVERSO'] or OPZIONI['FILTRI']:
+        from universi import carica_universo
+        tickers = carica_universo(OPZIONI['UNIVERSO'] or 'base', OPZIONI['FILTRI'])
+        if tickers is None:
+            raise ValueError(f"universo '{OPZIONI['UNIVERSO']}' non disponibile")
+    if OPZIONI['SHARD']:
+        from universi import filtra_shard
+        from mio_stock_finder import azioni
+        indice, totale = OPZIONI['SHARD']
+        tickers = filtra_shard(azioni if tickers is None else tickers, indice, totale)
+        print(f"🧩 Shard {indice}/{totale}: {len(tickers)} ticker")
+    return tickers
+
+def aggiorna_indice(*files):
+    """Aggiunge i nuovi output all'indice storico (data/indice_storico.sqlite)"""
+    try:
+        from indice_storico import indicizza
+        indicizza([f for f in files if f and os.path.exists(f)])
+    except Exception as e:
+        print(f"⚠️  Indice storico non aggiornato: {e}")
+
+def suffisso_shard():
+    return f"_shard{OPZIONI['SHARD'][0]}di{OPZIONI['SHARD'][1]}" if OPZIONI['SHARD'] else ""
+
 def main():
     print("🎯 VALUE STOCK FINDER - MAIN INTEGRATOR")
     print("=" * 50)
@@ -43,18 +80,39 @@ def esegui_screening():
         # Aggiungi src al path per importare
         sys.path.append('src')
         from mio_stock_finder import analizza_azioni_avanzata
+        from strumentazione import avvia_run, esporta_metriche, fase
+        from risultati import per_json
+        from formato_colonnare import FORMATO_CONFIG, pyarrow_disponibile, salva_parquet
         
         print("\n🚀 AVVIO SCREENING COMPLETO...")
-        risultati = analizza_azioni_avanzata()
+        avvia_run('screening', profila=OPZIONI['PROFILA'])
+
+        if OPZIONI['STREAM'] or OPZIONI['RUN_ID']:
+            # 🔥 Output incrementale + checkpoint: un crash non perde i ticker già analizzati
+            from screening_stream import esegui_screening_stream
+            run_id = OPZIONI['RUN_ID'] or datetime.now().strftime("%Y%m%d_%H%M") + suffisso_shard()
+            riepilogo = esegui_screening_stream(run_id, tickers_selezionati())
+            aggiorna_indice(riepilogo['path'])
+            esporta_metriche(suffisso=riepilogo['run_id'])
+            return
+
+        risultati = analizza_azioni_avanzata(tickers_selezionati())
         
-        # Salva in outputs/screens/
-        data_oggi = datetime.now().strftime("%Y%m%d_%H%M")
-        filename = f"outputs/screens/screening_{data_oggi}.json"
+        # Salva in outputs/screens/ (JSON o Parquet colonnare)
+        data_oggi = datetime.now().strftime("%Y%m%d_%H%M") + suffisso_shard()
+        parquet = FORMATO_CONFIG['FORMATO'] == 'parquet' and pyarrow_disponibile()
+        filename = f"outputs/screens/screening_{data_oggi}.{'parquet' if parquet else 'json'}"
         
-        with open(filename, 'w') as f:
-            json.dump(risultati, f, indent=2)
+        with fase('salvataggio_risultati'):
+            if parquet:
+                salva_parquet(risultati, filename, 'screening')
+            else:
+                with open(filename, 'w') as f:
+                    json.dump(risultati, f, indent=2, default=per_json)
         
         print(f"💾 Risultati salvati in: {filename}")
+        aggiorna_indice(filename)
+        esporta_metriche(suffisso=data_oggi)
         
     except Exception as e:
         print(f"❌ Errore durante lo screening: {e}")
@@ -64,15 +122,20 @@ def esegui_backtesting():
     try:
         # Importa i moduli
         sys.path.append('src')
-        from backtester import backtest_opportunita, test_backtest_sistema, salva_risultati_backtest
+        from backtester import test_backtest_sistema
         from mio_stock_finder import analizza_azioni_avanzata
+        from strumentazione import avvia_run, esporta_metriche
         
         print("\n📊 MODALITÀ BACKTESTING INTEGRATA")
         print("1. Test sistema backtesting")
         print("2. Backtesting su screening reale (OGGI)")
         print("3. Backtesting su file screening precedente")
+        print("4. Walk-forward point-in-time (ribilanciamento mensile)")
+        print("5. Simulazione portafoglio su file screening (pesi, ribilanciamento, costi)")
+        print("6. Backtest multi-orizzonte su file screening (1/3/5/10 anni, un solo download)")
         
-        scelta = input("\nScelta (1-3): ").strip()
+        scelta = input("\nScelta (1-6): ").strip()
+        avvia_run('backtest', profila=OPZIONI['PROFILA'])
         
         if scelta == "1":
             test_backtest_sistema()
@@ -81,55 +144,173 @@ def esegui_backtesting():
             print("🔍 Esecuzione screening in tempo reale...")
             
             # Esegui lo screening per ottenere opportunità REALI
-            risultati_screening = analizza_azioni_avanzata()
+            risultati_screening = analizza_azioni_avanzata(tickers_selezionati())
+            backtest_su_screening(risultati_screening, "oggi")
             
-            if not risultati_screening:
-                print("❌ Nessun risultato dallo screening")
+        elif scelta == "3":
+            print("📁 Caricamento screening precedente...")
+            # 🔥 Nessuno screening live: niente download dei fondamentali né pause
+            path = scegli_file_screening()
+            if not path:
                 return
+            risultati_screening = carica_screening(path)
+            backtest_su_screening(risultati_screening, os.path.basename(path))
             
-            # Filtra solo le opportunità di qualità (come fa mio_stock_finder.py)
-            min_discount = 5.0  # Stesso valore di CONFIG
-            opportunita_reali = [
-                r for r in risultati_screening 
-                if r['sconto'] > min_discount and r['qualita_ok']
-            ]
-            
-            if not opportunita_reali:
-                print("❌ Nessuna opportunità di qualità trovata oggi")
+        elif scelta == "4":
+            from walk_forward import esegui_walk_forward, date_mensili
+            from mio_stock_finder import get_cache
+
+            prima_data = get_cache().prima_data_snapshot()
+            if not prima_data:
+                print("❌ Nessuno snapshot dei fondamentali: esegui prima almeno uno screening")
                 return
-                
-            print(f"🎯 Trovate {len(opportunita_reali)} opportunità di qualità")
-            
-            # Esegui backtesting sulle opportunità reali
-            risultati_backtest = backtest_opportunita(opportunita_reali, anni=3)
+            print(f"📅 Snapshot fondamentali disponibili dal {prima_data}")
+            esegui_walk_forward(date_mensili(prima_data))
             
-            if risultati_backtest:
-                salva_risultati_backtest(risultati_backtest)
-                print("\n📈 ANALISI COMPARATIVA vs S&P500:")
-                for risultato in risultati_backtest[:6]:  # Top 6 (incluso S&P500)
-                    if risultato['ticker'] == 'S&P500':
-                        print(f"   📊 {risultato['ticker']}: {risultato['rendimento_totale_perc']:>6.1f}% (Benchmark)")
-                    else:
-                        rendimento = risultato['rendimento_totale_perc']
-                        sconto = risultato['sconto']
-                        alpha = risultato.get('alpha_perc', 0)  # Usa .get() per sicurezza
-                        performance = "🚀" if risultato.get('battuto_sp500', False) else "📉"
-                        
-                        print(f"   {performance} {risultato['ticker']}: Sconto {sconto:>5.1f}% | Rend: {rendimento:>5.1f}% | Alpha: {alpha:>5.1f}% | Score: {risultato['investment_score']:.0f}")
+        elif scelta == "5":
+            from simulatore_portafoglio import simula_opportunita, mostra_simulazione, salva_simulazione
+
+            path = scegli_file_screening()
+            if not path:
+                return
+            pesi = input("Pesi (uguale/punteggio/inversa_volatilita, invio = uguale): ").strip() or 'uguale'
+            if pesi not in ('uguale', 'punteggio', 'inversa_volatilita'):
+                print("❌ Schema di pesi non valido")
+                return
+            simulazione = simula_opportunita(carica_screening(path), anni=3, pesi=pesi)
+            if simulazione:
+                mostra_simulazione(simulazione)
+                salva_simulazione(simulazione)
             
-        elif scelta == "3":
-            print("📁 Caricamento screening precedente...")
-            # Qui puoi aggiungere il caricamento da file JSON salvato
-            print("⚠️  Funzionalità in sviluppo - usa opzione 2 per ora")
+        elif scelta == "6":
+            path = scegli_file_screening()
+            if not path:
+                return
+            backtest_orizzonti_su_screening(carica_screening(path), os.path.basename(path))
             
         else:
             print("❌ Scelta non valida")
+            return
+        
+        esporta_metriche()
             
     except Exception as e:
         print(f"❌ Errore backtesting: {e}")
         import traceback
         traceback.print_exc()
         
+def backtest_su_screening(risultati_screening, fonte):
+    """Filtra le opportunità di qualità, esegue il backtest, salva e mostra il confronto con l'S&P500"""
+    from backtester import backtest_opportunita, salva_risultati_backtest
+    from mio_stock_finder import CONFIG
+
+    if not risultati_screening:
+        print("❌ Nessun risultato dallo screening")
+        return None
+    
+    # Filtra solo le opportunità di qualità (come fa mio_stock_finder.py)
+    opportunita_reali = [
+        r for r in risultati_screening 
+        if r['sconto'] is not None and r['sconto'] > CONFIG['MIN_DISCOUNT'] and r['qualita_ok']
+    ]
+    
+    if not opportunita_reali:
+        print(f"❌ Nessuna opportunità di qualità trovata ({fonte})")
+        return None
+        
+    print(f"🎯 Trovate {len(opportunita_reali)} opportunità di qualità ({fonte})")
+    
+    # Esegui backtesting sulle opportunità reali
+    risultati_backtest = backtest_opportunita(opportunita_reali, anni=3)
+    
+    if risultati_backtest:
+        aggiorna_indice(salva_risultati_backtest(risultati_backtest))
+        print("\n📈 ANALISI COMPARATIVA vs S&P500:")
+        for risultato in risultati_backtest[:6]:  # Top 6 (incluso S&P500)
+            if risultato['ticker'] == 'S&P500':
+                print(f"   📊 {risultato['ticker']}: {risultato['rendimento_totale_perc']:>6.1f}% (Benchmark)")
+            else:
+                rendimento = risultato['rendimento_totale_perc']
+                sconto = risultato['sconto']
+                alpha = risultato.get('alpha_perc') or 0  # None se il confronto con l'S&P500 non è riuscito
+                performance = "🚀" if risultato.get('battuto_sp500') else "📉"
+                
+                settore = f" | vs {risultato['benchmark_settore']}: {risultato['alpha_settore_perc']:>5.1f}%" if risultato.get('benchmark_settore') else ""
+                print(f"   {performance} {risultato['ticker']}: Sconto {sconto:>5.1f}% | Rend: {rendimento:>5.1f}% | Alpha: {alpha:>5.1f}%{settore} | Score: {risultato['investment_score']:.0f}")
+    return risultati_backtest
+
+def backtest_orizzonti_su_screening(risultati_screening, fonte):
+    """Backtest delle opportunità di qualità su tutti gli orizzonti di BACKTEST_CONFIG['ORIZZONTI']"""
+    from backtester import backtest_multi_orizzonte, salva_backtest_orizzonti, BACKTEST_CONFIG
+    from mio_stock_finder import CONFIG
+
+    opportunita_reali = [
+        r for r in risultati_screening or []
+        if r['sconto'] is not None and r['sconto'] > CONFIG['MIN_DISCOUNT'] and r['qualita_ok']
+    ]
+    if not opportunita_reali:
+        print(f"❌ Nessuna opportunità di qualità trovata ({fonte})")
+        return None
+    print(f"🎯 Trovate {len(opportunita_reali)} opportunità di qualità ({fonte})")
+
+    tabella = backtest_multi_orizzonte(opportunita_reali)
+    if tabella is None:
+        return None
+    aggiorna_indice(salva_backtest_orizzonti(tabella))
+
+    orizzonti = sorted(set(BACKTEST_CONFIG['ORIZZONTI']))
+    print("\n📈 RENDIMENTO TOTALE PER ORIZZONTE (alpha vs S&P500):")
+    print("   " + f"{'Ticker':<10}" + "".join(f"{f'{a}a':>18}" for a in orizzonti))
+    for _, riga in tabella.iterrows():
+        celle = []
+        for a in orizzonti:
+            rendimento, alpha = riga.get(f'rendimento_totale_perc_{a}a'), riga.get(f'alpha_perc_{a}a')
+            if numero_valido(rendimento):
+                celle.append(f"{rendimento:>7.1f}% ({alpha:>+6.1f})" if numero_valido(alpha) else f"{rendimento:>7.1f}%        ")
+            else:
+                celle.append(f"{'n/d':>18}")
+        print("   " + f"{riga['ticker']:<10}" + "".join(f"{c:>18}" for c in celle))
+    return tabella
+
+def numero_valido(valore):
+    """True se il valore è un numero (né None né NaN)"""
+    return valore is not None and valore == valore
+
+def scegli_file_screening(cartelle=('outputs/screens', 'outputs/archive')):
+    """Elenca gli screening salvati (più recenti prima) e restituisce quello scelto"""
+    estensioni = ('.json', '.ndjson', '.csv', '.parquet')
+    files = [os.path.join(c, f) for c in cartelle if os.path.isdir(c) for f in os.listdir(c) if f.endswith(estensioni)]
+    files.sort(key=os.path.getmtime, reverse=True)
+
+    if not files:
+        print("❌ Nessuno screening salvato in " + ", ".join(cartelle))
+        return None
+
+    for i, path in enumerate(files[:10], 1):
+        print(f"{i}. {path}")
+    scelta = input("\nNumero file o percorso (invio = più recente): ").strip()
+    if not scelta:
+        return files[0]
+    if scelta.isdigit() and 1 <= int(scelta) <= min(len(files), 10):
+        return files[int(scelta) - 1]
+    if os.path.exists(scelta):
+        return scelta
+    print("❌ Scelta non valida")
+    return None
+
+def carica_screening(path):
+    """Risultati di uno screening salvato (JSON, NDJSON, CSV, Parquet) pronti per il backtest"""
+    from universi import carica_risultati
+    from mio_stock_finder import completa_punteggi
+
+    # I CSV più vecchi non hanno il punteggio: lo ricalcola dai campi salvati
+    risultati = completa_punteggi(carica_risultati(path))
+
+    if risultati and all(r['qualita_ok'] is None for r in risultati):
+        print("⚠️  Il file non contiene il controllo qualità (qualita_ok): nessuna opportunità selezionabile")
+    print(f"📂 Caricati {len(risultati)} risultati da {path}")
+    return risultati
+
 def test_struttura():
     """Testa la struttura del repository"""
     print("\n🧪 TEST STRUTTURA REPOSITORY")
@@ -152,4 +333,33 @@ def test_struttura():
             print(f"❌ {file} (mancante)")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Value Stock Finder - Main Integrator")
+    parser.add_argument('--profile', action='store_true',
+                        help="Salva un profilo cProfile del run in outputs/reports/ (analizzabile con pstats/snakeviz)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Screening in streaming: risultati in NDJSON man mano che arrivano")
+    parser.add_argument('--run-id', help="ID del run in streaming (stesso ID = riprende saltando i ticker completati)")
+    parser.add_argument('--formato', choices=['json', 'parquet'],
+                        help="Formato dei file di screening/backtest (parquet richiede pyarrow)")
+    parser.add_argument('--universo', help="Universo da data/universi/ (nome o percorso CSV/TXT)")
+    parser.add_argument('--tag', action='append', help="Filtro sui tag dell'universo, es. categoria=tecnologia")
+    parser.add_argument('--shard', help="Analizza solo lo shard i di N (es. 2/4), senza menu")
+    parser.add_argument('--unisci', nargs='+', metavar='FILE', help="Unisce gli output degli shard in una classifica")
+    args = parser.parse_args()
+
+    sys.path.append('src')
+    from universi import parse_shard, parse_filtri, unisci_shard
+    if args.formato:
+        from formato_colonnare import FORMATO_CONFIG
+        FORMATO_CONFIG['FORMATO'] = args.formato
+    OPZIONI.update(
+        PROFILA=args.profile, STREAM=args.stream, RUN_ID=args.run_id, UNIVERSO=args.universo,
+        FILTRI=parse_filtri(args.tag), SHARD=parse_shard(args.shard) if args.shard else None
+    )
+
+    if args.unisci:
+        unisci_shard(args.unisci, f"outputs/screens/screening_{datetime.now().strftime('%Y%m%d_%H%M')}_unito.json")
+    elif args.shard:
+        esegui_screening()  # run non interattivo: un processo per shard
+    else:
+        main()
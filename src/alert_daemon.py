@@ -0,0 +1,330 @@
+"""
+🔔 ALERT DAEMON - Value Stock Finder
+Processo sempre attivo che segnala le opportunità eccezionali appena il prezzo le crea,
+senza rifare lo screening.
+
+Il valore intrinseco dipende solo dai fondamentali: resta in memoria (dall'ultimo screening)
+e a ogni aggiornamento di prezzo si ricalcolano SOLO sconto e punteggio di quel ticker:
+O(1) per tick, nessun download di 'info'.
+
+Sorgenti prezzi (righe "TICKER,prezzo" oppure JSON {"ticker": "PFE", "prezzo": 24.1}):
+    python src/alert_daemon.py --file prezzi.csv --segui       # file, anche in crescita (come tail -f)
+    python src/alert_daemon.py --porta 9999                    # socket TCP locale (una riga per tick)
+    python src/alert_daemon.py --provider --intervallo 60      # polling batch dei prezzi dal provider dati
+Alert a console e in outputs/alerts/alert_<data>.ndjson
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+import socketserver
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from mio_stock_finder import CONFIG, calculate_investment_score, get_cache
+from risultati import ComeDizionario
+from screening_stream import ScrittoreNDJSON
+from strumentazione import fase, conta
+
+ALERT_CONFIG = {
+    'CARTELLA': 'outputs/alerts',
+    'SOGLIA_ECCEZIONALE': 80,      # investment_score da "FORTE ACQUISTO 🚀"
+    'ISTERESI': 1.0,               # Punti sotto la soglia prima di considerarla riattraversata (niente raffiche)
+    'RICARICA_OGNI_S': 3600,       # Rilettura dei valori intrinseci dall'ultimo screening
+    'CONTROLLO_SORGENTE_S': 5.0,   # Con --porta: ogni quanto si guarda se la sorgente dei valori intrinseci è cambiata
+    'CAMPIONI_LATENZA': 10000      # Ultime latenze tenute per p50/p99
+}
+
+@dataclass(slots=True)
+class StatoTicker(ComeDizionario):
+    """Quello che serve per ricalcolare sconto e punteggio di un ticker a ogni prezzo"""
+    ticker: str
+    nome: str = ''
+    valore_intrinseco: float = None
+    qualita_ok: bool = False
+    rischio: str = None
+    prezzo: float = None
+    sconto: float = None
+    investment_score: float = None
+    opportunita: bool = False
+    eccezionale: bool = False
+
+# ==================== STATO IN MEMORIA ====================
+
+def risultati_da_cache():
+    """Ultimi risultati di screening memorizzati nella cache fondamentali"""
+    return list(get_cache().risultati_memorizzati().values())
+
+class AlertDaemon:
+    """Valori intrinseci in memoria + ricalcolo incrementale per tick + emissione degli alert"""
+
+    def __init__(self, risultati, cartella=None, notifica=None):
+        self.stati = {}
+        self.notifica = notifica  # callback opzionale (es. email, webhook)
+        self.latenze = deque(maxlen=ALERT_CONFIG['CAMPIONI_LATENZA'])
+        self.statistiche = {'tick': 0, 'ignorati': 0, 'alert': 0}
+        self._lock = threading.Lock()
+        self.cartella = cartella or ALERT_CONFIG['CARTELLA']
+        self._giorno, self._scrittore = None, None
+        self.carica(risultati)
+
+    def _file_alert(self):
+        """Un file di alert al giorno (il daemon può restare attivo per settimane)"""
+        giorno = datetime.now().strftime('%Y%m%d')
+        if giorno != self._giorno:
+            if self._scrittore:
+                self._scrittore.chiudi()
+            self._giorno = giorno
+            self._scrittore = ScrittoreNDJSON(os.path.join(self.cartella, f"alert_{giorno}.ndjson"))
+        return self._scrittore
+
+    def carica(self, risultati):
+        """
+        (Ri)carica i valori intrinseci. Lo stato opportunità parte da quello dell'ultimo
+        screening: all'avvio non si ripetono alert per opportunità già note.
+        """
+        with self._lock:
+            for r in risultati:
+                valore_intrinseco = r.get('valore_intrinseco')
+                if not valore_intrinseco:
+                    continue
+                stato = self.stati.get(r['ticker'])
+                if stato is None:
+                    stato = self.stati[r['ticker']] = StatoTicker(r['ticker'], prezzo=r.get('prezzo'))
+                stato.nome = r.get('nome') or ''
+                stato.valore_intrinseco = valore_intrinseco
+                stato.qualita_ok = bool(r.get('qualita_ok'))
+                stato.rischio = r.get('rischio')
+                if stato.prezzo:
+                    self._ricalcola(stato, stato.prezzo)
+                    stato.opportunita, stato.eccezionale = self._soglie(stato)
+        print(f"🧠 Valori intrinseci in memoria: {len(self.stati)} ticker")
+
+    def _ricalcola(self, stato, prezzo):
+        stato.prezzo = prezzo
+        stato.sconto = (stato.valore_intrinseco - prezzo) / stato.valore_intrinseco * 100
+        stato.investment_score = calculate_investment_score(stato)
+
+    def _soglie(self, stato):
+        """(opportunità, eccezionale) con isteresi: per uscire bisogna scendere di ISTERESI sotto la soglia"""
+        isteresi = ALERT_CONFIG['ISTERESI']
+        soglia_sconto = CONFIG['MIN_DISCOUNT'] - (isteresi if stato.opportunita else 0)
+        soglia_score = ALERT_CONFIG['SOGLIA_ECCEZIONALE'] - (isteresi if stato.eccezionale else 0)
+        opportunita = stato.qualita_ok and stato.sconto > soglia_sconto
+        return opportunita, opportunita and stato.investment_score >= soglia_score
+
+    def aggiorna(self, ticker, prezzo, istante=None):
+        """Nuovo prezzo di un ticker: ricalcolo O(1) e alert se una soglia è stata attraversata"""
+        inizio = time.perf_counter()
+        with self._lock:
+            self.statistiche['tick'] += 1
+            stato = self.stati.get(ticker)
+            if stato is None or not prezzo or prezzo <= 0:
+                self.statistiche['ignorati'] += 1
+                return []
+
+            self._ricalcola(stato, prezzo)
+            opportunita, eccezionale = self._soglie(stato)
+            alert = []
+            if opportunita and not stato.opportunita:
+                alert.append('nuova_opportunita')
+            if eccezionale and not stato.eccezionale:
+                alert.append('opportunita_eccezionale')
+            if stato.opportunita and not opportunita:
+                alert.append('fine_opportunita')
+            stato.opportunita, stato.eccezionale = opportunita, eccezionale
+
+            emessi = [self._emetti(tipo, stato, istante, inizio) for tipo in alert]
+            self.latenze.append(time.perf_counter() - inizio)
+        return emessi
+
+    def _emetti(self, tipo, stato, istante, inizio):
+        alert = {
+            'tipo': tipo,
+            'ticker': stato.ticker,
+            'nome': stato.nome,
+            'prezzo': stato.prezzo,
+            'valore_intrinseco': round(stato.valore_intrinseco, 4),
+            'sconto': round(stato.sconto, 2),
+            'investment_score': round(stato.investment_score, 1),
+            'rischio': stato.rischio,
+            'istante': istante or datetime.now().isoformat(timespec='seconds'),
+            'latenza_ms': round((time.perf_counter() - inizio) * 1000, 3)
+        }
+        self.statistiche['alert'] += 1
+        conta(f'alert_{tipo}')
+        simbolo = {'nuova_opportunita': '🎯', 'opportunita_eccezionale': '🚀', 'fine_opportunita': '📉'}[tipo]
+        print(f"{simbolo} {tipo.upper()}: {stato.ticker} ${stato.prezzo:.2f} | Sconto {stato.sconto:.1f}% | "
+              f"Punteggio {stato.investment_score:.0f} | Rischio {stato.rischio}")
+        self._file_alert().scrivi(alert)
+        if self.notifica:
+            self.notifica(alert)
+        return alert
+
+    def riepilogo(self):
+        latenze = sorted(self.latenze)
+        percentile = lambda p: round(latenze[min(int(len(latenze) * p), len(latenze) - 1)] * 1000, 4) if latenze else None
+        return {**self.statistiche, 'p50_ms': percentile(0.5), 'p99_ms': percentile(0.99), 'max_ms': percentile(1.0)}
+
+    def chiudi(self):
+        if self._scrittore:
+            self._scrittore.chiudi()
+
+# ==================== SORGENTI PREZZI ====================
+
+def interpreta_riga(riga):
+    """'PFE,24.1' | 'PFE 24.1' | '{"ticker": "PFE", "prezzo": 24.1}' -> ('PFE', 24.1) o None"""
+    riga = riga.strip()
+    if not riga or riga.startswith('#'):
+        return None
+    try:
+        if riga.startswith('{'):
+            dati = json.loads(riga)
+            return str(dati['ticker']).upper(), float(dati.get('prezzo', dati.get('price')))
+        parti = riga.replace(',', ' ').split()
+        return parti[0].upper(), float(parti[1])
+    except (ValueError, KeyError, IndexError, TypeError):
+        conta('righe_prezzo_non_valide')
+        return None
+
+def prezzi_da_file(path, segui=False, pausa=0.2):
+    """Tick da file; con segui=True aspetta le righe nuove (un'ultima riga incompleta viene attesa)"""
+    with open(path, encoding='utf-8') as f:
+        parziale = ''
+        while True:
+            riga = f.readline()
+            if not riga:
+                if not segui:
+                    break
+                time.sleep(pausa)
+                continue
+            parziale += riga
+            if not parziale.endswith('\n') and segui:
+                continue
+            tick = interpreta_riga(parziale)
+            parziale = ''
+            if tick:
+                yield tick
+
+def prezzi_da_provider(tickers, intervallo=60):
+    """Polling: un download batch delle ultime chiusure ogni 'intervallo' secondi, solo i prezzi cambiati"""
+    from data_provider import get_provider
+    ultimi = {}
+    while True:
+        fine = datetime.now() + timedelta(days=1)
+        with fase('polling_prezzi'):
+            panel = get_provider().get_prezzi(tickers, fine - timedelta(days=8), fine)
+        for ticker, serie in panel.items():
+            serie = serie.dropna()
+            if not serie.empty and ultimi.get(ticker) != serie.iloc[-1]:
+                ultimi[ticker] = float(serie.iloc[-1])
+                yield ticker, ultimi[ticker]
+        time.sleep(intervallo)
+
+def esegui_da_sorgente(daemon, sorgente, ricarica=None):
+    """Consuma i tick; ogni RICARICA_OGNI_S rilegge i valori intrinseci con ricarica()"""
+    prossima_ricarica = time.time() + ALERT_CONFIG['RICARICA_OGNI_S']
+    for ticker, prezzo in sorgente:
+        with fase('tick_alert'):
+            daemon.aggiorna(ticker, prezzo)
+        if ricarica and time.time() >= prossima_ricarica:
+            daemon.carica(ricarica())
+            prossima_ricarica = time.time() + ALERT_CONFIG['RICARICA_OGNI_S']
+
+def impronta_file(path):
+    """(mtime, dimensione) del file e dell'eventuale WAL SQLite: cambia quando la sorgente viene riscritta"""
+    voci = []
+    for percorso in (path, path + '-wal'):
+        if os.path.exists(percorso):
+            stat = os.stat(percorso)
+            voci.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(voci)
+
+def sorveglia_sorgente(daemon, ricarica, path, ogni=None):
+    """
+    Con --porta non c'è un ciclo di tick da cui ricaricare: un thread di sfondo rilegge i valori
+    intrinseci appena il file sorgente (screening salvato o cache fondamentali) cambia.
+    Restituisce l'evento che ferma il thread.
+    """
+    ogni = ogni or ALERT_CONFIG['CONTROLLO_SORGENTE_S']
+    fermo = threading.Event()
+
+    def ciclo():
+        impronta = impronta_file(path)
+        while not fermo.wait(ogni):
+            attuale = impronta_file(path)
+            if attuale == impronta:
+                continue
+            try:
+                daemon.carica(ricarica())
+            except Exception as e:
+                # File a metà scrittura: si riprova al controllo successivo
+                print(f"⚠️  Ricarica dei valori intrinseci fallita: {str(e)[:100]}")
+                continue
+            impronta = attuale
+
+    threading.Thread(target=ciclo, name='sorveglia_sorgente', daemon=True).start()
+    return fermo
+
+class _GestoreTick(socketserver.StreamRequestHandler):
+    daemon = None
+
+    def handle(self):
+        for riga in self.rfile:
+            tick = interpreta_riga(riga.decode('utf-8', errors='ignore'))
+            if tick:
+                with fase('tick_alert'):
+                    self.daemon.aggiorna(*tick)
+
+def avvia_server(daemon, porta, host='127.0.0.1'):
+    """Server TCP locale: ogni client invia righe di prezzo; restituisce il server (serve_forever per bloccare)"""
+    _GestoreTick.daemon = daemon
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    server = socketserver.ThreadingTCPServer((host, porta), _GestoreTick)
+    server.daemon_threads = True
+    print(f"📡 In ascolto su {host}:{server.server_address[1]} (righe 'TICKER,prezzo')")
+    return server
+
+# ==================== CLI ====================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alert in tempo reale sulle opportunità (senza rifare lo screening)")
+    sorgente = parser.add_mutually_exclusive_group(required=True)
+    sorgente.add_argument('--file', help="File di prezzi (righe TICKER,prezzo o JSON)")
+    sorgente.add_argument('--porta', type=int, help="Porta TCP locale da cui ricevere i prezzi")
+    sorgente.add_argument('--provider', action='store_true', help="Polling dei prezzi dal provider dati")
+    parser.add_argument('--segui', action='store_true', help="Con --file: resta in attesa di nuove righe")
+    parser.add_argument('--intervallo', type=float, default=60, help="Con --provider: secondi tra due polling")
+    parser.add_argument('--screening', help="Valori intrinseci da uno screening salvato (default: cache fondamentali)")
+    args = parser.parse_args()
+
+    if args.screening:
+        from universi import carica_risultati
+        ricarica = lambda: carica_risultati(args.screening)
+    else:
+        ricarica = risultati_da_cache
+
+    daemon = AlertDaemon(ricarica())
+    if not daemon.stati:
+        print("❌ Nessun valore intrinseco disponibile: esegui prima uno screening")
+        raise SystemExit(1)
+
+    print(f"🔔 ALERT DAEMON | sconto > {CONFIG['MIN_DISCOUNT']}% con qualità ok | "
+          f"eccezionale da punteggio {ALERT_CONFIG['SOGLIA_ECCEZIONALE']}")
+    try:
+        if args.porta:
+            sorveglia_sorgente(daemon, ricarica, args.screening or get_cache().path)
+            avvia_server(daemon, args.porta).serve_forever()
+        elif args.provider:
+            esegui_da_sorgente(daemon, prezzi_da_provider(list(daemon.stati), args.intervallo), ricarica)
+        else:
+            esegui_da_sorgente(daemon, prezzi_da_file(args.file, args.segui), ricarica)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.chiudi()
+        r = daemon.riepilogo()
+        print(f"\n📊 {r['tick']} tick ({r['ignorati']} ignorati) | {r['alert']} alert | "
+              f"latenza p50 {r['p50_ms']} ms, p99 {r['p99_ms']} ms")
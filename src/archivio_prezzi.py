@@ -0,0 +1,167 @@
+"""
+🗄️ ARCHIVIO PREZZI - Value Stock Finder
+Storico chiusure giornaliere su disco: un file binario append-only per ticker,
+letto con np.memmap (zero-copy). Ogni aggiornamento scarica solo i giorni mancanti.
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from data_provider import get_provider, crea_panel
+
+# Una barra = data + chiusura (16 byte)
+DTYPE_BARRE = np.dtype([('data', 'datetime64[D]'), ('close', '<f8')])
+
+# Giorni già salvati che vengono riscaricati per verificare gli aggiustamenti
+# (split/dividendi cambiano tutto lo storico auto_adjust)
+SOVRAPPOSIZIONE_GIORNI = 7
+TOLLERANZA_AGGIUSTAMENTO = 0.005  # 0.5%
+
+class ArchivioPrezzi:
+    """
+    Archivio locale delle chiusure: data/prezzi/<provider>/<TICKER>.bin + _indice.json
+    L'indice ricorda per ogni ticker da quale data parte lo storico e fino a quando è coperto.
+    """
+
+    def __init__(self, cartella):
+        self.cartella = cartella
+        os.makedirs(cartella, exist_ok=True)
+        self._path_indice = os.path.join(cartella, '_indice.json')
+        self._indice = {}
+        if os.path.exists(self._path_indice):
+            with open(self._path_indice) as f:
+                self._indice = json.load(f)
+
+    def _path(self, ticker):
+        return os.path.join(self.cartella, ticker.replace('/', '_') + '.bin')
+
+    def _salva_indice(self):
+        temporaneo = self._path_indice + '.tmp'
+        with open(temporaneo, 'w') as f:
+            json.dump(self._indice, f)
+        os.replace(temporaneo, self._path_indice)
+
+    # ==================== LETTURA ====================
+
+    def barre(self, ticker):
+        """Tutte le barre del ticker come memmap in sola lettura (nessuna copia in RAM)"""
+        path = self._path(ticker)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty(0, dtype=DTYPE_BARRE)
+        return np.memmap(path, dtype=DTYPE_BARRE, mode='r')
+
+    def leggi(self, ticker, start, end):
+        """Vista sulle barre in [start, end): la memoria usata dipende dalla finestra, non dallo storico"""
+        barre = self.barre(ticker)
+        date = barre['data']
+        i = np.searchsorted(date, np.datetime64(pd.Timestamp(start).date()), side='left')
+        j = np.searchsorted(date, np.datetime64(pd.Timestamp(end).date()), side='left')
+        return barre[i:j]
+
+    def panel(self, tickers, start, end):
+        """Panel chiusure date x ticker letto dall'archivio"""
+        colonne = {}
+        for ticker in tickers:
+            barre = self.leggi(ticker, start, end)
+            if len(barre):
+                colonne[ticker] = pd.Series(barre['close'], index=barre['data'].astype('datetime64[ns]'))
+        return crea_panel(colonne, tickers)
+
+    def ultima_data(self, ticker):
+        barre = self.barre(ticker)
+        return barre['data'][-1] if len(barre) else None
+
+    # ==================== AGGIORNAMENTO INCREMENTALE ====================
+
+    def aggiorna(self, tickers, start, end, provider=None):
+        """
+        Porta l'archivio a coprire [start, end) per tutti i ticker.
+        - ticker nuovi (o storico troppo corto): download completo
+        - ticker già presenti: download solo della coda mancante, in batch
+        Si salvano solo giorni completi (fino a ieri), così la barra di oggi non resta parziale.
+        """
+        provider = provider or get_provider()
+        oggi = np.datetime64(pd.Timestamp.now().date())
+        start = np.datetime64(pd.Timestamp(start).date())
+        end = min(np.datetime64(pd.Timestamp(end).date()), oggi)
+
+        completi = []
+        code = defaultdict(list)  # data inizio download -> ticker
+        for ticker in tickers:
+            meta = self._indice.get(ticker)
+            ultima = self.ultima_data(ticker)
+            if meta is None or start < np.datetime64(meta['primo']):
+                completi.append(ticker)
+            elif np.datetime64(meta['coperto_fino']) < end:
+                inizio = ultima - SOVRAPPOSIZIONE_GIORNI if ultima is not None else np.datetime64(meta['primo'])
+                code[inizio].append(ticker)
+
+        statistiche = {'completi': 0, 'incrementali': 0, 'aggiustati': 0, 'mancanti': 0}
+
+        for inizio, gruppo in code.items():
+            panel = provider.get_prezzi(gruppo, str(inizio), str(end))
+            for ticker in gruppo:
+                nuove = _barre_da_serie(panel[ticker]) if ticker in panel.columns else np.empty(0, DTYPE_BARRE)
+                if len(nuove) == 0:
+                    # 🔥 Download fallito o vuoto (la coda include sempre la sovrapposizione):
+                    # coperto_fino resta fermo e il ticker viene ritentato al prossimo run
+                    statistiche['mancanti'] += 1
+                elif self._accoda(ticker, nuove):
+                    statistiche['incrementali'] += 1
+                    self._indice[ticker]['coperto_fino'] = str(end)
+                else:
+                    # Prezzi storici cambiati (split/dividendo): si riscarica tutto
+                    statistiche['aggiustati'] += 1
+                    completi.append(ticker)
+
+        if completi:
+            inizio = start
+            for ticker in completi:
+                if ticker in self._indice:
+                    inizio = min(inizio, np.datetime64(self._indice[ticker]['primo']))
+            panel = provider.get_prezzi(completi, str(inizio), str(end))
+            for ticker in completi:
+                nuove = _barre_da_serie(panel[ticker]) if ticker in panel.columns else np.empty(0, DTYPE_BARRE)
+                if len(nuove) == 0:
+                    # Nessuna barra: niente indice né riscrittura, così l'archivio esistente resta valido
+                    statistiche['mancanti'] += 1
+                    continue
+                self._riscrivi(ticker, nuove)
+                self._indice[ticker] = {'primo': str(inizio), 'coperto_fino': str(end)}
+                statistiche['completi'] += 1
+
+        if completi or code:
+            self._salva_indice()
+        return statistiche
+
+    def _accoda(self, ticker, nuove):
+        """Aggiunge le barre nuove (non vuote); False se la sovrapposizione rivela prezzi ri-aggiustati"""
+        esistenti = self.barre(ticker)
+        # Confronto sul primo giorno in comune (sicuramente completo)
+        comuni = np.searchsorted(esistenti['data'], nuove['data'][0])
+        if comuni < len(esistenti) and esistenti['data'][comuni] == nuove['data'][0]:
+            vecchio = float(esistenti['close'][comuni])
+            if abs(nuove['close'][0] / vecchio - 1) > TOLLERANZA_AGGIUSTAMENTO:
+                return False
+
+        # Tronca dal primo giorno riscaricato e accoda: eventuali barre sovrapposte vengono rinfrescate
+        del esistenti
+        with open(self._path(ticker), 'r+b') as f:
+            f.truncate(comuni * DTYPE_BARRE.itemsize)
+            f.seek(0, os.SEEK_END)
+            nuove.tofile(f)
+        return True
+
+    def _riscrivi(self, ticker, barre):
+        with open(self._path(ticker), 'wb') as f:
+            barre.tofile(f)
+
+def _barre_da_serie(serie):
+    """Serie pandas di chiusure -> array strutturato di barre (senza NaN)"""
+    serie = serie.dropna()
+    barre = np.empty(len(serie), dtype=DTYPE_BARRE)
+    barre['data'] = serie.index.values.astype('datetime64[D]')
+    barre['close'] = serie.to_numpy(dtype=float)
+    return barre
@@ -3,105 +3,160 @@
 Analizza performance storica delle strategie value
 """
 
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import json
+from data_provider import get_provider
+from archivio_prezzi import ArchivioPrezzi
+from metriche_performance import calcola_metriche, confronto_benchmark
+from strumentazione import fase
+from risultati import RisultatoBacktest, per_json
+from formato_colonnare import FORMATO_CONFIG, pyarrow_disponibile, salva_parquet
 
-def analizza_performance_storica(ticker, anni=3):
+BACKTEST_CONFIG = {
+    'USA_ARCHIVIO_PREZZI': True,               # 🔥 Storico locale con aggiornamento incrementale
+    'ARCHIVIO_PREZZI_DIR': 'data/prezzi/{provider}',
+    'RISK_FREE_ANNUO': 0.02,                   # Tasso privo di rischio per Sharpe/Sortino
+    'MAX_OPPORTUNITA': 10,                     # Titoli analizzati singolarmente (portafoglio completo: simulatore_portafoglio.py)
+    'ORIZZONTI': [1, 3, 5, 10],                # 🔥 Anni del backtest multi-orizzonte (un solo download al più lungo)
+    'ORIZZONTE_PRINCIPALE': 3,                 # Colonne senza suffisso (compatibili con il backtest classico)
+    'BENCHMARK': '^GSPC',                      # Benchmark di mercato (alpha_perc, beta)
+    'BENCHMARK_SETTORIALI': {                  # 🔥 Settore Yahoo -> ETF settoriale (None = solo mercato)
+        'Technology': 'XLK',
+        'Financial Services': 'XLF',
+        'Healthcare': 'XLV',
+        'Consumer Cyclical': 'XLY',
+        'Consumer Defensive': 'XLP',
+        'Energy': 'XLE',
+        'Industrials': 'XLI',
+        'Basic Materials': 'XLB',
+        'Real Estate': 'XLRE',
+        'Communication Services': 'XLC',
+        'Utilities': 'XLU'
+    }
+}
+
+_archivio = None
+
+def get_archivio():
+    """Archivio prezzi locale del provider attivo"""
+    global _archivio
+    cartella = BACKTEST_CONFIG['ARCHIVIO_PREZZI_DIR'].format(provider=get_provider().nome)
+    if _archivio is None or _archivio.cartella != cartella:
+        _archivio = ArchivioPrezzi(cartella)
+    return _archivio
+
+# Serie dei benchmark già caricate in questo run: (provider, inizio, fine, ticker) -> chiusure
+_benchmark_caricati = {}
+
+def scarica_panel_prezzi(tickers, anni=3, benchmark='^GSPC', altri_benchmark=()):
+    """
+    🔥 Un solo download batch per tutti i ticker + benchmark.
+    Il panel è allineato ai giorni di borsa del benchmark: azioni e S&P500
+    vengono misurati sulle stesse identiche date.
+    I benchmark (mercato + altri_benchmark, es. ETF settoriali) si caricano una volta per run:
+    le chiamate successive sulla stessa finestra li riprendono dalla memoria.
+    """
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=anni*365)
+
+    benchmark_richiesti = list(dict.fromkeys([benchmark] + list(altri_benchmark)))
+    chiave = (get_provider().nome, start_date.date(), end_date.date())
+    in_memoria = {b: _benchmark_caricati[(*chiave, b)] for b in benchmark_richiesti if (*chiave, b) in _benchmark_caricati}
+
+    richiesti = [t for t in dict.fromkeys(list(tickers) + benchmark_richiesti) if t not in in_memoria]
+    with fase('download_prezzi'):
+        panel = _carica_panel(richiesti, anni, start_date, end_date) if richiesti else pd.DataFrame(dtype=float)
+
+    for b in benchmark_richiesti:
+        if b in panel.columns and b not in in_memoria:
+            _benchmark_caricati[(*chiave, b)] = panel[b].dropna()
+    if in_memoria:
+        panel = pd.concat([panel] + [serie.rename(b) for b, serie in in_memoria.items()], axis=1).sort_index()
+        panel = panel[[t for t in dict.fromkeys(list(tickers) + benchmark_richiesti) if t in panel.columns]]
+
+    if benchmark in panel.columns:
+        panel = panel[panel[benchmark].notna()]
+    else:
+        print(f"⚠️  Benchmark {benchmark} non disponibile: panel non allineato")
+
+    return panel, start_date, end_date
+
+def _carica_panel(richiesti, anni, start_date, end_date):
+    """Prezzi dall'archivio locale (scarica solo i giorni mancanti) o con un download diretto"""
+    if BACKTEST_CONFIG['USA_ARCHIVIO_PREZZI']:
+        # 🔥 Scarica solo i giorni mancanti, poi legge tutto dall'archivio locale
+        archivio = get_archivio()
+        stats = archivio.aggiorna(richiesti, start_date, end_date)
+        if stats['completi'] or stats['incrementali']:
+            print(f"📥 Archivio prezzi: {stats['completi']} storici completi, {stats['incrementali']} aggiornamenti incrementali")
+        if stats['mancanti']:
+            print(f"⚠️  Archivio prezzi: {stats['mancanti']} ticker senza dati (ritentati al prossimo run)")
+        panel = archivio.panel(richiesti, start_date, end_date)
+    else:
+        print(f"📥 Download prezzi: {len(richiesti)} ticker in un'unica richiesta ({anni} anni)...")
+        panel = get_provider().get_prezzi(richiesti, start_date, end_date)
+    return panel
+
+def analizza_performance_storica(ticker, anni=3, prezzi=None, periodo=None):
     """
     Analizza la performance storica di un'azione - VERSIONE ULTRA-SICURA
+    Se 'prezzi' (serie di chiusure dal panel) è passato, non scarica nulla.
     """
+    with fase('analizza_performance_storica', latenza=True):
+        return _performance_storica(ticker, anni, prezzi, periodo)
+
+def _performance_storica(ticker, anni, prezzi, periodo):
     try:
-        print(f"📈 Analisi storica {ticker} ({anni} anni)...")
-        
-        # Calcola date
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=anni*365)
-        
-        # 🔥 VERSIONE SICURA: usa download semplice
-        try:
-            stock_data = yf.download(
-                ticker, 
-                start=start_date, 
-                end=end_date, 
-                progress=False,
-                auto_adjust=True
-            )
-        except Exception as e:
-            print(f"   ❌ Download fallito per {ticker}: {e}")
-            return None
-        
-        # 🔥 CONTROLLO MOLTO ESPLICITO
-        if stock_data is None:
-            return None
-            
-        if hasattr(stock_data, 'empty') and stock_data.empty:
-            return None
-            
-        # 🔥 CONVERTI in DataFrame semplice se necessario
-        if isinstance(stock_data, pd.DataFrame):
-            # Se è un DataFrame multi-colonna, prendi solo Close
-            if 'Close' in stock_data.columns:
-                close_series = stock_data['Close']
-            else:
-                # Se non ha colonna Close, usa la prima colonna
-                close_series = stock_data.iloc[:, 0]
+        if prezzi is None:
+            print(f"📈 Analisi storica {ticker} ({anni} anni)...")
+            panel, start_date, end_date = scarica_panel_prezzi([ticker], anni, benchmark=ticker)
+            if ticker not in panel.columns:
+                return None
+            prezzi = panel[ticker]
         else:
-            # Se non è un DataFrame, non possiamo procedere
-            return None
-        
-        # 🔥 VERIFICA DATI
-        if len(close_series) < 30:
-            return None
-            
-        # Rimuovi valori NaN
-        close_series = close_series.dropna()
-        if len(close_series) < 30:
-            return None
-        
-        # Calcola metriche performance
-        prezzo_iniziale = close_series.iloc[0]
-        prezzo_attuale = close_series.iloc[-1]
-        
-        # 🔥 CONVERTI ESPLICITAMENTE a float
-        try:
-            prezzo_iniziale = float(prezzo_iniziale)
-            prezzo_attuale = float(prezzo_attuale)
-        except:
-            return None
-        
-        rendimento_totale = ((prezzo_attuale - prezzo_iniziale) / prezzo_iniziale) * 100
-        
-        # Volatilità
-        rendimenti_giornalieri = close_series.pct_change().dropna()
-        if len(rendimenti_giornalieri) < 10:
-            return None
-            
-        volatilita = float(rendimenti_giornalieri.std() * 100)
-        
-        # Massimo drawdown
-        rolling_max = close_series.expanding().max()
-        drawdown = (close_series - rolling_max) / rolling_max * 100
-        max_drawdown = float(drawdown.min())
-        
-        return {
-            'ticker': ticker,
-            'periodo_analisi_anni': anni,
-            'prezzo_iniziale': round(prezzo_iniziale, 2),
-            'prezzo_attuale': round(prezzo_attuale, 2),
-            'rendimento_totale_perc': round(rendimento_totale, 2),
-            'volatilita_annualizzata': round(volatilita, 2),
-            'max_drawdown_perc': round(max_drawdown, 2),
-            'sharpe_ratio': round(rendimento_totale / volatilita, 2) if volatilita > 0 else 0,
-            'data_inizio': start_date.strftime('%Y-%m-%d'),
-            'data_fine': end_date.strftime('%Y-%m-%d')
-        }
+            start_date, end_date = periodo
+
+        return _metriche_performance(ticker, prezzi, anni, start_date, end_date)
         
     except Exception as e:
         print(f"❌ Errore analisi storica {ticker}: {str(e)[:100]}...")
         return None
 
+def _metriche_performance(ticker, close_series, anni, start_date, end_date):
+    """Rendimento, volatilità, drawdown, Sharpe/Sortino da una serie di chiusure"""
+    if close_series is None:
+        return None
+    metriche = calcola_metriche(close_series.to_frame(ticker), risk_free=BACKTEST_CONFIG['RISK_FREE_ANNUO'])
+    if ticker not in metriche.index:
+        return None
+    return _riga_performance(ticker, metriche.loc[ticker], anni, start_date, end_date)
+
+def _riga_performance(ticker, metriche, anni, start_date, end_date):
+    """Riga della tabella metriche -> dizionario risultato (stesse chiavi di sempre + nuove metriche)"""
+    def arrotonda(valore):
+        return round(float(valore), 2) if pd.notna(valore) else None
+
+    return {
+        'ticker': ticker,
+        'periodo_analisi_anni': anni,
+        'prezzo_iniziale': arrotonda(metriche['prezzo_iniziale']),
+        'prezzo_attuale': arrotonda(metriche['prezzo_attuale']),
+        'rendimento_totale_perc': arrotonda(metriche['rendimento_totale_perc']),
+        'rendimento_annualizzato_perc': arrotonda(metriche['rendimento_annualizzato_perc']),
+        'volatilita_annualizzata': arrotonda(metriche['volatilita_annualizzata']),
+        'max_drawdown_perc': arrotonda(metriche['max_drawdown_perc']),
+        'sharpe_ratio': arrotonda(metriche['sharpe_ratio']) or 0,
+        'sortino_ratio': arrotonda(metriche['sortino_ratio']) or 0,
+        'beta': arrotonda(metriche['beta']),
+        'data_inizio': start_date.strftime('%Y-%m-%d'),
+        'data_fine': end_date.strftime('%Y-%m-%d')
+    }
+
+def benchmark_settore(settore):
+    """ETF di riferimento per il settore Yahoo (None se non mappato o benchmark settoriali disattivati)"""
+    return (BACKTEST_CONFIG['BENCHMARK_SETTORIALI'] or {}).get(settore or '')
+
 def backtest_opportunita(opportunita, anni=3):
     """
     Riceve le opportunità dallo screener e fa backtesting
@@ -109,18 +164,33 @@ def backtest_opportunita(opportunita, anni=3):
     print(f"\n🎯 BACKTESTING {len(opportunita)} OPPORTUNITÀ ({anni} anni)")
     print("=" * 50)
     
+    selezionate = opportunita[:BACKTEST_CONFIG['MAX_OPPORTUNITA']]
+    mercato = BACKTEST_CONFIG['BENCHMARK']
+    settori = {o['ticker']: benchmark_settore(o.get('settore')) for o in selezionate}
+    etf_settoriali = sorted({etf for etf in settori.values() if etf})
+
+    # 🔥 Tutti i prezzi (azioni + S&P500 + ETF settoriali) in un solo download, sulle stesse date
+    panel, start_date, end_date = scarica_panel_prezzi(list(settori), anni, mercato, etf_settoriali)
+
+    # 🔥 Metriche di tutti i ticker (e beta vs S&P500) in un solo passaggio vettoriale
+    with fase('metriche_panel'):
+        metriche = calcola_metriche(panel, benchmark=mercato, risk_free=BACKTEST_CONFIG['RISK_FREE_ANNUO'])
+        # 🔥 Alpha, beta e tracking error verso mercato e settore: una sola operazione per tutte le coppie
+        coppie = [(t, mercato) for t in settori] + [(t, etf) for t, etf in settori.items() if etf]
+        confronti = confronto_benchmark(panel, coppie)
+
     risultati = []
     
-    for opp in opportunita[:10]:  # Prime 10 opportunità per test
+    for opp in selezionate:
         ticker = opp['ticker']
-        risultato_backtest = analizza_performance_storica(ticker, anni)
+        if ticker not in metriche.index:
+            print(f"❌ {ticker}: dati storici insufficienti")
+            continue
+        risultato_backtest = _riga_performance(ticker, metriche.loc[ticker], anni, start_date, end_date)
         
         if risultato_backtest:
-            # Combina dati screening + backtesting
-            risultato_combinato = {
-                **opp,  # Dati dallo screening
-                **risultato_backtest  # Dati dal backtesting
-            }
+            # Combina dati screening + backtesting (record compatto invece di un dict fuso)
+            risultato_combinato = RisultatoBacktest.da_screening(opp, risultato_backtest)
             risultati.append(risultato_combinato)
             
             # Output progressivo
@@ -128,18 +198,159 @@ def backtest_opportunita(opportunita, anni=3):
             drawdown = risultato_backtest['max_drawdown_perc']
             print(f"✅ {ticker}: {rendimento:>6.1f}% | Max Drawdown: {drawdown:>5.1f}%")
 
-    risultati = aggiungi_confronto_sp500(risultati, anni)
+    _aggiungi_confronto_settore(risultati, confronti, settori)
+    prezzi_sp500 = panel[mercato] if mercato in panel.columns else None
+    risultati = aggiungi_confronto_sp500(risultati, anni, prezzi_sp500, (start_date, end_date), confronti)
     
     return risultati
 
-def salva_risultati_backtest(risultati, filename=None):
-    """Salva i risultati del backtesting"""
+def _aggiungi_confronto_settore(risultati, confronti, settori):
+    """Alpha/beta/tracking error verso l'ETF del settore (stesse date del titolo)"""
+    for risultato in risultati:
+        etf = settori.get(risultato['ticker'])
+        if not etf or (risultato['ticker'], etf) not in confronti.index:
+            continue
+        riga = confronti.loc[(risultato['ticker'], etf)]
+        risultato['benchmark_settore'] = etf
+        risultato['rendimento_settore_perc'] = round(float(riga['rendimento_benchmark_perc']), 2)
+        risultato['alpha_settore_perc'] = round(float(riga['alpha_perc']), 2)
+        risultato['beta_settore'] = round(float(riga['beta']), 2)
+        risultato['tracking_error_settore_perc'] = round(float(riga['tracking_error_perc']), 2)
+        risultato['battuto_settore'] = bool(riga['alpha_perc'] > 0)
+
+# ==================== BACKTEST MULTI-ORIZZONTE ====================
+
+# Metriche ripetute per ogni orizzonte (colonne <metrica>_<anni>a)
+METRICHE_ORIZZONTE = [
+    'rendimento_totale_perc', 'rendimento_annualizzato_perc', 'volatilita_annualizzata', 'max_drawdown_perc',
+    'sharpe_ratio', 'sortino_ratio', 'beta', 'alpha_perc', 'tracking_error_sp500_perc', 'alpha_settore_perc'
+]
+# Un orizzonte vale solo se il primo prezzo cade entro questi giorni dall'inizio della finestra (festivi, sedute mancanti)
+TOLLERANZA_COPERTURA_GIORNI = 7
+CAMPI_SCREENING_ORIZZONTI = ['ticker', 'nome', 'settore', 'prezzo', 'valore_intrinseco', 'sconto', 'qualita_ok',
+                             'rischio', 'investment_score', 'quality_score_detailed']
+
+def backtest_multi_orizzonte(opportunita, orizzonti=None):
+    """
+    Backtest delle opportunità su più orizzonti (es. 1/3/5/10 anni) con UN solo download:
+    il panel arriva fino all'orizzonte più lungo e gli orizzonti brevi sono sue fette finali
+    (iloc, nessuna copia), ognuna passata al motore vettoriale di metriche e confronti.
+    Restituisce una tabella (DataFrame): una riga per titolo + S&P500, colonne <metrica>_<anni>a;
+    l'orizzonte principale ha anche le colonne senza suffisso del backtest classico.
+    """
+    orizzonti = sorted(set(orizzonti or BACKTEST_CONFIG['ORIZZONTI']))
+    principale = BACKTEST_CONFIG['ORIZZONTE_PRINCIPALE'] if BACKTEST_CONFIG['ORIZZONTE_PRINCIPALE'] in orizzonti else orizzonti[-1]
+    print(f"\n🎯 BACKTESTING {len(opportunita)} OPPORTUNITÀ (orizzonti {', '.join(f'{a}a' for a in orizzonti)})")
+    print("=" * 50)
+
+    # Una riga per ticker: se compare più volte vale la prima opportunità
+    selezionate = {}
+    for opp in opportunita[:BACKTEST_CONFIG['MAX_OPPORTUNITA']]:
+        selezionate.setdefault(opp['ticker'], opp)
+    mercato = BACKTEST_CONFIG['BENCHMARK']
+    settori = {t: benchmark_settore(o.get('settore')) for t, o in selezionate.items()}
+    etf_settoriali = sorted({etf for etf in settori.values() if etf})
+    coppie = [(t, mercato) for t in settori] + [(t, etf) for t, etf in settori.items() if etf]
+
+    # 🔥 Un solo download, al più lungo degli orizzonti
+    panel, _, end_date = scarica_panel_prezzi(list(settori), orizzonti[-1], mercato, etf_settoriali)
+    if mercato not in panel.columns:
+        print(f"❌ Benchmark {mercato} non disponibile")
+        return None
+
+    # Finestre ancorate all'ultima seduta disponibile (non alla data di oggi)
+    ultima_data = panel.index[-1] if len(panel) else pd.Timestamp(end_date)
+    righe = {t: {c: o.get(c) for c in CAMPI_SCREENING_ORIZZONTI} for t, o in selezionate.items()}
+    righe_mercato = {'ticker': 'S&P500'}
+    for anni in orizzonti:
+        inizio = int(panel.index.searchsorted(ultima_data - timedelta(days=anni * 365)))
+        vista = panel.iloc[inizio:]
+        with fase('metriche_orizzonte'):
+            metriche = calcola_metriche(vista, benchmark=mercato, risk_free=BACKTEST_CONFIG['RISK_FREE_ANNUO'])
+            confronti = confronto_benchmark(vista, coppie)
+        # Storia più corta dell'orizzonte (es. quotato da 2 anni): niente metriche a 5 o 10 anni
+        limite = vista.index[0] + timedelta(days=TOLLERANZA_COPERTURA_GIORNI) if len(vista) else None
+        coperti = set(metriche.index[metriche['data_primo_prezzo'] <= limite]) if limite is not None else set()
+
+        suffisso = f"_{anni}a"
+        for ticker, riga in [*righe.items(), (mercato, righe_mercato)]:
+            valori = _metriche_orizzonte(ticker, metriche, confronti, mercato, settori.get(ticker), coperti)
+            riga.update({campo + suffisso: valore for campo, valore in valori.items()})
+            riga['data_inizio' + suffisso] = str(vista.index[0].date()) if len(vista) else None
+            if anni == principale:
+                riga.update(valori)
+                riga.update(periodo_analisi_anni=anni, data_inizio=riga['data_inizio' + suffisso],
+                            data_fine=str(ultima_data.date()))
+                if ticker != mercato and valori['alpha_perc'] is not None:
+                    riga['battuto_sp500'] = valori['alpha_perc'] > 0
+
+    mancanti = [t for t, riga in righe.items() if all(riga.get(f'rendimento_totale_perc_{a}a') is None for a in orizzonti)]
+    for ticker in mancanti:
+        print(f"❌ {ticker}: dati storici insufficienti")
+        del righe[ticker]
+
+    tabella = pd.DataFrame([righe_mercato, *righe.values()])
+    for ticker, riga in righe.items():
+        rendimenti = ' | '.join(f"{a}a {riga.get(f'rendimento_totale_perc_{a}a'):>6.1f}%" if riga.get(f'rendimento_totale_perc_{a}a') is not None
+                                else f"{a}a     n/d" for a in orizzonti)
+        print(f"✅ {ticker}: {rendimenti}")
+    return tabella
+
+def _metriche_orizzonte(ticker, metriche, confronti, mercato, etf, coperti):
+    """Valori di METRICHE_ORIZZONTE per un ticker su una finestra (None se la sua storia non copre la finestra)"""
+    def arrotonda(tabella, chiave, colonna):
+        if ticker not in coperti or chiave not in tabella.index:
+            return None
+        valore = tabella.loc[chiave, colonna]
+        return round(float(valore), 2) if pd.notna(valore) else None
+
+    valori = {campo: arrotonda(metriche, ticker, campo) for campo in METRICHE_ORIZZONTE[:7]}
+    valori['alpha_perc'] = arrotonda(confronti, (ticker, mercato), 'alpha_perc')
+    valori['tracking_error_sp500_perc'] = arrotonda(confronti, (ticker, mercato), 'tracking_error_perc')
+    valori['alpha_settore_perc'] = arrotonda(confronti, (ticker, etf), 'alpha_perc') if etf in coperti else None
+    return valori
+
+def salva_backtest_orizzonti(tabella, filename=None, formato=None):
+    """Tabella multi-orizzonte in outputs/backtests/ (JSON come i backtest classici, o Parquet)"""
+    formato = formato or FORMATO_CONFIG['FORMATO']
+    if formato == 'parquet' and not pyarrow_disponibile():
+        print("⚠️  pyarrow non installato: salvo in JSON")
+        formato = 'json'
+    if not filename:
+        data_oggi = datetime.now().strftime("%Y%m%d_%H%M")
+        filename = f"outputs/backtests/backtest_orizzonti_{data_oggi}.{formato}"
+
+    with fase('salvataggio_risultati'):
+        if formato == 'parquet':
+            tabella.to_parquet(filename, index=False, compression=FORMATO_CONFIG['COMPRESSIONE'])
+        else:
+            righe = tabella.astype(object).where(tabella.notna(), None).to_dict('records')
+            with open(filename, 'w') as f:
+                json.dump(righe, f, indent=2, default=per_json)
+
+    print(f"💾 Backtest multi-orizzonte salvato in: {filename}")
+    return filename
+
+def salva_risultati_backtest(risultati, filename=None, formato=None):
+    """Salva i risultati del backtesting (JSON o, se richiesto e disponibile, Parquet)"""
+    formato = formato or FORMATO_CONFIG['FORMATO']
+    if formato == 'parquet' and not pyarrow_disponibile():
+        print("⚠️  pyarrow non installato: salvo in JSON")
+        formato = 'json'
+
     if not filename:
         data_oggi = datetime.now().strftime("%Y%m%d_%H%M")
-        filename = f"outputs/backtests/backtest_{data_oggi}.json"
+        filename = f"outputs/backtests/backtest_{data_oggi}.{formato}"
     
-    with open(filename, 'w') as f:
-        json.dump(risultati, f, indent=2)
+    if formato == 'parquet':
+        with fase('salvataggio_risultati'):
+            salva_parquet(risultati, filename, 'backtest')
+        print(f"💾 Risultati backtest salvati in: {filename}")
+        return filename
+
+    with fase('salvataggio_risultati'):
+        with open(filename, 'w') as f:
+            json.dump(risultati, f, indent=2, default=per_json)
     
     print(f"💾 Risultati backtest salvati in: {filename}")
     return filename
@@ -165,71 +376,59 @@ def test_backtest_sistema():
     
     return risultati
 
-def analizza_performance_sp500(anni=3):
+def analizza_performance_sp500(anni=3, prezzi=None, periodo=None):
     """
     Analizza la performance dell'S&P500 nello stesso periodo
+    Con 'prezzi' già presenti nel panel del backtest non serve un altro download.
     """
     try:
         print(f"📊 Analisi performance S&P500 ({anni} anni)...")
         
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=anni*365)
-        
-        # Download dati S&P500
-        sp500_data = yf.download('^GSPC', start=start_date, end=end_date, progress=False, auto_adjust=True)
-        
-        if sp500_data.empty or len(sp500_data) < 30:
+        if prezzi is None:
+            mercato = BACKTEST_CONFIG['BENCHMARK']
+            panel, start_date, end_date = scarica_panel_prezzi([], anni, mercato)
+            prezzi = panel[mercato] if mercato in panel.columns else None
+        else:
+            start_date, end_date = periodo
+
+        performance_sp500 = _metriche_performance('S&P500', prezzi, anni, start_date, end_date)
+        if not performance_sp500:
             print("❌ Dati S&P500 insufficienti")
             return None
         
-        close_prices = sp500_data['Close']
-        prezzo_iniziale = float(close_prices.iloc[0])
-        prezzo_attuale = float(close_prices.iloc[-1])
-        rendimento_totale = ((prezzo_attuale - prezzo_iniziale) / prezzo_iniziale) * 100
-        
-        # Calcola volatilità e drawdown
-        rendimenti_giornalieri = close_prices.pct_change().dropna()
-        volatilita = float(rendimenti_giornalieri.std() * 100)
-        
-        rolling_max = close_prices.expanding().max()
-        drawdown = (close_prices - rolling_max) / rolling_max * 100
-        max_drawdown = float(drawdown.min())
-        
-        performance_sp500 = {
-            'ticker': 'S&P500',
-            'periodo_analisi_anni': anni,
-            'prezzo_iniziale': round(prezzo_iniziale, 2),
-            'prezzo_attuale': round(prezzo_attuale, 2),
-            'rendimento_totale_perc': round(rendimento_totale, 2),
-            'volatilita_annualizzata': round(volatilita, 2),
-            'max_drawdown_perc': round(max_drawdown, 2),
-            'sharpe_ratio': round(rendimento_totale / volatilita, 2) if volatilita > 0 else 0,
-            'data_inizio': start_date.strftime('%Y-%m-%d'),
-            'data_fine': end_date.strftime('%Y-%m-%d')
-        }
-        
-        print(f"✅ S&P500: {rendimento_totale:.1f}% rendimento")
+        print(f"✅ S&P500: {performance_sp500['rendimento_totale_perc']:.1f}% rendimento")
         return performance_sp500
         
     except Exception as e:
         print(f"❌ Errore analisi S&P500: {e}")
         return None
 
-def aggiungi_confronto_sp500(risultati_backtest, anni=3):
+def aggiungi_confronto_sp500(risultati_backtest, anni=3, prezzi_sp500=None, periodo=None, confronti=None):
     """
     Aggiunge confronto con S&P500 a tutti i risultati
+    Con 'confronti' (da confronto_benchmark) l'alpha è misurato sulle date comuni a titolo e indice.
     """
-    performance_sp500 = analizza_performance_sp500(anni)
+    with fase('aggiungi_confronto_sp500'):
+        return _confronto_sp500(risultati_backtest, anni, prezzi_sp500, periodo, confronti)
+
+def _confronto_sp500(risultati_backtest, anni, prezzi_sp500, periodo, confronti):
+    performance_sp500 = analizza_performance_sp500(anni, prezzi_sp500, periodo)
     
     if not performance_sp500:
         return risultati_backtest
     
     rendimento_sp500 = performance_sp500['rendimento_totale_perc']
+    mercato = BACKTEST_CONFIG['BENCHMARK']
     
     for risultato in risultati_backtest:
-        # Calcola alpha (performance relativa)
-        rendimento_azione = risultato['rendimento_totale_perc']
-        alpha = rendimento_azione - rendimento_sp500
+        chiave = (risultato['ticker'], mercato)
+        if confronti is not None and chiave in confronti.index:
+            alpha = float(confronti.loc[chiave, 'alpha_perc'])
+            risultato['tracking_error_sp500_perc'] = round(float(confronti.loc[chiave, 'tracking_error_perc']), 2)
+        else:
+            # Calcola alpha (performance relativa)
+            rendimento_azione = risultato['rendimento_totale_perc']
+            alpha = rendimento_azione - rendimento_sp500
         
         # Aggiungi metriche di confronto
         risultato['rendimento_sp500_perc'] = rendimento_sp500
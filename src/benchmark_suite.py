@@ -0,0 +1,297 @@
+"""
+🏎️ BENCHMARK SUITE - Value Stock Finder
+Misura i percorsi critici di screening e backtesting su dati sintetici (offline, deterministici):
+throughput, percentili di latenza e picco di memoria, con confronto rispetto a una baseline salvata.
+
+Uso:
+    python src/benchmark_suite.py                     # esegue e confronta con la baseline
+    python src/benchmark_suite.py --salva-baseline    # esegue e salva la nuova baseline
+    python src/benchmark_suite.py --scale 165,5000    # universi più piccoli (run veloce)
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import platform
+import tracemalloc
+import contextlib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+import data_provider
+from data_provider import SyntheticProvider, genera_universo
+import mio_stock_finder
+import backtester
+from scoring_vettoriale import costruisci_tabella, calcola_punteggi
+from metriche_performance import calcola_metriche
+from risultati import RisultatoScreening, tabella_screening
+from simulatore_portafoglio import simula
+from rischio_portafoglio import analizza_rischio_panel
+
+BENCHMARK_CONFIG = {
+    'BASELINE_PATH': 'data/benchmark_baseline.json',
+    'SOGLIA_REGRESSIONE': 0.25,     # +25% sul tempo mediano = regressione
+    'SCALE_UNIVERSO': [165, 5000, 50000],
+    'TICKER_BACKTEST': 500,
+    'RECORD_MEMORIA': 100000,
+    'TICKER_PORTAFOGLIO': 500,
+    'ANNI_PORTAFOGLIO': 10,
+    'TICKER_RISCHIO': 3000,
+    'ANNI_RISCHIO': 2
+}
+
+# ==================== MISURA ====================
+
+def misura(nome, esegui, ripetizioni=5, elementi=1):
+    """
+    Esegue 'esegui(i)' per 'ripetizioni' volte: i tempi danno throughput e percentili di latenza.
+    Un'esecuzione extra sotto tracemalloc misura il picco di memoria (senza falsare i tempi).
+    """
+    esegui(0)  # riscaldamento
+    tempi = []
+    for i in range(ripetizioni):
+        inizio = time.perf_counter()
+        esegui(i)
+        tempi.append(time.perf_counter() - inizio)
+
+    tracemalloc.start()
+    esegui(0)
+    _, picco = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tempi = np.array(tempi)
+    mediana = float(np.median(tempi))
+    risultato = {
+        'nome': nome,
+        'ripetizioni': ripetizioni,
+        'elementi': elementi,
+        'mediana_s': mediana,
+        'p50_ms': float(np.percentile(tempi, 50) * 1000),
+        'p95_ms': float(np.percentile(tempi, 95) * 1000),
+        'p99_ms': float(np.percentile(tempi, 99) * 1000),
+        'throughput_per_s': elementi / mediana if mediana > 0 else None,
+        'picco_memoria_mb': picco / 1024 / 1024
+    }
+    print(f"   ⏱️  {nome:<38} p50 {risultato['p50_ms']:>10.3f} ms | p95 {risultato['p95_ms']:>10.3f} ms | "
+          f"{risultato['throughput_per_s'] or 0:>12,.0f}/s | {risultato['picco_memoria_mb']:>8.1f} MB")
+    return risultato
+
+@contextlib.contextmanager
+def _silenzioso():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+# ==================== CASI DI BENCHMARK ====================
+
+def bench_scoring_per_ticker(provider, n=2000):
+    """Latenza di analizza_azione_avanzata su un singolo ticker (dati già in memoria)"""
+    tickers = genera_universo(n)
+    infos = {t: provider.get_info(t) for t in tickers}
+    originale = mio_stock_finder.get_cached_stock
+    mio_stock_finder.get_cached_stock = infos.__getitem__
+    incrementale = mio_stock_finder.CONFIG['RESCREENING_INCREMENTALE']
+    mio_stock_finder.CONFIG['RESCREENING_INCREMENTALE'] = False
+    try:
+        return misura(
+            'scoring per-ticker',
+            lambda i: mio_stock_finder.analizza_azione_avanzata(tickers[i], verbose=False),
+            ripetizioni=n
+        )
+    finally:
+        mio_stock_finder.get_cached_stock = originale
+        mio_stock_finder.CONFIG['RESCREENING_INCREMENTALE'] = incrementale
+
+def bench_screening_universo(provider, n):
+    """Screening completo (cache calda) e scoring vettoriale dello stesso universo"""
+    tickers = genera_universo(n)
+    risultati = []
+
+    def screening(_):
+        with _silenzioso():
+            mio_stock_finder.analizza_azioni_avanzata(tickers)
+
+    with _silenzioso():
+        mio_stock_finder.analizza_azioni_avanzata(tickers)  # popola la cache
+    ripetizioni = 3 if n <= 5000 else 1
+    risultati.append(misura(f'screening completo {n}', screening, ripetizioni, elementi=n))
+
+    tabella = costruisci_tabella({t: provider.get_info(t) for t in tickers})
+    risultati.append(misura(f'scoring vettoriale {n}', lambda _: calcola_punteggi(tabella), 5, elementi=n))
+    return risultati
+
+def bench_backtest(provider, n):
+    """Metriche di backtest: una serie alla volta vs tutto il panel in un passaggio"""
+    tickers = genera_universo(n)
+    panel = provider.get_prezzi(tickers, '2022-10-31', '2025-10-31')
+    periodo = (datetime(2022, 10, 31), datetime(2025, 10, 31))
+
+    def per_ticker(_):
+        for ticker in tickers:
+            backtester.analizza_performance_storica(ticker, 3, prezzi=panel[ticker], periodo=periodo)
+
+    return [
+        misura(f'backtest per-ticker {n}', per_ticker, 3, elementi=n),
+        misura(f'backtest panel vettoriale {n}', lambda _: calcola_metriche(panel), 5, elementi=n)
+    ]
+
+def bench_portafoglio(provider, n, anni):
+    """Simulazione di portafoglio (ribilanciamento mensile, costi) sull'intera matrice prezzi"""
+    tickers = genera_universo(n)
+    fine = datetime(2025, 10, 31)
+    panel = provider.get_prezzi(tickers, fine.replace(year=fine.year - anni), fine)
+    punteggi = np.linspace(100, 50, n)
+    return [
+        misura(f'portafoglio {metodo} {n}x{anni}a', lambda _, m=metodo: simula(panel, m, 'mensile', 10, 5, punteggi), 5, elementi=n)
+        for metodo in ('uguale', 'punteggio', 'inversa_volatilita')
+    ]
+
+def bench_rischio(provider, n, anni):
+    """Covarianza con shrinkage, VaR/ES e cluster di correlazione su tutto l'universo"""
+    tickers = genera_universo(n)
+    fine = datetime(2025, 10, 31)
+    panel = provider.get_prezzi(tickers, fine.replace(year=fine.year - anni), fine)
+    punteggi = np.linspace(100, 50, n)
+    return [misura(f'rischio portafoglio {n}x{anni}a', lambda _: analizza_rischio_panel(panel, tickers, punteggi), 3, elementi=n)]
+
+def bench_serializzazione(provider, n=5000):
+    """Scrittura risultati: JSON indentato (screens/backtests) e CSV (archive)"""
+    tabella = costruisci_tabella({t: provider.get_info(t) for t in genera_universo(n)})
+    risultati = calcola_punteggi(tabella)
+    records = risultati.astype(object).where(risultati.notna(), None).to_dict('records')
+    return [
+        misura(f'serializzazione JSON {len(records)}', lambda _: json.dumps(records, indent=2), 5, elementi=len(records)),
+        misura(f'serializzazione CSV {len(records)}', lambda _: risultati.to_csv(index=False), 5, elementi=len(records))
+    ]
+
+def bench_memoria_risultati(provider, n=100000):
+    """
+    n risultati di screening: lista di dict vs record __slots__ vs array strutturato.
+    Memoria = spazio trattenuto dalla struttura (valori inclusi); tempi di filtro e ordinamento.
+    """
+    base = analizza_campione(provider)
+
+    def righe_dict():
+        # Valori float distinti per ogni riga, come in uno screening reale
+        return [{k: (v + i * 1e-9 if isinstance(v, float) else v) for k, v in base[i % len(base)].items()}
+                | {'ticker': f"SYN{i:06d}"} for i in range(n)]
+
+    costruttori = {
+        'dict': righe_dict,
+        'record __slots__': lambda: [RisultatoScreening(**r) for r in righe_dict()],
+        'array strutturato': lambda: tabella_screening(righe_dict())
+    }
+    risultati = []
+    strutture = {}
+    for nome, costruttore in costruttori.items():
+        tracemalloc.start()
+        strutture[nome] = costruttore()
+        trattenuta, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"   🧠 memoria {nome:<30} {trattenuta / 1024 / 1024:>8.1f} MB per {n:,} risultati")
+        risultati.append({'nome': f'memoria {nome} {n}', 'mediana_s': None,
+                          'memoria_trattenuta_mb': trattenuta / 1024 / 1024})
+
+    righe, tabella = strutture['record __slots__'], strutture['array strutturato']
+    risultati += [
+        misura(f'filtro+ordinamento record {n}', lambda _: sorted(
+            (r for r in righe if r.sconto > 5 and r.qualita_ok), key=lambda r: -r.investment_score), 3, elementi=n),
+        misura(f'filtro+ordinamento array {n}', lambda _: np.argsort(
+            -np.where((tabella['sconto'] > 5) & tabella['qualita_ok'], tabella['investment_score'], -np.inf),
+            kind='stable'), 3, elementi=n)
+    ]
+    return risultati
+
+def analizza_campione(provider, n=200):
+    """Risultati reali di screening (dizionari) usati come modello per i test di memoria"""
+    infos = {t: provider.get_info(t) for t in genera_universo(n)}
+    originale = mio_stock_finder.get_cached_stock
+    mio_stock_finder.get_cached_stock = infos.__getitem__
+    try:
+        esiti = [mio_stock_finder.analizza_azione_avanzata(t, verbose=False) for t in infos]
+    finally:
+        mio_stock_finder.get_cached_stock = originale
+    return [r.to_dict() for r in esiti if r]
+
+# ==================== BASELINE ====================
+
+def confronta_baseline(risultati, baseline, soglia):
+    """Elenco dei casi più lenti della baseline oltre la soglia"""
+    precedenti = {r['nome']: r for r in baseline.get('risultati', [])}
+    regressioni = []
+    for r in risultati:
+        prima = precedenti.get(r['nome'])
+        if not prima or not prima['mediana_s']:
+            continue
+        variazione = r['mediana_s'] / prima['mediana_s'] - 1
+        simbolo = "🔴" if variazione > soglia else "🟢" if variazione < -soglia else "⚪"
+        print(f"   {simbolo} {r['nome']:<38} {variazione * 100:>+7.1f}%")
+        if variazione > soglia:
+            regressioni.append({'nome': r['nome'], 'variazione_perc': round(variazione * 100, 1)})
+    return regressioni
+
+def esegui_suite(scale=None, salva_baseline=False):
+    scale = scale or BENCHMARK_CONFIG['SCALE_UNIVERSO']
+    provider = data_provider.set_provider(SyntheticProvider())
+
+    # Cache e archivi in una cartella temporanea: la suite non tocca data/
+    cartella = tempfile.mkdtemp(prefix='vsf_bench_')
+    mio_stock_finder.CONFIG['CACHE_PATH'] = os.path.join(cartella, 'cache_{provider}.sqlite')
+    backtester.BACKTEST_CONFIG['ARCHIVIO_PREZZI_DIR'] = os.path.join(cartella, 'prezzi', '{provider}')
+
+    print("🏎️  BENCHMARK SUITE")
+    print("=" * 50)
+    risultati = []
+    try:
+        risultati.append(bench_scoring_per_ticker(provider))
+        for n in scale:
+            risultati.extend(bench_screening_universo(provider, n))
+        risultati.extend(bench_backtest(provider, BENCHMARK_CONFIG['TICKER_BACKTEST']))
+        risultati.extend(bench_portafoglio(provider, BENCHMARK_CONFIG['TICKER_PORTAFOGLIO'], BENCHMARK_CONFIG['ANNI_PORTAFOGLIO']))
+        risultati.extend(bench_rischio(provider, BENCHMARK_CONFIG['TICKER_RISCHIO'], BENCHMARK_CONFIG['ANNI_RISCHIO']))
+        risultati.extend(bench_serializzazione(provider))
+        risultati.extend(bench_memoria_risultati(provider, BENCHMARK_CONFIG['RECORD_MEMORIA']))
+    finally:
+        shutil.rmtree(cartella, ignore_errors=True)
+
+    report = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'risultati': risultati
+    }
+
+    path = BENCHMARK_CONFIG['BASELINE_PATH']
+    regressioni = []
+    if os.path.exists(path) and not salva_baseline:
+        with open(path) as f:
+            baseline = json.load(f)
+        print(f"\n📊 Confronto con baseline del {baseline.get('data')}:")
+        regressioni = confronta_baseline(risultati, baseline, BENCHMARK_CONFIG['SOGLIA_REGRESSIONE'])
+    report['regressioni'] = regressioni
+
+    if salva_baseline:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Baseline salvata in: {path}")
+
+    if regressioni:
+        print(f"\n🚨 {len(regressioni)} regressioni oltre il {BENCHMARK_CONFIG['SOGLIA_REGRESSIONE'] * 100:.0f}%")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dei percorsi critici")
+    parser.add_argument('--salva-baseline', action='store_true', help="Salva i risultati come nuova baseline")
+    parser.add_argument('--scale', help="Dimensioni universo separate da virgola (default 165,5000,50000)")
+    args = parser.parse_args()
+
+    scale = [int(x) for x in args.scale.split(',')] if args.scale else None
+    report = esegui_suite(scale, args.salva_baseline)
+    sys.exit(1 if report['regressioni'] else 0)
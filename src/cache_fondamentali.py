@@ -0,0 +1,329 @@
+"""
+💾 CACHE FONDAMENTALI - Value Stock Finder
+Cache persistente su SQLite dei dizionari 'info', con TTL per gruppo di campi:
+se è scaduto solo il prezzo si aggiorna solo il prezzo, i fondamentali restano validi fino al loro TTL.
+Conserva anche gli snapshot giornalieri dei fondamentali per i backtest point-in-time.
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+# Campi che cambiano con il prezzo: scadono in pochi minuti.
+# Tutti gli altri campi (bilancio, settore, ...) finiscono nel gruppo 'fondamentali'.
+GRUPPI_CAMPI = {
+    'prezzo': [
+        'currentPrice', 'regularMarketPrice', 'previousClose', 'open',
+        'dayLow', 'dayHigh', 'bid', 'ask', 'volume', 'regularMarketVolume',
+        'marketCap', 'enterpriseValue', 'trailingPE', 'forwardPE',
+        'priceToBook', 'dividendYield', 'fiftyTwoWeekLow', 'fiftyTwoWeekHigh'
+    ]
+}
+GRUPPO_DEFAULT = 'fondamentali'
+
+TTL_DEFAULT = {
+    'prezzo': 5 * 60,              # 5 minuti
+    'fondamentali': 24 * 60 * 60   # 1 giorno
+}
+
+_GRUPPO_DI_CAMPO = {campo: gruppo for gruppo, campi in GRUPPI_CAMPI.items() for campo in campi}
+
+def dividi_in_gruppi(info):
+    """Divide un dizionario info nei gruppi di campi con TTL diversi"""
+    gruppi = {gruppo: {} for gruppo in list(GRUPPI_CAMPI) + [GRUPPO_DEFAULT]}
+    for campo, valore in info.items():
+        gruppi[_GRUPPO_DI_CAMPO.get(campo, GRUPPO_DEFAULT)][campo] = valore
+    return gruppi
+
+class CacheFondamentali:
+    """
+    Cache su file unico SQLite, condivisa tra esecuzioni.
+    - TTL configurabile per gruppo di campi (prezzo vs fondamentali), rinnovo del solo gruppo scaduto
+    - limite massimo di ticker con rimozione dei meno usati (LRU) su info e risultati
+    - snapshot point-in-time con una regola propria: si potano solo quelli più vecchi di max_giorni_snapshot
+    - contatori hit/miss per il report di fine run
+    """
+
+    def __init__(self, path, ttl=None, max_tickers=50000, max_giorni_snapshot=None):
+        self.path = path
+        self.ttl = {**TTL_DEFAULT, **(ttl or {})}
+        self.max_tickers = max_tickers
+        self.max_giorni_snapshot = max_giorni_snapshot
+        self.stats = {'hit': 0, 'miss': 0, 'parziali': 0, 'scaduti': 0, 'rimossi': 0}
+        self._lock = threading.Lock()
+        self._accessi = {}  # ultimi accessi in memoria, scritti su disco a fine run
+        self._risultati = None  # ultimi risultati di screening (caricati alla prima richiesta)
+        self._risultati_pendenti = {}
+
+        cartella = os.path.dirname(path)
+        if cartella:
+            os.makedirs(cartella, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS info (
+                ticker TEXT NOT NULL,
+                gruppo TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                aggiornato REAL NOT NULL,
+                PRIMARY KEY (ticker, gruppo)
+            );
+            CREATE TABLE IF NOT EXISTS tickers (
+                ticker TEXT PRIMARY KEY,
+                ultimo_accesso REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_tickers_accesso ON tickers (ultimo_accesso);
+            CREATE TABLE IF NOT EXISTS risultati (
+                ticker TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS snapshot (
+                ticker TEXT NOT NULL,
+                data TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (ticker, data)
+            );
+        """)
+        self._conn.commit()
+        self._n_tickers = self._conn.execute("SELECT COUNT(*) FROM tickers").fetchone()[0]
+        if max_giorni_snapshot:
+            self._pota_snapshot(max_giorni_snapshot)
+        atexit.register(self.chiudi)
+
+    def _leggi(self, ticker):
+        """(info completa, gruppi scaduti); (None, None) se il ticker non è in cache"""
+        righe = self._conn.execute(
+            "SELECT gruppo, payload, aggiornato FROM info WHERE ticker = ?", (ticker,)
+        ).fetchall()
+        if not righe:
+            return None, None
+
+        adesso = time.time()
+        info = {}
+        scaduti = set()
+        for gruppo, payload, aggiornato in righe:
+            if adesso - aggiornato > self.ttl.get(gruppo, self.ttl[GRUPPO_DEFAULT]):
+                self.stats['scaduti'] += 1
+                scaduti.add(gruppo)
+            info.update(json.loads(payload))
+        return info, scaduti
+
+    def _rinnova_gruppi(self, ticker, info, gruppi):
+        """Riscrive solo i gruppi indicati (gli altri conservano il loro timestamp)"""
+        adesso = time.time()
+        divisi = dividi_in_gruppi(info)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO info (ticker, gruppo, payload, aggiornato) VALUES (?, ?, ?, ?)",
+            [(ticker, gruppo, json.dumps(divisi[gruppo], default=str), adesso) for gruppo in gruppi]
+        )
+        self._accessi[ticker] = adesso
+        self._conn.commit()
+
+    def _scrivi(self, ticker, info):
+        adesso = time.time()
+        nuovo = self._conn.execute(
+            "SELECT 1 FROM tickers WHERE ticker = ?", (ticker,)
+        ).fetchone() is None
+
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO info (ticker, gruppo, payload, aggiornato) VALUES (?, ?, ?, ?)",
+            [(ticker, gruppo, json.dumps(campi, default=str), adesso)
+             for gruppo, campi in dividi_in_gruppi(info).items()]
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tickers (ticker, ultimo_accesso) VALUES (?, ?)", (ticker, adesso)
+        )
+        self._salva_snapshot(ticker, info, date.today().isoformat())
+        if nuovo:
+            self._n_tickers += 1
+            if self._n_tickers > self.max_tickers:
+                self._rimuovi_vecchi(self._n_tickers - self.max_tickers)
+        self._conn.commit()
+
+    def _salva_snapshot(self, ticker, info, giorno):
+        """Snapshot dei soli fondamentali (il prezzo storico viene dall'archivio prezzi), solo se cambiati"""
+        payload = json.dumps(dividi_in_gruppi(info)[GRUPPO_DEFAULT], default=str, sort_keys=True)
+        ultimo = self._conn.execute(
+            "SELECT payload FROM snapshot WHERE ticker = ? AND data <= ? ORDER BY data DESC LIMIT 1",
+            (ticker, giorno)
+        ).fetchone()
+        if ultimo is None or ultimo[0] != payload:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshot (ticker, data, payload) VALUES (?, ?, ?)",
+                (ticker, giorno, payload)
+            )
+
+    def _pota_snapshot(self, giorni):
+        """
+        Elimina gli snapshot più vecchi di 'giorni', tenendo per ogni ticker l'ultimo prima del limite
+        (è il valore point-in-time valido alla data limite).
+        """
+        limite = (date.today() - timedelta(days=giorni)).isoformat()
+        rimossi = self._conn.execute("""
+            DELETE FROM snapshot WHERE data < ? AND data < (
+                SELECT MAX(s.data) FROM snapshot s WHERE s.ticker = snapshot.ticker AND s.data < ?
+            )
+        """, (limite, limite)).rowcount
+        self._conn.commit()
+        return rimossi
+
+    def importa_snapshot(self, giorno, infos):
+        """Registra snapshot storici {ticker: info} alla data indicata (es. da un archivio esterno)"""
+        with self._lock:
+            for ticker, info in infos.items():
+                self._salva_snapshot(ticker, info, giorno)
+            self._conn.commit()
+
+    def snapshot_al(self, giorno, tickers=None):
+        """Fondamentali point-in-time: per ogni ticker l'ultimo snapshot con data <= giorno"""
+        with self._lock:
+            righe = self._conn.execute("""
+                SELECT s.ticker, s.payload FROM snapshot s
+                JOIN (SELECT ticker, MAX(data) AS data FROM snapshot WHERE data <= ? GROUP BY ticker) u
+                  ON s.ticker = u.ticker AND s.data = u.data
+            """, (str(giorno),)).fetchall()
+        filtro = None if tickers is None else set(tickers)
+        return {t: json.loads(p) for t, p in righe if filtro is None or t in filtro}
+
+    def prima_data_snapshot(self):
+        with self._lock:
+            return self._conn.execute("SELECT MIN(data) FROM snapshot").fetchone()[0]
+
+    def risultato_precedente(self, ticker):
+        """(digest, risultato) dell'ultimo screening completo del ticker, o None"""
+        with self._lock:
+            if self._risultati is None:
+                # Prima richiesta del run: carica tutti i risultati in memoria con una query
+                self._risultati = {
+                    t: (d, p) for t, d, p in self._conn.execute("SELECT ticker, digest, payload FROM risultati")
+                }
+            riga = self._risultati.get(ticker)
+        return (riga[0], json.loads(riga[1])) if riga else None
+
+    def risultati_memorizzati(self):
+        """{ticker: risultato} dell'ultimo screening di ogni ticker (nessuna chiamata al provider)"""
+        with self._lock:
+            righe = self._conn.execute("SELECT ticker, payload FROM risultati").fetchall()
+            pendenti = {t: p for t, (_, p) in self._risultati_pendenti.items()}
+        return {t: json.loads(p) for t, p in [*righe, *pendenti.items()]}
+
+    def salva_risultato(self, ticker, digest, risultato):
+        """Memorizza il risultato; su disco finisce con flush() (fine screening o chiusura)"""
+        payload = json.dumps(risultato, default=str)
+        with self._lock:
+            self._risultati_pendenti[ticker] = (digest, payload)
+            if self._risultati is not None:
+                self._risultati[ticker] = (digest, payload)
+
+    def flush(self):
+        """Scrive su disco risultati e accessi in sospeso"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._risultati_pendenti:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO risultati (ticker, digest, payload) VALUES (?, ?, ?)",
+                [(t, d, p) for t, (d, p) in self._risultati_pendenti.items()]
+            )
+            self._risultati_pendenti = {}
+        self._salva_accessi()
+        self._conn.commit()
+
+    def _rimuovi_vecchi(self, quanti):
+        """Rispetta il limite di dimensione eliminando i ticker usati meno di recente"""
+        self._salva_accessi()
+        vecchi = [r[0] for r in self._conn.execute(
+            "SELECT ticker FROM tickers ORDER BY ultimo_accesso LIMIT ?", (quanti,)
+        )]
+        # Anche i risultati (righe orfane); gli snapshot no: sono la storia dei backtest point-in-time
+        for tabella in ('info', 'tickers', 'risultati'):
+            self._conn.executemany(f"DELETE FROM {tabella} WHERE ticker = ?", [(t,) for t in vecchi])
+        for ticker in vecchi:
+            self._risultati_pendenti.pop(ticker, None)
+            if self._risultati is not None:
+                self._risultati.pop(ticker, None)
+        self._n_tickers -= len(vecchi)
+        self.stats['rimossi'] += len(vecchi)
+
+    def _salva_accessi(self):
+        if self._accessi:
+            self._conn.executemany(
+                "UPDATE tickers SET ultimo_accesso = ? WHERE ticker = ?",
+                [(ts, t) for t, ts in self._accessi.items()]
+            )
+            self._accessi = {}
+
+    def get(self, ticker, caricatore, caricatore_prezzo=None):
+        """
+        Info del ticker dalla cache; se manca o sono scaduti i fondamentali la scarica con caricatore(ticker).
+        Se è scaduto solo il prezzo e c'è caricatore_prezzo(ticker, info), rinnova solo i campi di prezzo
+        (se restituisce None si torna al download completo).
+        """
+        with self._lock:
+            info, scaduti = self._leggi(ticker)
+            if info is not None and not scaduti:
+                self.stats['hit'] += 1
+                self._accessi[ticker] = time.time()
+                return info
+
+        if scaduti and GRUPPO_DEFAULT not in scaduti and caricatore_prezzo is not None:
+            # 🔥 Fondamentali ancora validi: si scaricano solo i campi di prezzo
+            prezzo = caricatore_prezzo(ticker, info)
+            if prezzo:
+                info = {**info, **prezzo}
+                with self._lock:
+                    self.stats['parziali'] += 1
+                    self._rinnova_gruppi(ticker, info, scaduti)
+                return info
+
+        # Il download avviene fuori dal lock: non blocca le letture degli altri ticker
+        info = caricatore(ticker)
+        with self._lock:
+            self.stats['miss'] += 1
+            self._scrivi(ticker, info)
+        return info
+
+    def invalida(self, ticker=None):
+        """Elimina un ticker (o tutta la cache)"""
+        with self._lock:
+            if ticker is None:
+                self._conn.execute("DELETE FROM info")
+                self._conn.execute("DELETE FROM tickers")
+                self._conn.execute("DELETE FROM risultati")
+                self._risultati = None
+                self._risultati_pendenti = {}
+                self._n_tickers = 0
+            else:
+                self._conn.execute("DELETE FROM info WHERE ticker = ?", (ticker,))
+                self._conn.execute("DELETE FROM risultati WHERE ticker = ?", (ticker,))
+                self._risultati_pendenti.pop(ticker, None)
+                if self._risultati is not None:
+                    self._risultati.pop(ticker, None)
+                if self._conn.execute("DELETE FROM tickers WHERE ticker = ?", (ticker,)).rowcount:
+                    self._n_tickers -= 1
+            self._conn.commit()
+
+    def hit_rate(self):
+        """% di richieste servite senza download (i rinnovi del solo prezzo contano come richieste, non come hit)"""
+        totale = self.stats['hit'] + self.stats['miss'] + self.stats['parziali']
+        return self.stats['hit'] / totale * 100 if totale else 0.0
+
+    def __len__(self):
+        return self._n_tickers
+
+    def chiudi(self):
+        """Scrive gli accessi pendenti e chiude il database"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush()
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,336 @@
+"""
+🖥️ DASHBOARD - Value Stock Finder
+Servizio HTTP locale (solo lettura, solo libreria standard) sui risultati già salvati:
+ultimo screening, ultimo backtest e storico per ticker, in JSON e in HTML semplice.
+
+Non chiama MAI il provider dati: legge outputs/ e l'indice storico. Quando compaiono file nuovi
+ricarica e pre-calcola in memoria aggregati e risposte; le richieste ripetute con
+If-None-Match / If-Modified-Since ricevono 304 senza corpo.
+
+    python src/dashboard.py                  # http://127.0.0.1:8050
+    python src/dashboard.py --porta 9000
+
+Endpoint:
+    /                     panoramica HTML          /api/riepilogo       aggregati
+    /api/screening        ultimo screening          /api/backtest        ultimo backtest
+    /ticker/PFE           storico HTML              /api/ticker/PFE      storico JSON
+    /api/stato            file caricati e versione
+"""
+
+import os
+import json
+import html
+import time
+import hashlib
+import argparse
+import threading
+from urllib.parse import unquote
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from mio_stock_finder import CONFIG
+from risultati import per_json
+from universi import carica_risultati
+from indice_storico import INDICE_CONFIG, apri_indice, indicizza, serie_ticker
+
+DASHBOARD_CONFIG = {
+    'HOST': '127.0.0.1',
+    'PORTA': 8050,
+    'CONTROLLO_OGNI_S': 2.0,     # Ogni quanto si guarda se in outputs/ ci sono file nuovi
+    'TOP_N': 25,
+    'CACHE_TICKER': 1024         # Storici per ticker tenuti in memoria (LRU)
+}
+
+CAMPI_STORICO = ['prezzo', 'valore_intrinseco', 'sconto', 'investment_score', 'rendimento_totale_perc', 'alpha_perc']
+
+class Risposta:
+    """Corpo già serializzato + validatori HTTP: servire una richiesta è solo una scrittura"""
+    __slots__ = ('corpo', 'tipo', 'etag', 'modificato')
+
+    def __init__(self, corpo, tipo, modificato):
+        self.corpo = corpo
+        self.tipo = tipo
+        self.etag = '"' + hashlib.sha1(corpo).hexdigest()[:20] + '"'
+        self.modificato = int(modificato)
+
+def risposta_json(dati, modificato):
+    return Risposta(json.dumps(dati, default=per_json, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8', modificato)
+
+def risposta_html(titolo, corpo, modificato):
+    pagina = f"""<!doctype html><html><head><meta charset="utf-8"><title>{html.escape(titolo)}</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse}}td,th{{padding:4px 10px;border-bottom:1px solid #ddd;text-align:right}}
+td:first-child,th:first-child{{text-align:left}}.su{{color:#080}}.giu{{color:#b00}}</style></head>
+<body><h1>🎯 {html.escape(titolo)}</h1>{corpo}</body></html>"""
+    return Risposta(pagina.encode('utf-8'), 'text/html; charset=utf-8', modificato)
+
+# ==================== AGGREGATI ====================
+
+def _media(valori):
+    valori = [v for v in valori if isinstance(v, (int, float)) and v == v]
+    return round(sum(valori) / len(valori), 2) if valori else None
+
+def aggregati_screening(risultati):
+    """Conteggi, top per punteggio e riepilogo per settore dello screening"""
+    opportunita = [r for r in risultati if (r.get('sconto') or 0) > CONFIG['MIN_DISCOUNT'] and r.get('qualita_ok') in (True, 'True')]
+    id_opportunita = {id(r) for r in opportunita}
+    ordinati = sorted(risultati, key=lambda r: -(r.get('investment_score') or float('-inf')))
+    settori = {}
+    for r in risultati:
+        settori.setdefault(r.get('settore') or 'N/A', []).append(r)
+    raccomandazioni = {}
+    for r in risultati:
+        if r.get('raccomandazione'):
+            raccomandazioni[r['raccomandazione']] = raccomandazioni.get(r['raccomandazione'], 0) + 1
+    return {
+        'risultati': len(risultati),
+        'opportunita': len(opportunita),
+        'sconto_medio': _media(r.get('sconto') for r in risultati),
+        'top': [{k: r.get(k) for k in ('ticker', 'nome', 'settore', 'prezzo', 'sconto', 'investment_score', 'rischio')}
+                for r in ordinati[:DASHBOARD_CONFIG['TOP_N']]],
+        'settori': {
+            settore: {'titoli': len(righe), 'sconto_medio': _media(r.get('sconto') for r in righe),
+                      'opportunita': sum(1 for r in righe if id(r) in id_opportunita)}
+            for settore, righe in sorted(settori.items(), key=lambda x: -len(x[1]))
+        },
+        'raccomandazioni': raccomandazioni
+    }
+
+def aggregati_backtest(risultati):
+    """Benchmark, alpha medio e quota di titoli che battono l'S&P500"""
+    titoli = [r for r in risultati if r.get('ticker') != 'S&P500']
+    benchmark = next((r for r in risultati if r.get('ticker') == 'S&P500'), None)
+    return {
+        'titoli': len(titoli),
+        'rendimento_sp500_perc': benchmark.get('rendimento_totale_perc') if benchmark else None,
+        'rendimento_medio_perc': _media(r.get('rendimento_totale_perc') for r in titoli),
+        'alpha_medio_perc': _media(r.get('alpha_perc') for r in titoli),
+        'battono_sp500': sum(1 for r in titoli if r.get('battuto_sp500')),
+        'top_alpha': [{k: r.get(k) for k in ('ticker', 'sconto', 'rendimento_totale_perc', 'alpha_perc', 'max_drawdown_perc')}
+                      for r in sorted(titoli, key=lambda r: -(r.get('alpha_perc') or float('-inf')))[:DASHBOARD_CONFIG['TOP_N']]]
+    }
+
+# ==================== CATALOGO ====================
+
+def _tabella_html(righe, colonne, link_ticker=True):
+    if not righe:
+        return "<p>Nessun dato</p>"
+    def cella(colonna, valore):
+        if colonna == 'ticker' and link_ticker:
+            return f'<a href="/ticker/{html.escape(str(valore))}">{html.escape(str(valore))}</a>'
+        if isinstance(valore, float):
+            classe = ' class="su"' if colonna in ('sconto', 'alpha_perc') and valore > 0 else ' class="giu"' if colonna in ('sconto', 'alpha_perc') else ''
+            return f"<span{classe}>{valore:.2f}</span>"
+        return html.escape('' if valore is None else str(valore))
+    testata = ''.join(f"<th>{html.escape(c)}</th>" for c in colonne)
+    corpo = ''.join('<tr>' + ''.join(f"<td>{cella(c, r.get(c))}</td>" for c in colonne) + '</tr>' for r in righe)
+    return f"<table><tr>{testata}</tr>{corpo}</table>"
+
+class Catalogo:
+    """Ultimi output in memoria, ricaricati solo quando i file in outputs/ cambiano"""
+
+    def __init__(self, cartelle=None, db_path=None):
+        self.cartelle = cartelle or INDICE_CONFIG['CARTELLE']
+        self.db_path = db_path or INDICE_CONFIG['DB_PATH']
+        self.versione = 0
+        self.risposte = {}
+        self.file = {}
+        self._impronta = None
+        self._prossimo_controllo = 0
+        self._ticker = OrderedDict()
+        self._lock = threading.Lock()
+        self.aggiorna_se_serve(forza=True)
+
+    def _impronta_cartelle(self):
+        voci = []
+        for cartella in self.cartelle:
+            if os.path.isdir(cartella):
+                voci += [(e.path, e.stat().st_mtime, e.stat().st_size) for e in os.scandir(cartella)
+                         if e.name.endswith(INDICE_CONFIG['ESTENSIONI'])]
+        return tuple(sorted(voci))
+
+    def aggiorna_se_serve(self, forza=False):
+        """Al massimo un controllo ogni CONTROLLO_OGNI_S; ricarica solo se l'elenco dei file è cambiato"""
+        adesso = time.time()
+        if not forza and adesso < self._prossimo_controllo:
+            return
+        with self._lock:
+            if not forza and adesso < self._prossimo_controllo:
+                return
+            self._prossimo_controllo = adesso + DASHBOARD_CONFIG['CONTROLLO_OGNI_S']
+            impronta = self._impronta_cartelle()
+            if impronta == self._impronta:
+                return
+            self._ricarica()
+            self._impronta = impronta
+
+    def _ultimo(self, conn, tipo):
+        riga = conn.execute(
+            "SELECT path, mtime FROM run WHERE tipo = ? AND righe > 0 ORDER BY data_run DESC, mtime DESC LIMIT 1", (tipo,)
+        ).fetchone()
+        return riga if riga else (None, 0)
+
+    def _ricarica(self):
+        conn = apri_indice(self.db_path)
+        indicizza(conn=conn)
+        path_screening, mtime_screening = self._ultimo(conn, 'screening')
+        path_backtest, mtime_backtest = self._ultimo(conn, 'backtest')
+        conn.close()
+
+        screening = carica_risultati(path_screening) if path_screening else []
+        backtest = carica_risultati(path_backtest) if path_backtest else []
+        agg_screening = aggregati_screening(screening)
+        agg_backtest = aggregati_backtest(backtest)
+        modificato = max(mtime_screening, mtime_backtest, 0)
+
+        self.versione += 1
+        self.file = {'screening': path_screening, 'backtest': path_backtest}
+        riepilogo = {'versione': self.versione, 'file': self.file, 'screening': agg_screening, 'backtest': agg_backtest}
+
+        panoramica = (
+            f"<p>Screening: <b>{html.escape(str(path_screening))}</b> — {agg_screening['risultati']} titoli, "
+            f"{agg_screening['opportunita']} opportunità (sconto &gt; {CONFIG['MIN_DISCOUNT']}% e qualità ok)</p>"
+            f"<h2>🏆 Migliori per punteggio</h2>"
+            + _tabella_html(agg_screening['top'], ['ticker', 'nome', 'settore', 'prezzo', 'sconto', 'investment_score', 'rischio'])
+            + f"<h2>🏭 Settori</h2>"
+            + _tabella_html([{'settore': s, **v} for s, v in agg_screening['settori'].items()], ['settore', 'titoli', 'sconto_medio', 'opportunita'], link_ticker=False)
+            + f"<h2>📈 Backtest</h2><p>{html.escape(str(path_backtest))} — S&amp;P500 {agg_backtest['rendimento_sp500_perc']}% | "
+            f"alpha medio {agg_backtest['alpha_medio_perc']}% | {agg_backtest['battono_sp500']}/{agg_backtest['titoli']} battono l'indice</p>"
+            + _tabella_html(agg_backtest['top_alpha'], ['ticker', 'sconto', 'rendimento_totale_perc', 'alpha_perc', 'max_drawdown_perc'])
+        )
+
+        # Sostituzione in blocco: le richieste in corso vedono o tutto il vecchio o tutto il nuovo
+        self.risposte = {
+            '/': risposta_html('Value Stock Finder', panoramica, modificato),
+            '/api/riepilogo': risposta_json(riepilogo, modificato),
+            '/api/screening': risposta_json({'file': path_screening, 'risultati': screening}, mtime_screening),
+            '/api/backtest': risposta_json({'file': path_backtest, 'risultati': backtest}, mtime_backtest)
+        }
+        self._ticker = OrderedDict()
+        print(f"🔄 Dashboard v{self.versione}: {os.path.basename(str(path_screening))} | {os.path.basename(str(path_backtest))}")
+
+    def storico_ticker(self, ticker, formato):
+        """Storico di un ticker dall'indice (una query per ticker e versione, poi dalla cache LRU)"""
+        chiave = (ticker.upper(), formato)
+        with self._lock:
+            risposta = self._ticker.get(chiave)
+            if risposta is not None:
+                self._ticker.move_to_end(chiave)
+                return risposta
+
+        conn = apri_indice(self.db_path)
+        try:
+            serie = {tipo: serie_ticker(ticker, CAMPI_STORICO[:4] if tipo == 'screening' else CAMPI_STORICO, tipo, conn)
+                     for tipo in ('screening', 'backtest')}
+            modificato = conn.execute("SELECT MAX(mtime) FROM run").fetchone()[0] or 0
+        finally:
+            conn.close()
+
+        punti = {tipo: [{'data_run': d, **{k: (None if v != v else v) for k, v in riga.items()}}
+                        for d, riga in df.iterrows()] for tipo, df in serie.items()}
+        if formato == 'json':
+            risposta = risposta_json({'ticker': ticker.upper(), **punti}, modificato)
+        else:
+            corpo = ''.join(
+                f"<h2>{tipo.capitalize()} ({len(righe)} run)</h2>" + _tabella_html(righe, ['data_run'] + list(serie[tipo].columns), link_ticker=False)
+                for tipo, righe in punti.items()
+            )
+            risposta = risposta_html(f"Storico {ticker.upper()}", '<p><a href="/">← panoramica</a></p>' + corpo, modificato)
+
+        with self._lock:
+            self._ticker[chiave] = risposta
+            if len(self._ticker) > DASHBOARD_CONFIG['CACHE_TICKER']:
+                self._ticker.popitem(last=False)
+        return risposta
+
+    def risolvi(self, percorso):
+        self.aggiorna_se_serve()
+        if percorso in self.risposte:
+            return self.risposte[percorso]
+        if percorso == '/api/stato':
+            return risposta_json({'versione': self.versione, 'file': self.file}, time.time())
+        for prefisso, formato in (('/api/ticker/', 'json'), ('/ticker/', 'html')):
+            if percorso.startswith(prefisso) and len(percorso) > len(prefisso):
+                return self.storico_ticker(unquote(percorso[len(prefisso):]), formato)  # /ticker/%5EGSPC -> ^GSPC
+        return None
+
+# ==================== SERVER HTTP ====================
+
+class GestoreDashboard(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # connessioni keep-alive
+    disable_nagle_algorithm = True  # intestazioni e corpo partono subito (niente attese TCP da 40 ms)
+    catalogo = None
+
+    def do_GET(self, corpo=True):
+        percorso = self.path.split('?', 1)[0].rstrip('/') or '/'
+        try:
+            risposta = self.catalogo.risolvi(percorso)
+        except Exception as e:
+            self._invia_errore(500, f"Errore interno: {str(e)[:100]}")
+            return
+        if risposta is None:
+            self._invia_errore(404, "Risorsa non trovata")
+            return
+
+        if self._non_modificato(risposta):
+            self.send_response(304)
+            self.send_header('ETag', risposta.etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', risposta.tipo)
+        self.send_header('Content-Length', str(len(risposta.corpo)))
+        self.send_header('ETag', risposta.etag)
+        self.send_header('Last-Modified', formatdate(risposta.modificato, usegmt=True))
+        self.send_header('Cache-Control', 'no-cache')  # il browser rivalida sempre: costa solo un 304
+        self.end_headers()
+        if corpo:
+            self.wfile.write(risposta.corpo)
+
+    def do_HEAD(self):
+        self.do_GET(corpo=False)
+
+    def _non_modificato(self, risposta):
+        etag = self.headers.get('If-None-Match')
+        if etag is not None:
+            return risposta.etag in [e.strip() for e in etag.split(',')] or etag.strip() == '*'
+        data = self.headers.get('If-Modified-Since')
+        if data:
+            try:
+                return parsedate_to_datetime(data).timestamp() >= risposta.modificato
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _invia_errore(self, codice, messaggio):
+        corpo = json.dumps({'errore': messaggio}).encode('utf-8')
+        self.send_response(codice)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass  # centinaia di richieste al secondo: niente riga di log per richiesta
+
+def crea_server(host=None, porta=None, catalogo=None):
+    GestoreDashboard.catalogo = catalogo or Catalogo()
+    server = ThreadingHTTPServer((host or DASHBOARD_CONFIG['HOST'], DASHBOARD_CONFIG['PORTA'] if porta is None else porta), GestoreDashboard)
+    server.daemon_threads = True
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard web (sola lettura) dei risultati salvati")
+    parser.add_argument('--host', default=DASHBOARD_CONFIG['HOST'])
+    parser.add_argument('--porta', type=int, default=DASHBOARD_CONFIG['PORTA'])
+    args = parser.parse_args()
+
+    server = crea_server(args.host, args.porta)
+    print(f"🖥️  Dashboard su http://{args.host}:{server.server_address[1]} (Ctrl+C per uscire)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Dashboard chiusa")
+    finally:
+        server.server_close()
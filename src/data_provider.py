@@ -0,0 +1,354 @@
+"""
+🔌 DATA PROVIDER - Value Stock Finder
+Livello unico di accesso ai dati di mercato (fondamentali + prezzi storici)
+
+Backend disponibili:
+- yfinance:  dati live da Yahoo Finance (comportamento originale)
+- record:    come yfinance, ma salva info e OHLC su disco per il replay
+- replay:    legge SOLO i dati registrati, nessuna chiamata di rete
+- synthetic: universo sintetico deterministico (10k-100k ticker) per profiling e load test
+- http:      client di un server HTTP locale (src/server_guasti.py) che inietta errori e latenze
+"""
+
+import os
+import json
+import zlib
+import numpy as np
+from urllib.parse import quote, urlencode
+from urllib.request import urlopen
+import pandas as pd
+import yfinance as yf
+
+# ==================== CONFIGURAZIONE PROVIDER ====================
+
+PROVIDER_CONFIG = {
+    'BACKEND': os.environ.get('VSF_PROVIDER', 'yfinance'),  # yfinance | record | replay | synthetic | http
+    'HTTP_URL': os.environ.get('VSF_HTTP_URL', 'http://127.0.0.1:8765'),  # Server del backend http
+    'REPLAY_DIR': 'data/replay',       # Cartella dati registrati
+    'SYNTHETIC_SEED': 42,              # Seed universo sintetico
+    'SYNTHETIC_DATA_FINE': '2025-10-31',  # Ultimo giorno di borsa del mercato sintetico
+    'SYNTHETIC_ANNI_STORIA': 12        # Anni di storia prezzi sintetica
+}
+
+SETTORI_YAHOO = [
+    'Technology', 'Financial Services', 'Healthcare', 'Consumer Cyclical',
+    'Consumer Defensive', 'Energy', 'Industrials', 'Basic Materials',
+    'Real Estate', 'Communication Services', 'Utilities'
+]
+
+COLONNE_OHLC = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# ==================== INTERFACCIA ====================
+
+class DataProvider:
+    """Interfaccia comune: ogni backend restituisce gli stessi formati"""
+    nome = 'base'
+    remoto = False  # True se ogni richiesta passa dalla rete (serve il rate limiting)
+
+    def get_info(self, ticker):
+        """Dizionario 'info' in formato Yahoo (trailingEps, bookValue, sector, ...)"""
+        raise NotImplementedError
+
+    def get_history(self, ticker, start, end):
+        """DataFrame OHLC giornaliero (Open, High, Low, Close, Volume) indicizzato per data"""
+        raise NotImplementedError
+
+    def get_prezzi(self, tickers, start, end):
+        """
+        Panel delle chiusure (date x ticker) per più ticker in una volta.
+        Default: un get_history per ticker; i backend remoti lo sostituiscono con un download unico.
+        """
+        colonne = {}
+        for ticker in tickers:
+            try:
+                colonne[ticker] = self.get_history(ticker, start, end)['Close']
+            except Exception as e:
+                print(f"   ❌ Storico non disponibile per {ticker}: {str(e)[:50]}")
+        return crea_panel(colonne, tickers)
+
+def normalizza_ohlc(dati):
+    """Porta il download di Yahoo a colonne semplici OHLC (gestisce MultiIndex)"""
+    if dati is None or dati.empty:
+        return pd.DataFrame(columns=COLONNE_OHLC)
+    if isinstance(dati.columns, pd.MultiIndex):
+        dati = dati.droplevel(1, axis=1)
+    colonne = [c for c in COLONNE_OHLC if c in dati.columns]
+    dati = dati[colonne].copy()
+    dati.index = pd.to_datetime(dati.index).tz_localize(None)
+    return dati
+
+def crea_panel(colonne, tickers):
+    """Unisce le serie di chiusura in un unico DataFrame date x ticker (colonne nell'ordine richiesto)"""
+    panel = pd.DataFrame(colonne, columns=[t for t in tickers if t in colonne], dtype=float)
+    return panel.sort_index()
+
+def _taglia_periodo(dati, start, end):
+    """Stessa semantica di yf.download: start incluso, end escluso"""
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+    return dati.loc[(dati.index >= start) & (dati.index < end)]
+
+# ==================== BACKEND YFINANCE ====================
+
+class YFinanceProvider(DataProvider):
+    """Dati live da Yahoo Finance"""
+    nome = 'yfinance'
+    remoto = True
+
+    def get_info(self, ticker):
+        return yf.Ticker(ticker).info
+
+    def get_history(self, ticker, start, end):
+        dati = yf.download(
+            ticker,
+            start=start,
+            end=end,
+            progress=False,
+            auto_adjust=True
+        )
+        return normalizza_ohlc(dati)
+
+    def get_prezzi(self, tickers, start, end):
+        # 🔥 Una sola richiesta per tutti i ticker invece di N download separati
+        dati = yf.download(
+            list(tickers),
+            start=start,
+            end=end,
+            progress=False,
+            auto_adjust=True,
+            group_by='column'
+        )
+        if dati is None or dati.empty:
+            return pd.DataFrame(columns=list(tickers), dtype=float)
+
+        chiusure = dati['Close']
+        if isinstance(chiusure, pd.Series):
+            chiusure = chiusure.to_frame(tickers[0])
+        chiusure.index = pd.to_datetime(chiusure.index).tz_localize(None)
+        # I ticker senza dati tornano come colonne tutte NaN: li togliamo
+        chiusure = chiusure.dropna(axis=1, how='all')
+        return crea_panel({t: chiusure[t] for t in chiusure.columns}, tickers)
+
+# ==================== BACKEND RECORD / REPLAY ====================
+
+class RecordReplayProvider(DataProvider):
+    """
+    In modalità 'record' inoltra le richieste a un altro provider e salva tutto su disco.
+    In modalità 'replay' legge solo da disco: nessuna rete, risultati sempre uguali.
+    """
+    nome = 'replay'
+
+    def __init__(self, cartella=None, sorgente=None, modalita='replay'):
+        if modalita not in ('record', 'replay'):
+            raise ValueError(f"Modalità non valida: {modalita}")
+        if modalita == 'record' and sorgente is None:
+            raise ValueError("La modalità record richiede un provider sorgente")
+
+        self.cartella = cartella or PROVIDER_CONFIG['REPLAY_DIR']
+        self.sorgente = sorgente
+        self.modalita = modalita
+        self.nome = modalita
+        self.remoto = modalita == 'record' and sorgente.remoto
+
+        os.makedirs(os.path.join(self.cartella, 'info'), exist_ok=True)
+        os.makedirs(os.path.join(self.cartella, 'storico'), exist_ok=True)
+
+    def _path(self, tipo, ticker, estensione):
+        nome_file = ticker.replace('/', '_') + estensione
+        return os.path.join(self.cartella, tipo, nome_file)
+
+    def get_info(self, ticker):
+        path = self._path('info', ticker, '.json')
+
+        if self.modalita == 'record':
+            info = self.sorgente.get_info(ticker)
+            with open(path, 'w') as f:
+                json.dump(info, f, default=str)
+            return info
+
+        if not os.path.exists(path):
+            raise KeyError(f"Info di {ticker} non registrate in {self.cartella}")
+        with open(path) as f:
+            return json.load(f)
+
+    def get_history(self, ticker, start, end):
+        path = self._path('storico', ticker, '.csv')
+        registrati = None
+        if os.path.exists(path):
+            registrati = pd.read_csv(path, index_col=0, parse_dates=True)
+
+        if self.modalita == 'record':
+            dati = self.sorgente.get_history(ticker, start, end)
+            # Unisce con quanto già registrato (finestre diverse nello stesso file)
+            completi = dati if registrati is None else dati.combine_first(registrati)
+            completi.sort_index().to_csv(path)
+            return dati
+
+        if registrati is None:
+            raise KeyError(f"Storico di {ticker} non registrato in {self.cartella}")
+        return _taglia_periodo(registrati, start, end)
+
+    def get_prezzi(self, tickers, start, end):
+        if self.modalita == 'replay':
+            return super().get_prezzi(tickers, start, end)
+
+        # Record: download batch dalla sorgente, poi salva le chiusure ticker per ticker
+        panel = self.sorgente.get_prezzi(tickers, start, end)
+        for ticker in panel.columns:
+            path = self._path('storico', ticker, '.csv')
+            dati = panel[[ticker]].dropna().rename(columns={ticker: 'Close'})
+            if os.path.exists(path):
+                dati = dati.combine_first(pd.read_csv(path, index_col=0, parse_dates=True))
+            dati.sort_index().to_csv(path)
+        return panel
+
+# ==================== BACKEND SINTETICO ====================
+
+def genera_universo(n, prefisso='SYN'):
+    """Lista deterministica di n ticker sintetici (SYN00000, SYN00001, ...)"""
+    cifre = max(5, len(str(n - 1)))
+    return [f"{prefisso}{i:0{cifre}d}" for i in range(n)]
+
+class SyntheticProvider(DataProvider):
+    """
+    Fondamentali e prezzi realistici ma inventati, deterministici per (seed, ticker).
+    Il mercato sintetico termina a SYNTHETIC_DATA_FINE: currentPrice è l'ultima chiusura.
+    """
+    nome = 'synthetic'
+
+    def __init__(self, seed=None, data_fine=None, anni_storia=None):
+        self.seed = PROVIDER_CONFIG['SYNTHETIC_SEED'] if seed is None else seed
+        self.data_fine = pd.Timestamp(data_fine or PROVIDER_CONFIG['SYNTHETIC_DATA_FINE'])
+        anni = anni_storia or PROVIDER_CONFIG['SYNTHETIC_ANNI_STORIA']
+        self.date = pd.bdate_range(end=self.data_fine, periods=anni * 252)
+
+    def _rng(self, ticker, stream):
+        return np.random.default_rng([self.seed, zlib.crc32(ticker.encode()), stream])
+
+    def _parametri_prezzo(self, ticker):
+        rng = self._rng(ticker, 0)
+        beta = float(np.clip(rng.normal(1.0, 0.35), 0.2, 2.8))
+        drift = rng.normal(0.07, 0.06) / 252
+        volatilita = (0.12 + 0.12 * beta) / np.sqrt(252)
+        prezzo_finale = float(np.exp(rng.normal(np.log(60), 0.9)))
+        return beta, drift, volatilita, prezzo_finale
+
+    def _chiusure(self, ticker):
+        _, drift, volatilita, prezzo_finale = self._parametri_prezzo(ticker)
+        rng = self._rng(ticker, 1)
+        log_rend = rng.normal(drift - volatilita ** 2 / 2, volatilita, len(self.date))
+        log_rend[0] = 0.0
+        log_prezzi = np.cumsum(log_rend)
+        # Ancora il percorso in modo che l'ultima chiusura sia currentPrice
+        return prezzo_finale * np.exp(log_prezzi - log_prezzi[-1])
+
+    def get_info(self, ticker):
+        beta, _, _, prezzo = self._parametri_prezzo(ticker)
+        rng = self._rng(ticker, 2)
+
+        settore = SETTORI_YAHOO[int(rng.integers(len(SETTORI_YAHOO)))]
+        pe = float(np.exp(rng.normal(np.log(18), 0.5)))
+        eps = prezzo / pe if rng.random() > 0.12 else -prezzo / pe / 3  # ~12% in perdita
+        pb = float(np.exp(rng.normal(np.log(2.5), 0.7)))
+        book_val = prezzo / pb
+        operating_cf = float(rng.normal(2e9, 2.5e9))
+
+        info = {
+            'symbol': ticker,
+            'longName': f"{ticker} Synthetic Corp.",
+            'sector': settore,
+            'currentPrice': round(prezzo, 2),
+            'trailingEps': round(eps, 4),
+            'returnOnEquity': round(eps / book_val, 5),
+            'profitMargins': round(float(rng.normal(0.10, 0.08)), 5),
+            'debtToEquity': round(float(np.exp(rng.normal(np.log(60), 0.8))), 3),
+            'operatingCashflow': operating_cf,
+            'longTermDebt': max(float(rng.normal(3e9, 3e9)), 0.0),
+            'currentRatio': round(float(np.exp(rng.normal(np.log(1.4), 0.4))), 3),
+            'beta': round(beta, 3),
+            'earningsGrowth': round(float(rng.normal(0.08, 0.15)), 4)
+        }
+        if eps > 0:
+            info['trailingPE'] = round(prezzo / eps, 6)
+        # ~4% senza book value: buchi nei dati come su Yahoo
+        if rng.random() >= 0.04:
+            info['bookValue'] = round(book_val, 3)
+        return info
+
+    def get_history(self, ticker, start, end):
+        chiusure = self._chiusure(ticker)
+        rng = self._rng(ticker, 3)
+        n = len(chiusure)
+
+        escursione = np.abs(rng.normal(0, 0.008, n))
+        aperture = chiusure * (1 + rng.normal(0, 0.004, n))
+        dati = pd.DataFrame({
+            'Open': aperture,
+            'High': np.maximum(aperture, chiusure) * (1 + escursione),
+            'Low': np.minimum(aperture, chiusure) * (1 - escursione),
+            'Close': chiusure,
+            'Volume': rng.integers(100_000, 20_000_000, n)
+        }, index=self.date)
+        return _taglia_periodo(dati, start, end)
+
+# ==================== BACKEND HTTP (SERVER CON GUASTI) ====================
+
+class HTTPProvider(DataProvider):
+    """
+    Client del server locale src/server_guasti.py: stessi dati del provider sintetico,
+    ma passando dalla rete con 429, errori 5xx, risposte lente e richieste bloccate.
+    Serve a misurare completezza dello screening e latenze di coda del fetch adattivo.
+    """
+    nome = 'http'
+    remoto = True
+
+    def __init__(self, url=None):
+        self.url = (url or PROVIDER_CONFIG['HTTP_URL']).rstrip('/')
+
+    def _get(self, percorso):
+        # Il timeout lo applica fetch_adattivo: qui solo un limite di sicurezza sul socket
+        with urlopen(self.url + percorso, timeout=300) as risposta:
+            return json.loads(risposta.read())
+
+    def get_info(self, ticker):
+        return self._get(f"/info/{quote(ticker, safe='')}")
+
+    def get_history(self, ticker, start, end):
+        parametri = urlencode({'start': str(pd.Timestamp(start).date()), 'end': str(pd.Timestamp(end).date())})
+        dati = self._get(f"/storico/{quote(ticker, safe='')}?{parametri}")
+        storico = pd.DataFrame(dati['colonne'], index=pd.to_datetime(dati['date']))
+        return storico[[c for c in COLONNE_OHLC if c in storico.columns]]
+
+# ==================== SELEZIONE PROVIDER ====================
+
+_provider_attivo = None
+
+def crea_provider(backend=None, **kwargs):
+    """Crea un provider dal nome del backend"""
+    backend = backend or PROVIDER_CONFIG['BACKEND']
+
+    if backend == 'yfinance':
+        return YFinanceProvider()
+    elif backend == 'record':
+        return RecordReplayProvider(sorgente=YFinanceProvider(), modalita='record', **kwargs)
+    elif backend == 'replay':
+        return RecordReplayProvider(modalita='replay', **kwargs)
+    elif backend == 'synthetic':
+        return SyntheticProvider(**kwargs)
+    elif backend == 'http':
+        return HTTPProvider(**kwargs)
+    else:
+        raise ValueError(f"Backend dati sconosciuto: {backend}")
+
+def get_provider():
+    """Provider condiviso da screener e backtester"""
+    global _provider_attivo
+    if _provider_attivo is None:
+        _provider_attivo = crea_provider()
+    return _provider_attivo
+
+def set_provider(provider):
+    """Sostituisce il provider attivo (es. replay o synthetic per test offline)"""
+    global _provider_attivo
+    _provider_attivo = provider
+    return provider
@@ -0,0 +1,296 @@
+"""
+🛡️ FETCH ADATTIVO - Value Stock Finder
+Percorso unico per le richieste al provider dati:
+- timeout per singola richiesta (una chiamata bloccata non ferma più tutto lo screening)
+- retry con backoff esponenziale + jitter sugli errori transitori
+- rallentamento adattivo del token bucket quando il provider limita (429 / "Too Many Requests")
+  e ripresa graduale dopo una serie di successi
+- single-flight: richieste concorrenti per lo stesso ticker condividono un solo download
+- fallimenti raccolti come lista strutturata (niente print), esportati nel report metriche
+"""
+
+import time
+import random
+import socket
+import threading
+from datetime import datetime
+from dataclasses import dataclass
+from urllib.error import HTTPError, URLError
+from risultati import ComeDizionario
+from strumentazione import fase, conta
+
+# ==================== CONFIGURAZIONE FETCH ====================
+
+FETCH_CONFIG = {
+    'TIMEOUT_S': 20.0,          # Timeout per singola richiesta remota
+    'TENTATIVI': 4,             # Tentativi totali per richiesta (1 + 3 retry)
+    'BACKOFF_BASE_S': 0.5,      # Attesa base del backoff esponenziale
+    'BACKOFF_MAX_S': 30.0,      # Tetto dell'attesa tra due tentativi
+    'RALLENTAMENTO': 0.5,       # Moltiplicatore del rate quando il provider limita
+    'RATE_MIN': 0.2,            # Richieste/secondo minime dopo i rallentamenti
+    'RALLENTA_OGNI_S': 5.0,     # Al massimo un rallentamento per finestra (i 429 arrivano a raffica)
+    'RIPRESA_DOPO': 20,         # Successi prima di riaccelerare (azzerati da ogni rallentamento)
+    'RIPRESA': 1.25,            # Moltiplicatore del rate in ripresa (fino al rate iniziale)
+    'MAX_FALLIMENTI': 10000     # Fallimenti conservati per run (memoria limitata)
+}
+
+# Tipi di errore: solo 'permanente' non viene ritentato
+TIPI_ERRORE = ('timeout', 'rate_limit', 'transitorio', 'permanente')
+TIPI_TRANSITORI = ('timeout', 'rate_limit', 'transitorio')
+
+class TimeoutRichiesta(Exception):
+    """La richiesta non ha risposto entro TIMEOUT_S"""
+
+class ErroreFetch(Exception):
+    """Richiesta fallita definitivamente (dopo i tentativi o per errore permanente)"""
+
+    def __init__(self, fallimento):
+        super().__init__(f"{fallimento.ticker}: {fallimento.tipo} dopo {fallimento.tentativi} tentativi ({fallimento.errore})")
+        self.fallimento = fallimento
+
+@dataclass(slots=True)
+class Fallimento(ComeDizionario):
+    """Un ticker non analizzato: cosa, perché e dopo quanti tentativi"""
+    ticker: str
+    operazione: str = ''
+    tipo: str = ''
+    errore: str = ''
+    tentativi: int = 0
+    secondi: float = 0.0
+    quando: str = ''
+
+def classifica_errore(errore):
+    """timeout | rate_limit | transitorio | permanente"""
+    if isinstance(errore, (TimeoutRichiesta, TimeoutError, socket.timeout)):
+        return 'timeout'
+    testo = f"{type(errore).__name__} {errore}".lower()
+    if isinstance(errore, HTTPError):
+        if errore.code == 429:
+            return 'rate_limit'
+        return 'transitorio' if errore.code >= 500 or errore.code == 408 else 'permanente'
+    # yfinance: YFRateLimitError("Too Many Requests. Rate limited. Try after a while.")
+    if 'ratelimit' in testo or 'rate limit' in testo or 'too many requests' in testo or '429' in testo:
+        return 'rate_limit'
+    if isinstance(errore, (URLError, ConnectionError, OSError)) or 'timed out' in testo:
+        return 'transitorio'
+    if any(codice in testo for codice in ('500', '502', '503', '504')):
+        return 'transitorio'
+    return 'permanente'
+
+def attesa_backoff(tentativo, base=None, massimo=None, errore=None):
+    """
+    Backoff esponenziale con 'full jitter': attesa casuale in [0, base * 2^tentativo].
+    Se il server indica Retry-After si aspetta almeno quello.
+    """
+    base = FETCH_CONFIG['BACKOFF_BASE_S'] if base is None else base
+    massimo = FETCH_CONFIG['BACKOFF_MAX_S'] if massimo is None else massimo
+    attesa = random.uniform(0, min(massimo, base * 2 ** tentativo))
+    retry_after = getattr(errore, 'headers', None) and errore.headers.get('Retry-After')
+    if retry_after:
+        try:
+            attesa = max(attesa, min(float(retry_after), massimo))
+        except ValueError:
+            pass
+    return attesa
+
+def con_timeout(funzione, args, secondi):
+    """
+    Esegue funzione(*args) in un thread daemon e aspetta al massimo 'secondi'.
+    Le librerie di rete non sono interrompibili: allo scadere la chiamata viene abbandonata
+    (il thread daemon non blocca l'uscita del programma) e si solleva TimeoutRichiesta.
+    """
+    esito = {}
+
+    def esegui():
+        try:
+            esito['valore'] = funzione(*args)
+        except BaseException as e:
+            esito['errore'] = e
+
+    thread = threading.Thread(target=esegui, daemon=True)
+    thread.start()
+    thread.join(secondi)
+    if thread.is_alive():
+        raise TimeoutRichiesta(f"nessuna risposta in {secondi:g}s")
+    if 'errore' in esito:
+        raise esito['errore']
+    return esito['valore']
+
+class _Volo:
+    """Richiesta in corso condivisa tra i thread che chiedono lo stesso ticker"""
+    __slots__ = ('fatto', 'valore', 'errore')
+
+    def __init__(self):
+        self.fatto = threading.Event()
+        self.valore = None
+        self.errore = None
+
+class FetchAdattivo:
+    """
+    Esegue le richieste al provider con timeout, retry, rallentamento adattivo e single-flight.
+    limitatore: TokenBucket condiviso (None per i provider locali, che non vanno rallentati).
+    """
+
+    def __init__(self, limitatore=None, remoto=True, config=None):
+        self.config = {**FETCH_CONFIG, **(config or {})}
+        self.limitatore = limitatore
+        self.remoto = remoto
+        self.rate_iniziale = limitatore.rate if limitatore else None
+        self.fallimenti = []
+        self._transitori = set()  # ticker falliti per errori transitori (da ritentare in un run successivo)
+        self.stats = {'richieste': 0, 'tentativi': 0, 'ritentati': 0, 'condivisi': 0,
+                      'timeout': 0, 'rate_limit': 0, 'rallentamenti': 0, 'riprese': 0}
+        self._lock = threading.Lock()
+        self._in_volo = {}
+        self._successi = 0
+        self._ultimo_rallentamento = float('-inf')
+
+    # ---------- single-flight ----------
+
+    def esegui(self, operazione, ticker, funzione, *args):
+        """Risultato di funzione(*args); se la stessa (operazione, ticker) è già in volo, aspetta quella"""
+        chiave = (operazione, ticker)
+        with self._lock:
+            volo = self._in_volo.get(chiave)
+            guida = volo is None
+            if guida:
+                volo = self._in_volo[chiave] = _Volo()
+            else:
+                self.stats['condivisi'] += 1
+
+        if not guida:
+            volo.fatto.wait()
+            if volo.errore is not None:
+                raise volo.errore
+            return volo.valore
+
+        try:
+            volo.valore = self._con_retry(operazione, ticker, funzione, args)
+            return volo.valore
+        except BaseException as e:
+            volo.errore = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_volo[chiave]
+            volo.fatto.set()
+
+    # ---------- retry + backoff ----------
+
+    def _con_retry(self, operazione, ticker, funzione, args):
+        inizio = time.perf_counter()
+        with self._lock:
+            self.stats['richieste'] += 1
+
+        # I provider locali (replay/synthetic) non hanno errori transitori: un solo tentativo
+        tentativi = self.config['TENTATIVI'] if self.remoto else 1
+        for tentativo in range(tentativi):
+            if self.limitatore is not None:
+                with fase('attesa_rate_limit'):
+                    self.limitatore.acquire()
+            with self._lock:
+                self.stats['tentativi'] += 1
+                if tentativo:
+                    self.stats['ritentati'] += 1
+            try:
+                if self.remoto:
+                    valore = con_timeout(funzione, args, self.config['TIMEOUT_S'])
+                else:
+                    valore = funzione(*args)
+                self._successo()
+                return valore
+            except Exception as e:
+                tipo = classifica_errore(e)
+                conta(f'fetch_{tipo}')
+                if tipo in ('timeout', 'rate_limit'):
+                    with self._lock:
+                        self.stats[tipo] += 1
+                if tipo == 'rate_limit':
+                    self._rallenta()
+
+                ultimo = tentativo == tentativi - 1
+                if tipo == 'permanente' or ultimo:
+                    fallimento = self.registra_fallimento(
+                        ticker, operazione, e, tipo, tentativo + 1, time.perf_counter() - inizio
+                    )
+                    raise ErroreFetch(fallimento) from e
+                with fase('backoff'):
+                    time.sleep(attesa_backoff(tentativo, self.config['BACKOFF_BASE_S'],
+                                              self.config['BACKOFF_MAX_S'], e))
+
+    # ---------- rallentamento adattivo ----------
+
+    def _rallenta(self):
+        """
+        Rate limit rilevato: il token bucket rallenta per TUTTI i thread.
+        I 429 dei thread in volo nello stesso momento contano come un solo segnale.
+        """
+        if self.limitatore is None:
+            return
+        with self._lock:
+            adesso = time.monotonic()
+            if adesso - self._ultimo_rallentamento < self.config['RALLENTA_OGNI_S']:
+                return
+            self._ultimo_rallentamento = adesso
+            self._successi = 0
+            nuovo = max(self.limitatore.rate * self.config['RALLENTAMENTO'], self.config['RATE_MIN'])
+            if nuovo < self.limitatore.rate:
+                self.limitatore.set_rate(nuovo)
+                self.stats['rallentamenti'] += 1
+
+    def _successo(self):
+        """Ogni RIPRESA_DOPO successi il rate risale verso quello iniziale"""
+        if self.limitatore is None:
+            return
+        with self._lock:
+            self._successi += 1
+            if self._successi < self.config['RIPRESA_DOPO'] or self.limitatore.rate >= self.rate_iniziale:
+                return
+            self._successi = 0
+            self.limitatore.set_rate(min(self.limitatore.rate * self.config['RIPRESA'], self.rate_iniziale))
+            self.stats['riprese'] += 1
+
+    # ---------- fallimenti strutturati ----------
+
+    def registra_fallimento(self, ticker, operazione, errore, tipo=None, tentativi=1, secondi=0.0):
+        """Aggiunge un Fallimento alla lista del run (anche per errori fuori dal fetch, es. analisi)"""
+        fallimento = Fallimento(
+            ticker=ticker,
+            operazione=operazione,
+            tipo=tipo or classifica_errore(errore),
+            errore=f"{type(errore).__name__}: {str(errore)[:200]}",
+            tentativi=tentativi,
+            secondi=round(secondi, 3),
+            quando=datetime.now().isoformat(timespec='seconds')
+        )
+        with self._lock:
+            if len(self.fallimenti) < self.config['MAX_FALLIMENTI']:
+                self.fallimenti.append(fallimento)
+            if fallimento.tipo in TIPI_TRANSITORI:
+                self._transitori.add(ticker)
+        return fallimento
+
+    def fallito_transitorio(self, ticker):
+        """True se nel run il ticker è fallito per timeout, rate limit o errore transitorio"""
+        with self._lock:
+            return ticker in self._transitori
+
+    def azzera(self):
+        """Nuovo run: lista fallimenti e contatori vuoti (il rate raggiunto resta)"""
+        with self._lock:
+            self.fallimenti = []
+            self._transitori = set()
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    def riepilogo(self):
+        """Contatori + fallimenti per tipo (per il report metriche)"""
+        with self._lock:
+            per_tipo = {}
+            for f in self.fallimenti:
+                per_tipo[f.tipo] = per_tipo.get(f.tipo, 0) + 1
+            return {
+                **self.stats,
+                'rate_finale': round(self.limitatore.rate, 3) if self.limitatore else None,
+                'fallimenti': len(self.fallimenti),
+                'fallimenti_per_tipo': per_tipo
+            }
@@ -0,0 +1,143 @@
+"""
+🗜️ FORMATO COLONNARE - Value Stock Finder
+Salvataggio di screening e backtest in Parquet (schema tipizzato, compressione zstd)
+e caricamento selettivo per colonne/date di uno o più file.
+
+pyarrow è una dipendenza opzionale (pip install pyarrow): senza, si resta su JSON.
+
+    salva_parquet(risultati, 'outputs/screens/screening_20251031_0900.parquet', 'screening')
+    df = carica_colonnare('outputs/screens', colonne=['ticker', 'sconto'], dal='2025-01-01')
+"""
+
+import os
+import glob
+from datetime import datetime, timedelta
+from risultati import a_dizionari
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+FORMATO_CONFIG = {
+    'FORMATO': os.environ.get('VSF_FORMATO', 'json'),   # 'json' o 'parquet'
+    'COMPRESSIONE': 'zstd'
+}
+
+def pyarrow_disponibile():
+    return pa is not None
+
+# ==================== SCHEMI ====================
+
+def _campi_screening():
+    return [
+        ('ticker', pa.string()),
+        ('nome', pa.string()),
+        ('settore', pa.dictionary(pa.int16(), pa.string())),
+        ('prezzo', pa.float64()),
+        ('valore_intrinseco', pa.float64()),
+        ('sconto', pa.float64()),
+        ('qualita_ok', pa.bool_()),
+        ('rischio', pa.dictionary(pa.int8(), pa.string())),
+        ('investment_score', pa.float64()),
+        ('quality_score_detailed', pa.int8()),
+        ('pe_ratio', pa.float64()),
+        ('roe', pa.float64()),
+        ('debito_equity', pa.float64())
+    ]
+
+def _campi_backtest():
+    return _campi_screening() + [
+        ('raccomandazione', pa.dictionary(pa.int8(), pa.string())),
+        ('valore_graham', pa.float64()),
+        ('periodo_analisi_anni', pa.int16()),
+        ('prezzo_iniziale', pa.float64()),
+        ('prezzo_attuale', pa.float64()),
+        ('rendimento_totale_perc', pa.float64()),
+        ('rendimento_annualizzato_perc', pa.float64()),
+        ('volatilita_annualizzata', pa.float64()),
+        ('max_drawdown_perc', pa.float64()),
+        ('sharpe_ratio', pa.float64()),
+        ('sortino_ratio', pa.float64()),
+        ('beta', pa.float64()),
+        ('data_inizio', pa.string()),
+        ('data_fine', pa.string()),
+        ('rendimento_sp500_perc', pa.float64()),
+        ('alpha_perc', pa.float64()),
+        ('battuto_sp500', pa.bool_()),
+        ('performance_relativa', pa.string()),
+        ('tracking_error_sp500_perc', pa.float64()),
+        ('benchmark_settore', pa.dictionary(pa.int8(), pa.string())),
+        ('rendimento_settore_perc', pa.float64()),
+        ('alpha_settore_perc', pa.float64()),
+        ('beta_settore', pa.float64()),
+        ('tracking_error_settore_perc', pa.float64()),
+        ('battuto_settore', pa.bool_())
+    ]
+
+def schema(tipo):
+    """Schema Arrow per 'screening' o 'backtest' (+ data_run: quando è stato prodotto il file)"""
+    campi = _campi_screening() if tipo == 'screening' else _campi_backtest()
+    return pa.schema(campi + [('data_run', pa.timestamp('s'))])
+
+# ==================== SCRITTURA ====================
+
+def salva_parquet(risultati, path, tipo='screening', data_run=None):
+    """Scrive i risultati (record o dizionari) in Parquet; i campi mancanti diventano null"""
+    if not pyarrow_disponibile():
+        print("⚠️  pyarrow non installato: formato Parquet non disponibile (pip install pyarrow)")
+        return None
+
+    data_run = data_run or datetime.now().replace(microsecond=0)
+    righe = [{**r, 'data_run': data_run} for r in a_dizionari(risultati)]
+    tabella = pa.Table.from_pylist(righe, schema=schema(tipo))
+
+    cartella = os.path.dirname(path)
+    if cartella:
+        os.makedirs(cartella, exist_ok=True)
+    pq.write_table(tabella, path, compression=FORMATO_CONFIG['COMPRESSIONE'])
+    return path
+
+# ==================== LETTURA ====================
+
+def _file_parquet(sorgente):
+    """Cartella, pattern glob, singolo file o lista di file -> lista di file .parquet"""
+    if isinstance(sorgente, (list, tuple)):
+        return list(sorgente)
+    if os.path.isdir(sorgente):
+        return sorted(glob.glob(os.path.join(sorgente, '*.parquet')))
+    return sorted(glob.glob(sorgente))
+
+def carica_colonnare(sorgente, colonne=None, dal=None, al=None):
+    """
+    DataFrame da uno o più file Parquet, leggendo SOLO le colonne richieste.
+    dal/al filtrano su data_run (il filtro viene applicato durante la lettura, non dopo).
+    """
+    if not pyarrow_disponibile():
+        print("⚠️  pyarrow non installato: impossibile leggere file Parquet (pip install pyarrow)")
+        return None
+
+    files = _file_parquet(sorgente)
+    if not files:
+        print(f"❌ Nessun file Parquet in: {sorgente}")
+        return None
+
+    dataset = ds.dataset(files, format='parquet')
+    filtro = None
+    if dal is not None:
+        filtro = ds.field('data_run') >= _istante(dal)
+    if al is not None:
+        if len(str(al)) == 10:
+            limite = ds.field('data_run') < _istante(al, giorni=1)  # sola data: incluso tutto il giorno
+        else:
+            limite = ds.field('data_run') <= _istante(al)
+        filtro = limite if filtro is None else filtro & limite
+
+    tabella = dataset.to_table(columns=colonne, filter=filtro)
+    return tabella.to_pandas()
+
+def _istante(valore, giorni=0):
+    istante = datetime.fromisoformat(str(valore)) + timedelta(days=giorni)
+    return pa.scalar(istante, pa.timestamp('s'))
@@ -0,0 +1,308 @@
+"""
+🗂️ INDICE STORICO - Value Stock Finder
+Un unico database SQLite con tutti gli screening e i backtest salvati in outputs/
+(JSON, NDJSON, CSV, Parquet), una riga per (run, ticker).
+L'indicizzazione è incrementale: vengono letti solo i file nuovi o modificati.
+
+Uso:
+    python src/indice_storico.py indicizza
+    python src/indice_storico.py serie PFE --campi sconto,investment_score
+    python src/indice_storico.py top --n 5 --dal 2025-10-01
+    python src/indice_storico.py delta                      # ultimi due screening
+"""
+
+import os
+import re
+import csv
+import json
+import glob
+import sqlite3
+import argparse
+import pandas as pd
+from datetime import datetime
+
+INDICE_CONFIG = {
+    'DB_PATH': 'data/indice_storico.sqlite',
+    'CARTELLE': ['outputs/screens', 'outputs/archive', 'outputs/backtests'],
+    'ESTENSIONI': ('.json', '.ndjson', '.csv', '.parquet')
+}
+
+# Colonne numeriche interrogabili (tutto il resto resta nel JSON 'dati' della riga)
+CAMPI_NUMERICI = [
+    'prezzo', 'valore_intrinseco', 'sconto', 'investment_score', 'quality_score_detailed',
+    'pe_ratio', 'roe', 'debito_equity', 'rendimento_totale_perc', 'alpha_perc',
+    'sharpe_ratio', 'max_drawdown_perc'
+]
+CAMPI_TESTO = ['nome', 'settore', 'rischio']
+
+# Campi con indice (run_id, campo): il top-N per run legge solo le prime N voci dell'indice
+CAMPI_CLASSIFICA = ['investment_score', 'sconto']
+
+# Nomi storici delle colonne nei vecchi CSV
+ALIAS_CAMPI = {'valore_graham': 'valore_intrinseco'}
+
+_DATA_NEL_NOME = re.compile(r'(\d{8})(?:_(\d{4}))?')
+
+# ==================== DATABASE ====================
+
+def apri_indice(path=None):
+    path = path or INDICE_CONFIG['DB_PATH']
+    cartella = os.path.dirname(path)
+    if cartella:
+        os.makedirs(cartella, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    colonne = ',\n'.join([f"{c} REAL" for c in CAMPI_NUMERICI] + [f"{c} TEXT" for c in CAMPI_TESTO])
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS run (
+            id INTEGER PRIMARY KEY,
+            path TEXT UNIQUE NOT NULL,
+            tipo TEXT NOT NULL,
+            data_run TEXT NOT NULL,
+            mtime REAL NOT NULL,
+            dimensione INTEGER NOT NULL,
+            righe INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_run_data ON run (tipo, data_run);
+        CREATE TABLE IF NOT EXISTS righe (
+            run_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            data_run TEXT NOT NULL,
+            ticker TEXT NOT NULL,
+            qualita_ok INTEGER,
+            {colonne},
+            dati TEXT NOT NULL,
+            PRIMARY KEY (run_id, ticker)
+        );
+        CREATE INDEX IF NOT EXISTS idx_righe_ticker ON righe (ticker, tipo, data_run);
+        CREATE INDEX IF NOT EXISTS idx_righe_data ON righe (tipo, data_run);
+    """)
+    for campo in CAMPI_CLASSIFICA:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_righe_{campo} ON righe (run_id, {campo})")
+    return conn
+
+def _data_run(path):
+    """Timestamp del run dal nome file (..._AAAAMMGG[_HHMM]) o, in mancanza, dalla data di modifica"""
+    trovato = _DATA_NEL_NOME.search(os.path.basename(path))
+    if trovato:
+        giorno, ora = trovato.group(1), trovato.group(2) or '0000'
+        try:
+            return datetime.strptime(giorno + ora, '%Y%m%d%H%M').isoformat(timespec='minutes')
+        except ValueError:
+            pass  # 8 cifre che non sono una data (es. --run-id personalizzato)
+    return datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='minutes')
+
+def _tipo_run(path):
+    nome = os.path.basename(path)
+    return 'backtest' if nome.startswith('backtest') or 'backtests' in path.split(os.sep) else 'screening'
+
+# ==================== LETTURA FILE ====================
+
+def _leggi_file(path):
+    """Righe di un file di output come dizionari (formato dedotto dall'estensione); None se non è un output"""
+    if path.endswith('.csv'):
+        with open(path, encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+    from universi import carica_risultati  # JSON, NDJSON, Parquet
+    risultati = carica_risultati(path)
+    # JSON che non sono liste di risultati (es. stati salvati): non sono output da indicizzare
+    return risultati if isinstance(risultati, list) else None
+
+def _numero(valore):
+    if valore is None or valore == '':
+        return None
+    try:
+        numero = float(valore)
+    except (TypeError, ValueError):
+        return None
+    return None if numero != numero else numero
+
+def _booleano(valore):
+    if isinstance(valore, str):
+        return {'true': 1, 'false': 0}.get(valore.strip().lower())
+    return None if valore is None else int(bool(valore))
+
+def _riga_db(run_id, tipo, data_run, risultato):
+    risultato = {ALIAS_CAMPI.get(k, k): v for k, v in risultato.items()}
+    return (
+        run_id, tipo, data_run, str(risultato['ticker']), _booleano(risultato.get('qualita_ok')),
+        *[_numero(risultato.get(c)) for c in CAMPI_NUMERICI],
+        *[risultato.get(c) for c in CAMPI_TESTO],
+        json.dumps(risultato, default=str)
+    )
+
+# ==================== INDICIZZAZIONE ====================
+
+def file_da_indicizzare(cartelle=None):
+    cartelle = cartelle or INDICE_CONFIG['CARTELLE']
+    files = []
+    for cartella in cartelle:
+        files += [f for f in glob.glob(os.path.join(cartella, '*')) if f.endswith(INDICE_CONFIG['ESTENSIONI'])]
+    return sorted(files)
+
+def indicizza(files=None, conn=None):
+    """Aggiunge all'indice i file nuovi o modificati (gli altri vengono saltati senza leggerli)"""
+    propria = conn is None
+    conn = conn or apri_indice()
+    files = file_da_indicizzare() if files is None else files
+    segnaposti = ', '.join(['?'] * (5 + len(CAMPI_NUMERICI) + len(CAMPI_TESTO) + 1))
+
+    noti = {p: (m, d) for p, m, d in conn.execute("SELECT path, mtime, dimensione FROM run")}
+    nuovi = aggiornati = righe_totali = 0
+    for path in files:
+        path = os.path.normpath(path)
+        stato = (os.path.getmtime(path), os.path.getsize(path))
+        if noti.get(path) == stato:
+            continue
+        try:
+            righe = _leggi_file(path)
+        except Exception as e:
+            print(f"⚠️  {path}: non indicizzabile ({str(e)[:60]})")
+            continue
+        if righe is None:
+            continue
+        risultati = [r for r in righe if isinstance(r, dict) and r.get('ticker')]
+
+        tipo, data_run = _tipo_run(path), _data_run(path)
+        with conn:
+            if path in noti:
+                vecchio = conn.execute("SELECT id FROM run WHERE path = ?", (path,)).fetchone()[0]
+                conn.execute("DELETE FROM righe WHERE run_id = ?", (vecchio,))
+                conn.execute("DELETE FROM run WHERE id = ?", (vecchio,))
+                aggiornati += 1
+            else:
+                nuovi += 1
+            run_id = conn.execute(
+                "INSERT INTO run (path, tipo, data_run, mtime, dimensione, righe) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, tipo, data_run, *stato, len(risultati))
+            ).lastrowid
+            conn.executemany(
+                f"INSERT OR REPLACE INTO righe (run_id, tipo, data_run, ticker, qualita_ok, "
+                f"{', '.join(CAMPI_NUMERICI + CAMPI_TESTO)}, dati) VALUES ({segnaposti})",
+                [_riga_db(run_id, tipo, data_run, r) for r in risultati]
+            )
+        righe_totali += len(risultati)
+
+    if nuovi or aggiornati:
+        print(f"🗂️  Indice storico: {nuovi} file nuovi, {aggiornati} aggiornati ({righe_totali} righe)")
+    if propria:
+        conn.close()
+    return {'nuovi': nuovi, 'aggiornati': aggiornati, 'righe': righe_totali}
+
+# ==================== INTERROGAZIONI ====================
+
+def _controlla_campi(campi):
+    validi = set(CAMPI_NUMERICI + CAMPI_TESTO + ['qualita_ok'])
+    sconosciuti = [c for c in campi if c not in validi]
+    if sconosciuti:
+        raise ValueError(f"Campi non indicizzati: {', '.join(sconosciuti)} (disponibili: {', '.join(sorted(validi))})")
+    return campi
+
+def serie_ticker(ticker, campi=('sconto', 'investment_score'), tipo='screening', conn=None):
+    """Evoluzione dei campi di un ticker, un punto per run"""
+    conn = conn or apri_indice()
+    campi = _controlla_campi(list(campi))
+    return pd.read_sql_query(
+        f"SELECT data_run, {', '.join(campi)} FROM righe WHERE ticker = ? AND tipo = ? ORDER BY data_run",
+        conn, params=(ticker.upper(), tipo), index_col='data_run'
+    )
+
+def top_per_data(n=10, campo='investment_score', dal=None, al=None, tipo='screening', conn=None):
+    """I migliori n ticker di ogni run nel periodo (dal/al su data_run, estremi inclusi)"""
+    conn = conn or apri_indice()
+    _controlla_campi([campo])
+    # Per ogni run una sottoquery con LIMIT: con l'indice (run_id, campo) si leggono solo n righe a run
+    df = pd.read_sql_query(f"""
+        SELECT r.data_run, g.ticker, g.{campo} FROM run r
+        JOIN righe g ON g.rowid IN (
+            SELECT rowid FROM righe
+            WHERE run_id = r.id AND {campo} IS NOT NULL
+            ORDER BY {campo} DESC, ticker LIMIT ?
+        )
+        WHERE r.tipo = ? AND r.data_run >= ? AND r.data_run <= ?
+        ORDER BY r.data_run, r.id, g.{campo} DESC, g.ticker
+    """, conn, params=(n, tipo, str(dal or ''), str(al or '9999') + '~'))
+    df.insert(1, 'posizione', df.groupby('data_run').cumcount() + 1)
+    return df
+
+def variazioni(run_da=None, run_a=None, campi=('sconto', 'investment_score'), tipo='screening', conn=None):
+    """
+    Differenze per ticker tra due run (id o data_run); di default gli ultimi due del tipo indicato.
+    Ordinate per variazione del primo campo.
+    """
+    conn = conn or apri_indice()
+    campi = _controlla_campi(list(campi))
+
+    def trova(run):
+        riga = conn.execute(
+            "SELECT id, data_run FROM run WHERE tipo = ? AND (id = ? OR data_run = ?) ORDER BY id DESC LIMIT 1",
+            (tipo, run, str(run))
+        ).fetchone()
+        if riga is None:
+            raise ValueError(f"Run '{run}' non trovato nell'indice")
+        return riga
+
+    if run_da is None or run_a is None:
+        ultimi = conn.execute(
+            "SELECT id, data_run FROM run WHERE tipo = ? ORDER BY data_run DESC, id DESC LIMIT 2", (tipo,)
+        ).fetchall()
+        if len(ultimi) < 2:
+            print("❌ Servono almeno due run indicizzati")
+            return None
+        (id_a, data_a), (id_da, data_da) = ultimi
+    else:
+        (id_da, data_da), (id_a, data_a) = trova(run_da), trova(run_a)
+
+    colonne = ', '.join(f"a.{c} AS {c}_prima, b.{c} AS {c}_dopo, b.{c} - a.{c} AS delta_{c}" for c in campi)
+    df = pd.read_sql_query(f"""
+        SELECT b.ticker, {colonne} FROM righe a JOIN righe b ON a.ticker = b.ticker
+        WHERE a.run_id = ? AND b.run_id = ?
+        ORDER BY ABS(b.{campi[0]} - a.{campi[0]}) DESC
+    """, conn, params=(id_da, id_a))
+    df.attrs.update(da=data_da, a=data_a)
+    return df
+
+# ==================== CLI ====================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indice storico di screening e backtest")
+    sotto = parser.add_subparsers(dest='comando', required=True)
+    sotto.add_parser('indicizza', help="Indicizza i file nuovi o modificati in outputs/")
+
+    p = sotto.add_parser('serie', help="Serie storica di un ticker")
+    p.add_argument('ticker')
+    p.add_argument('--campi', default='sconto,investment_score')
+    p.add_argument('--tipo', default='screening', choices=['screening', 'backtest'])
+
+    p = sotto.add_parser('top', help="Top-N per ogni run")
+    p.add_argument('--n', type=int, default=10)
+    p.add_argument('--campo', default='investment_score')
+    p.add_argument('--dal')
+    p.add_argument('--al')
+    p.add_argument('--tipo', default='screening', choices=['screening', 'backtest'])
+
+    p = sotto.add_parser('delta', help="Variazioni tra due run (default: gli ultimi due)")
+    p.add_argument('--da', help="id o data_run del run di partenza")
+    p.add_argument('--a', help="id o data_run del run di arrivo")
+    p.add_argument('--campi', default='sconto,investment_score')
+    p.add_argument('--tipo', default='screening', choices=['screening', 'backtest'])
+    args = parser.parse_args(argv)
+
+    conn = apri_indice()
+    indicizza(conn=conn)  # ogni interrogazione vede anche gli output più recenti
+    pd.set_option('display.width', 160)
+
+    if args.comando == 'serie':
+        print(serie_ticker(args.ticker, args.campi.split(','), args.tipo, conn).to_string())
+    elif args.comando == 'top':
+        print(top_per_data(args.n, args.campo, args.dal, args.al, args.tipo, conn).to_string(index=False))
+    elif args.comando == 'delta':
+        df = variazioni(args.da, args.a, args.campi.split(','), args.tipo, conn)
+        if df is not None:
+            print(f"📊 {df.attrs['da']} -> {df.attrs['a']}")
+            print(df.to_string(index=False))
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+📐 METRICHE PERFORMANCE - Value Stock Finder
+Motore vettoriale: da una matrice prezzi (date x ticker) a una tabella di metriche,
+tutte le colonne in un solo passaggio NumPy.
+"""
+
+import warnings
+import numpy as np
+import pandas as pd
+
+GIORNI_BORSA = 252
+
+COLONNE_METRICHE = [
+    'prezzo_iniziale', 'prezzo_attuale', 'rendimento_totale_perc', 'rendimento_annualizzato_perc',
+    'volatilita_annualizzata', 'max_drawdown_perc', 'sharpe_ratio', 'sortino_ratio', 'beta',
+    'data_primo_prezzo', 'data_ultimo_prezzo', 'n_osservazioni'
+]
+
+COLONNE_CONFRONTO = [
+    'rendimento_perc', 'rendimento_benchmark_perc', 'alpha_perc', 'beta',
+    'tracking_error_perc', 'information_ratio', 'giorni_comuni'
+]
+
+def _riempi_avanti(prezzi, validi):
+    """Forward fill lungo le date: ogni cella prende l'ultimo prezzo valido"""
+    righe = np.where(validi, np.arange(prezzi.shape[0])[:, None], 0)
+    np.maximum.accumulate(righe, axis=0, out=righe)
+    return prezzi[righe, np.arange(prezzi.shape[1])]
+
+def rendimenti_giornalieri(prezzi):
+    """
+    Rendimenti tra osservazioni valide consecutive (come dropna().pct_change()).
+    NaN dove il prezzo manca o non c'è un prezzo precedente.
+    """
+    validi = ~np.isnan(prezzi)
+    riempiti = _riempi_avanti(prezzi, validi)
+    precedenti = np.vstack([np.full((1, prezzi.shape[1]), np.nan), riempiti[:-1]])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rendimenti = prezzi / precedenti - 1
+    rendimenti[~validi] = np.nan
+    return rendimenti
+
+def beta_verso(rendimenti, rendimenti_benchmark):
+    """
+    Beta di ogni colonna verso il benchmark, sui soli giorni in cui entrambi hanno dati.
+    rendimenti_benchmark: una serie (stesso benchmark per tutti) o una matrice con una colonna per colonna.
+    """
+    if rendimenti_benchmark.ndim == 1:
+        rendimenti_benchmark = rendimenti_benchmark[:, None]
+    comuni = ~np.isnan(rendimenti) & ~np.isnan(rendimenti_benchmark)
+    x = np.where(comuni, rendimenti, 0.0)
+    y = np.where(comuni, rendimenti_benchmark, 0.0)
+    n = comuni.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media_x = x.sum(axis=0) / n
+        media_y = y.sum(axis=0) / n
+        covarianza = ((x * y).sum(axis=0) - n * media_x * media_y) / (n - 1)
+        varianza_y = ((y * y).sum(axis=0) - n * media_y ** 2) / (n - 1)
+        return covarianza / varianza_y
+
+def calcola_metriche(prezzi, benchmark=None, risk_free=0.0, min_osservazioni=30):
+    """
+    Metriche per ogni colonna di 'prezzi' (DataFrame date x ticker):
+    rendimento totale/annualizzato, volatilità annualizzata, max drawdown,
+    Sharpe e Sortino annualizzati (risk_free annuo), beta verso la colonna 'benchmark'.
+    Le colonne con meno di min_osservazioni prezzi validi vengono escluse.
+    """
+    valori = prezzi.to_numpy(dtype=float)
+    date = prezzi.index.to_numpy()
+    n_date, n_tickers = valori.shape
+    if n_date == 0 or n_tickers == 0:
+        return pd.DataFrame(columns=COLONNE_METRICHE)
+    colonne = np.arange(n_tickers)
+
+    validi = ~np.isnan(valori)
+    n_osservazioni = validi.sum(axis=0)
+    primo = validi.argmax(axis=0)
+    ultimo = n_date - 1 - validi[::-1].argmax(axis=0)
+
+    prezzo_iniziale = valori[primo, colonne]
+    prezzo_attuale = valori[ultimo, colonne]
+    rendimento_totale = prezzo_attuale / prezzo_iniziale - 1
+
+    anni = (date[ultimo] - date[primo]) / np.timedelta64(1, 'D') / 365.25
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rendimento_annualizzato = np.power(1 + rendimento_totale, 1 / anni) - 1
+
+    # ---- Volatilità, Sharpe, Sortino (annualizzati) ----
+    rendimenti = rendimenti_giornalieri(valori)
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        # Colonne senza dati: nanmean/nanstd avvisano, il NaN risultante va bene
+        warnings.simplefilter('ignore', RuntimeWarning)
+        media_giornaliera = np.nanmean(rendimenti, axis=0)
+        std_giornaliera = np.nanstd(rendimenti, axis=0, ddof=1)
+        volatilita = std_giornaliera * np.sqrt(GIORNI_BORSA)
+
+        eccesso = media_giornaliera * GIORNI_BORSA - risk_free
+        sharpe = eccesso / volatilita
+
+        rf_giornaliero = risk_free / GIORNI_BORSA
+        perdite = np.minimum(rendimenti - rf_giornaliero, 0.0)
+        downside = np.sqrt(np.nanmean(perdite ** 2, axis=0)) * np.sqrt(GIORNI_BORSA)
+        sortino = eccesso / downside
+
+    # ---- Max drawdown (massimo progressivo ignorando i NaN) ----
+    massimi = np.fmax.accumulate(valori, axis=0)
+    with np.errstate(invalid='ignore'):
+        drawdown = np.where(validi, valori / massimi - 1, np.nan)
+    max_drawdown = np.nanmin(np.where(validi.any(axis=0), drawdown, 0.0), axis=0)
+
+    # ---- Beta verso il benchmark ----
+    if benchmark is not None and benchmark in prezzi.columns:
+        beta = beta_verso(rendimenti, rendimenti[:, prezzi.columns.get_loc(benchmark)])
+    else:
+        beta = np.full(n_tickers, np.nan)
+
+    metriche = pd.DataFrame({
+        'prezzo_iniziale': prezzo_iniziale,
+        'prezzo_attuale': prezzo_attuale,
+        'rendimento_totale_perc': rendimento_totale * 100,
+        'rendimento_annualizzato_perc': rendimento_annualizzato * 100,
+        'volatilita_annualizzata': volatilita * 100,
+        'max_drawdown_perc': max_drawdown * 100,
+        'sharpe_ratio': sharpe,
+        'sortino_ratio': sortino,
+        'beta': beta,
+        'data_primo_prezzo': date[primo],
+        'data_ultimo_prezzo': date[ultimo],
+        'n_osservazioni': n_osservazioni
+    }, index=prezzi.columns)
+
+    return metriche[n_osservazioni >= min_osservazioni]
+
+def confronto_benchmark(prezzi, coppie, min_osservazioni=30):
+    """
+    Confronto di ogni coppia (ticker, benchmark) con una sola operazione sulla matrice dei rendimenti:
+    rendimenti calcolati una volta per tutto il panel, poi due matrici allineate (titoli e benchmark
+    di ogni coppia, stesse date) e tutte le metriche in colonna. Solo i giorni in cui entrambi hanno
+    dati entrano nel confronto, quindi titoli con storia più corta non vengono penalizzati.
+    Restituisce un DataFrame indicizzato per (ticker, benchmark).
+    """
+    colonne = {c: i for i, c in enumerate(prezzi.columns)}
+    coppie = [(t, b) for t, b in dict.fromkeys(coppie) if t in colonne and b in colonne]
+    indice = pd.MultiIndex.from_arrays([[t for t, _ in coppie], [b for _, b in coppie]], names=['ticker', 'benchmark'])
+    if not coppie:
+        return pd.DataFrame(columns=COLONNE_CONFRONTO, index=indice)
+
+    rendimenti = rendimenti_giornalieri(prezzi.to_numpy(dtype=float))
+    x = rendimenti[:, [colonne[t] for t, _ in coppie]]
+    y = rendimenti[:, [colonne[b] for _, b in coppie]]
+    comuni = ~np.isnan(x) & ~np.isnan(y)
+    n_comuni = comuni.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        # Rendimento composto sugli stessi giorni: prodotto di (1 + r) come somma di log1p
+        rendimento_titolo = np.expm1(np.log1p(np.where(comuni, x, 0.0)).sum(axis=0))
+        rendimento_benchmark = np.expm1(np.log1p(np.where(comuni, y, 0.0)).sum(axis=0))
+        attivi = np.where(comuni, x - y, np.nan)
+        tracking_error = np.nanstd(attivi, axis=0, ddof=1) * np.sqrt(GIORNI_BORSA)
+        information_ratio = np.nanmean(attivi, axis=0) * GIORNI_BORSA / tracking_error
+        beta = beta_verso(x, y)
+
+    confronto = pd.DataFrame({
+        'rendimento_perc': rendimento_titolo * 100,
+        'rendimento_benchmark_perc': rendimento_benchmark * 100,
+        'alpha_perc': (rendimento_titolo - rendimento_benchmark) * 100,
+        'beta': beta,
+        'tracking_error_perc': tracking_error * 100,
+        'information_ratio': information_ratio,
+        'giorni_comuni': n_comuni
+    }, index=indice)
+    return confronto[n_comuni >= min_osservazioni]
@@ -1,10 +1,18 @@
 print("🎯 IL MIO VALUE STOCK FINDER AVANZATO!")
 print("=" * 50)
 
-import yfinance as yf
-import pandas as pd
-from datetime import datetime
-import time  # 🔥 NUOVO IMPORT per le pause
+from datetime import datetime, timedelta
+import threading
+import json
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from data_provider import get_provider  # 🔥 Provider dati unico (yfinance/replay/synthetic)
+from cache_fondamentali import CacheFondamentali  # 🔥 Cache persistente su disco
+from rate_limiter import TokenBucket  # 🔥 Limite richieste condiviso tra i thread
+from fetch_adattivo import FetchAdattivo, ErroreFetch  # 🔥 Timeout, retry con backoff, single-flight
+from strumentazione import fase, conta, get_metriche  # 🔥 Tempi per fase e latenze per ticker
+from risultati import RisultatoScreening, a_dataframe  # 🔥 Record compatti (__slots__) invece di dict
 
 # ==================== CONFIGURAZIONE CENTRALIZZATA ====================
 
@@ -18,31 +26,136 @@ CONFIG = {
         'risk': 0.2                # Peso del rischio
     },
     'MIN_INVESTMENT_SCORE': 60,    # Punteggio minimo per "ACQUISTA"
-    'PAUSE_EVERY': 10,             # 🔥 PAUSA ogni N azioni
-    'PAUSE_SECONDS': 2             # 🔥 Secondi di pausa
+    'CACHE_PATH': 'data/cache_fondamentali_{provider}.sqlite',  # 🔥 Un file per provider dati
+    'CACHE_TTL': {
+        'prezzo': 5 * 60,          # Prezzo e multipli: 5 minuti
+        'fondamentali': 24 * 3600  # Bilancio, settore, margini: 1 giorno
+    },
+    'CACHE_MAX_TICKERS': 50000,    # Limite dimensione cache (rimuove i meno usati)
+    'SNAPSHOT_MAX_GIORNI': 3650,   # Storia dei fondamentali per il walk-forward (potata solo oltre i 10 anni)
+    'CONCURRENCY': 1,              # 🔥 Thread di screening (1 = modalità seriale classica)
+    'RATE_LIMIT_RPS': 2.0,         # 🔥 Richieste/secondo verso il provider remoto
+    'RATE_LIMIT_BURST': 5,         # 🔥 Richieste consecutive consentite senza attesa
+    'RESCREENING_INCREMENTALE': True, # 🔥 Riusa i risultati se i fondamentali non sono cambiati
+    'FLUSH_OGNI': 500              # 🔥 Salva la cache su disco ogni N ticker (run lunghi)
 }
 
-def analizza_azioni_avanzata():
+def analizza_azioni_avanzata(tickers=None, concorrenza=None):
     """Versione che restituisce i risultati per l'integrazione"""
-    print(f"\n🔍 Analizzando {len(azioni)} azioni...")
+    # 🔥 IMPORTANTE: RESTITUISCE I RISULTATI per l'integrazione
+    return [risultato for _, risultato in analizza_azioni_stream(tickers, concorrenza) if risultato]
+
+def analizza_azioni_stream(tickers=None, concorrenza=None):
+    """
+    🔥 Generatore: restituisce (ticker, risultato) appena ogni ticker è analizzato
+    (risultato None se i dati sono insufficienti), nell'ordine della lista.
+    Nessuna lista accumulata: la memoria resta costante anche con decine di migliaia di ticker.
+    """
+    azioni_da_analizzare = azioni if tickers is None else tickers
+    concorrenza = concorrenza or CONFIG['CONCURRENCY']
+    provider = get_provider()
+
+    print(f"\n🔍 Analizzando {len(azioni_da_analizzare)} azioni...")
     print(f"⚙️  Configurazione: Sconto min {CONFIG['MIN_DISCOUNT']}% | Qualità min {CONFIG['MIN_QUALITY_SCORE']}/5")
-    print(f"⏰ Pause: ogni {CONFIG['PAUSE_EVERY']} azioni per {CONFIG['PAUSE_SECONDS']} secondi")
+    print(f"🔌 Provider dati: {provider.nome}")
+    if provider.remoto:
+        print(f"⏰ Rate limit: {CONFIG['RATE_LIMIT_RPS']} richieste/s (burst {CONFIG['RATE_LIMIT_BURST']}) | {concorrenza} thread")
     print(f"🕐 {datetime.now().strftime('%d/%m/%Y %H:%M')}")
     print("-" * 50)
 
-    risultati = []
-    for i, azione in enumerate(azioni):
-        risultato = analizza_azione_avanzata(azione)
+    cache = get_cache()
+    hit_iniziali, miss_iniziali, parziali_iniziali = cache.stats['hit'], cache.stats['miss'], cache.stats['parziali']
+    STATISTICHE_RESCREENING.update(riusati=0, ricalcolati=0)
+    fetcher = get_fetcher()
+    fetcher.azzera()
+
+    if concorrenza > 1:
+        esiti = _analizza_concorrente(azioni_da_analizzare, concorrenza)
+    else:
+        esiti = _analizza_seriale(azioni_da_analizzare)
+
+    prodotti = 0
+    try:
+        for i, (ticker, risultato) in enumerate(esiti, 1):
+            if risultato:
+                prodotti += 1
+            yield ticker, risultato
+            if i % CONFIG['FLUSH_OGNI'] == 0:
+                cache.flush()  # un'interruzione non perde i risultati già calcolati
+    finally:
+        cache.flush()
+
+    hit = cache.stats['hit'] - hit_iniziali
+    miss = cache.stats['miss'] - miss_iniziali
+    parziali = cache.stats['parziali'] - parziali_iniziali
+    solo_prezzo = f" / {parziali} solo prezzo" if parziali else ""
+    print(f"\n💾 Cache: {hit} hit{solo_prezzo} / {miss} miss ({hit / max(hit + miss + parziali, 1) * 100:.0f}% hit rate)")
+    if CONFIG['RESCREENING_INCREMENTALE']:
+        print(f"♻️  Rescreening: {STATISTICHE_RESCREENING['riusati']} riusati / "
+              f"{STATISTICHE_RESCREENING['ricalcolati']} ricalcolati")
+    statistiche_fetch = fetcher.riepilogo()
+    if statistiche_fetch['fallimenti']:
+        dettaglio = ', '.join(f"{tipo} {n}" for tipo, n in statistiche_fetch['fallimenti_per_tipo'].items())
+        print(f"⚠️  Ticker non analizzati: {statistiche_fetch['fallimenti']} ({dettaglio}) - elenco nel report metriche")
+    if statistiche_fetch['ritentati'] or statistiche_fetch['rallentamenti']:
+        print(f"🔁 Fetch: {statistiche_fetch['ritentati']} retry | {statistiche_fetch['timeout']} timeout | "
+              f"{statistiche_fetch['rallentamenti']} rallentamenti (rate finale {statistiche_fetch['rate_finale']} richieste/s)")
+
+    # 🔥 Statistiche cache/rescreening anche nel report metriche del run
+    get_metriche().extra['screening'] = {
+        'tickers': len(azioni_da_analizzare),
+        'risultati': prodotti,
+        'concorrenza': concorrenza,
+        'provider': provider.nome,
+        'cache_hit': hit,
+        'cache_miss': miss,
+        'cache_solo_prezzo': parziali,
+        'cache_hit_rate_perc': round(hit / max(hit + miss + parziali, 1) * 100, 1),
+        **STATISTICHE_RESCREENING
+    }
+    get_metriche().extra['fetch'] = statistiche_fetch
+    get_metriche().extra['fallimenti'] = [f.to_dict() for f in fetcher.fallimenti]
+
+def ultimi_fallimenti():
+    """Fallimenti strutturati dell'ultimo screening (ticker, operazione, tipo, errore, tentativi, ...)"""
+    return list(get_fetcher().fallimenti)
+
+def _analizza_seriale(azioni_da_analizzare):
+    """
+    Un ticker alla volta (modalità classica). Niente pause fisse: le richieste remote
+    passano comunque dal token bucket del fetcher, che da solo tiene il ritmo consentito.
+    """
+    for azione in azioni_da_analizzare:
+        yield azione, analizza_azione_avanzata(azione)
+
+def _analizza_concorrente(azioni_da_analizzare, concorrenza):
+    """
+    Pool di thread: il ritmo lo decide il token bucket, non i round-trip seriali.
+    Al massimo 4 richieste in volo per thread (memoria costante) e risultati
+    restituiti nello stesso ordine di azioni_da_analizzare.
+    """
+    totale = len(azioni_da_analizzare)
+    in_volo = deque()
+    completati = 0
+
+    def completa():
+        nonlocal completati
+        azione, futuro = in_volo.popleft()
+        risultato = futuro.result()
+        completati += 1
         if risultato:
-            risultati.append(risultato)
-        
-        # 🔥 PAUSA PER EVITARE RATE LIMITING
-        if (i + 1) % CONFIG['PAUSE_EVERY'] == 0 and (i + 1) < len(azioni):
-            print(f"\n⏳ Pausa di {CONFIG['PAUSE_SECONDS']} secondi... ({i+1}/{len(azioni)} azioni completate)")
-            time.sleep(CONFIG['PAUSE_SECONDS'])
-    
-    # 🔥 IMPORTANTE: RESTITUISCE I RISULTATI per l'integrazione
-    return risultati
+            print(f"   ✅ {risultato['ticker']}: sconto {risultato['sconto']:.1f}% | Punteggio: {risultato['investment_score']:.0f}")
+        if completati % 50 == 0:
+            print(f"⏳ {completati}/{totale} azioni completate")
+        return azione, risultato
+
+    with ThreadPoolExecutor(max_workers=concorrenza) as executor:
+        for azione in azioni_da_analizzare:
+            in_volo.append((azione, executor.submit(analizza_azione_avanzata, azione, False)))
+            if len(in_volo) >= concorrenza * 4:
+                yield completa()
+        while in_volo:
+            yield completa()
 
 # ==================== GESTIONE ERRORI AVANZATA ====================
 
@@ -67,29 +180,121 @@ def safe_get(info, key, default=None):
 
 # ==================== CACHING PER PERFORMANCE ====================
 
-stock_cache = {}
+_cache = None
+
+def get_cache():
+    """Cache persistente dei fondamentali (file SQLite in data/, uno per provider)"""
+    global _cache
+    provider = get_provider()
+    path = CONFIG['CACHE_PATH'].format(provider=provider.nome)
+    if _cache is None or _cache.path != path:
+        _cache = CacheFondamentali(path, CONFIG['CACHE_TTL'], CONFIG['CACHE_MAX_TICKERS'],
+                                   CONFIG['SNAPSHOT_MAX_GIORNI'])
+    return _cache
+
+_rate_limiter = None
+
+def get_rate_limiter():
+    """Token bucket condiviso da tutte le richieste di rete dello screening"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucket(CONFIG['RATE_LIMIT_RPS'], CONFIG['RATE_LIMIT_BURST'])
+    return _rate_limiter
+
+_fetcher = None
+
+def get_fetcher():
+    """Fetch adattivo del provider attivo: le richieste remote passano dal rate limiter"""
+    global _fetcher
+    provider = get_provider()
+    if _fetcher is None or _fetcher.remoto != provider.remoto:
+        _fetcher = FetchAdattivo(get_rate_limiter() if provider.remoto else None, remoto=provider.remoto)
+    return _fetcher
+
+def _scarica_info(ticker):
+    """Download dal provider con timeout, retry e richieste concorrenti sullo stesso ticker unite"""
+    with fase('download_info', latenza=True):
+        return get_fetcher().esegui('info', ticker, get_provider().get_info, ticker)
+
+# Campi proporzionali al prezzo (e inversamente proporzionali: rendimento del dividendo)
+CAMPI_SCALATI_PREZZO = ['marketCap', 'trailingPE', 'forwardPE', 'priceToBook']
+
+def _scarica_prezzo(ticker, info):
+    """
+    Solo i campi di prezzo, dalle ultime sedute (richiesta leggera, i fondamentali restano quelli in cache).
+    Capitalizzazione e multipli vengono riscalati sul nuovo prezzo. None se lo storico recente non c'è.
+    """
+    vecchio = info.get('currentPrice') or info.get('regularMarketPrice')
+    fine = datetime.now() + timedelta(days=1)
+    with fase('download_prezzo', latenza=True):
+        storico = get_fetcher().esegui('prezzo', ticker, get_provider().get_history, ticker,
+                                       (fine - timedelta(days=10)).strftime('%Y-%m-%d'), fine.strftime('%Y-%m-%d'))
+    if not vecchio or storico is None or storico.empty:
+        return None
+
+    ultima = storico.iloc[-1]
+    prezzo = float(ultima['Close'])
+    rapporto = prezzo / vecchio
+    campi = {'currentPrice': prezzo, 'regularMarketPrice': prezzo}
+    if len(storico) > 1:
+        campi['previousClose'] = float(storico['Close'].iloc[-2])
+    for campo, colonna in [('open', 'Open'), ('dayLow', 'Low'), ('dayHigh', 'High'),
+                           ('volume', 'Volume'), ('regularMarketVolume', 'Volume')]:
+        valore = float(ultima[colonna]) if colonna in storico.columns else float('nan')
+        if valore == valore:  # NaN: seduta senza quel dato
+            campi[campo] = valore
+    for campo in CAMPI_SCALATI_PREZZO:
+        if info.get(campo) is not None:
+            campi[campo] = info[campo] * rapporto
+    if info.get('dividendYield') is not None:
+        campi['dividendYield'] = info['dividendYield'] / rapporto
+    if info.get('enterpriseValue') is not None and info.get('marketCap') is not None:
+        campi['enterpriseValue'] = info['enterpriseValue'] + campi['marketCap'] - info['marketCap']
+    if info.get('fiftyTwoWeekLow') is not None:
+        campi['fiftyTwoWeekLow'] = min(info['fiftyTwoWeekLow'], prezzo)
+    if info.get('fiftyTwoWeekHigh') is not None:
+        campi['fiftyTwoWeekHigh'] = max(info['fiftyTwoWeekHigh'], prezzo)
+    return campi
 
 def get_cached_stock(ticker):
-    """Ottiene i dati del ticker dalla cache o da Yahoo Finance"""
-    if ticker not in stock_cache:
-        stock_cache[ticker] = yf.Ticker(ticker)
-    return stock_cache[ticker]
+    """Ottiene il dizionario info del ticker dalla cache su disco o dal provider dati"""
+    with fase('get_cached_stock', latenza=True):
+        return get_cache().get(ticker, _scarica_info, _scarica_prezzo)
 
 # ==================== SISTEMA DI SCORING ====================
 
-def calculate_investment_score(analysis):
-    """Calcola un punteggio di investimento 0-100"""
-    # Punteggio Valore (max 50 punti)
-    value_score = min(analysis['sconto'] * 2, 50)  # 1% sconto = 2 punti
+# Sotto-punteggi 0-100 per livello di rischio (pesati da SCORING_WEIGHTS['risk'])
+PUNTEGGI_RISCHIO = {'Basso': 100, 'Medio': 75, 'Alto': 25}
+
+def calculate_investment_score(analysis, pesi=None):
+    """
+    Calcola un punteggio di investimento 0-100: media pesata (CONFIG['SCORING_WEIGHTS'])
+    di tre sotto-punteggi 0-100. Con i pesi di default 0.5/0.3/0.2 = i classici 50/30/20 punti.
+    """
+    pesi = pesi or CONFIG['SCORING_WEIGHTS']
+
+    # Valore: 1% sconto = 4 punti (max 100)
+    value_score = min(analysis['sconto'] * 4, 100)
     
-    # Punteggio Qualità (max 30 punti)
-    quality_score = 30 if analysis['qualita_ok'] else 0
+    # Qualità: tutto o niente
+    quality_score = 100 if analysis['qualita_ok'] else 0
     
-    # Punteggio Rischio (max 20 punti)
-    risk_scores = {'Basso': 20, 'Medio': 15, 'Alto': 5}
-    risk_score = risk_scores.get(analysis['rischio'], 0)
+    # Rischio
+    risk_score = PUNTEGGI_RISCHIO.get(analysis['rischio'], 0)
     
-    return value_score + quality_score + risk_score
+    return pesi['value'] * value_score + pesi['quality'] * quality_score + pesi['risk'] * risk_score
+
+def completa_punteggi(risultati):
+    """
+    Risultati caricati da file pronti per la classifica: sconto/qualita_ok sempre presenti
+    e investment_score ricalcolato dai campi salvati dove manca (CSV più vecchi).
+    """
+    for r in risultati:
+        r.setdefault('sconto', None)
+        r.setdefault('qualita_ok', None)
+        if r.get('investment_score') is None and r['sconto'] is not None and r['qualita_ok'] is not None:
+            r['investment_score'] = calculate_investment_score({'rischio': None, **r})
+    return risultati
 
 def calculate_quality_score(info):
     """Calcola un punteggio di qualità più granulare 0-10"""
@@ -223,18 +428,80 @@ def valuation_settoriale(info, eps, book_val):
     else:
         return (22.5 * eps * book_val) ** 0.5
 
+# ==================== RESCREENING INCREMENTALE ====================
+
+# Campi 'info' da cui dipendono valore intrinseco, qualità e rischio (il prezzo NO)
+CAMPI_FONDAMENTALI = [
+    'trailingEps', 'bookValue', 'sector', 'longName', 'earningsGrowth', 'longTermDebt',
+    'operatingCashflow', 'returnOnEquity', 'profitMargins', 'currentRatio', 'debtToEquity', 'beta'
+]
+
+STATISTICHE_RESCREENING = {'riusati': 0, 'ricalcolati': 0}
+_lock_rescreening = threading.Lock()  # 🔥 In modalità concorrente i contatori sono aggiornati dai thread
+
+def _conta_rescreening(chiave):
+    with _lock_rescreening:
+        STATISTICHE_RESCREENING[chiave] += 1
+
+def digest_fondamentali(info):
+    """Impronta dei fondamentali usati dallo screening (+ soglie CONFIG che cambiano il risultato)"""
+    valori = [safe_get(info, campo) for campo in CAMPI_FONDAMENTALI] + [CONFIG['MIN_QUALITY_SCORE']]
+    return hashlib.sha1(json.dumps(valori, default=str).encode()).hexdigest()
+
+def _riusa_risultato(ticker, digest, info):
+    """Se i fondamentali sono identici all'ultima volta, aggiorna solo prezzo, sconto e punteggio"""
+    precedente = get_cache().risultato_precedente(ticker)
+    prezzo_attuale = safe_get(info, 'currentPrice')
+    if precedente is None or precedente[0] != digest or not prezzo_attuale:
+        return None
+
+    risultato = RisultatoScreening.da_dict(precedente[1])
+    valore_intrinseco = risultato['valore_intrinseco']
+    risultato['prezzo'] = prezzo_attuale
+    risultato['sconto'] = ((valore_intrinseco - prezzo_attuale) / valore_intrinseco) * 100
+    risultato['investment_score'] = calculate_investment_score(risultato)
+    risultato['pe_ratio'] = safe_get(info, 'trailingPE')
+    return risultato
+
 # ==================== FUNZIONE PRINCIPALE MIGLIORATA ====================
 
-def analizza_azione_avanzata(ticker):
+def _muto(*args, **kwargs):
+    """Sostituto di print per la modalità silenziosa"""
+    pass
+
+def _stampa(*args, **kwargs):
+    """print cronometrato: il report metriche mostra quanto tempo va in output a console"""
+    with fase('stampa'):
+        print(*args, **kwargs)
+
+def analizza_azione_avanzata(ticker, verbose=True):
+    """Analisi completa di un ticker (latenza registrata nell'istogramma 'analisi_ticker')"""
+    with fase('analisi_ticker', latenza=True):
+        return _analizza_azione(ticker, verbose)
+
+def _analizza_azione(ticker, verbose):
+    # 🔥 In modalità concorrente le stampe dei thread si mescolerebbero: verbose=False
+    log = _stampa if verbose else _muto
     try:
-        # 🔥 USA CACHING invece di yf.Ticker() diretto
-        stock = get_cached_stock(ticker)
-        info = stock.info
+        # 🔥 USA CACHING + provider invece di yf.Ticker() diretto
+        info = get_cached_stock(ticker)
         
-        print(f"\n📊 {ticker}: {safe_get(info, 'longName', 'N/A')[:30]}...")
-        print(f"   🏭 Settore: {safe_get(info, 'sector', 'N/A')}")
-        print(f"   💰 Prezzo: ${safe_get(info, 'currentPrice', 'N/A')}")
-        print(f"   📈 P/E: {safe_get(info, 'trailingPE', 'N/A')}")
+        nome_breve = safe_get(info, 'longName', 'N/A')[:30]
+
+        # 🔥 RESCREENING INCREMENTALE: fondamentali invariati = solo ricalcolo legato al prezzo
+        digest = digest_fondamentali(info) if CONFIG['RESCREENING_INCREMENTALE'] else None
+        if digest:
+            riusato = _riusa_risultato(ticker, digest, info)
+            if riusato:
+                _conta_rescreening('riusati')
+                log(f"\n♻️  {ticker}: {nome_breve}... fondamentali invariati")
+                log(f"   💰 Prezzo: ${riusato['prezzo']} | SCONTO: {riusato['sconto']:.1f}% | Punteggio: {riusato['investment_score']:.0f}")
+                return riusato
+
+        log(f"\n📊 {ticker}: {nome_breve}...")
+        log(f"   🏭 Settore: {safe_get(info, 'sector', 'N/A')}")
+        log(f"   💰 Prezzo: ${safe_get(info, 'currentPrice', 'N/A')}")
+        log(f"   📈 P/E: {safe_get(info, 'trailingPE', 'N/A')}")
         
         # CALCOLO VALORE INTRINSECO MIGLIORATO
         # 🔥 USA safe_get invece di .get()
@@ -263,42 +530,55 @@ def analizza_azione_avanzata(ticker):
             # 🔥 NUOVO: Calcolo punteggio qualità dettagliato
             quality_score_detailed = calculate_quality_score(info)
             
-            print(f"   🎯 Valore Intrinseco: ${valore_intrinseco:.2f}")
-            print(f"   📊 Punteggio Investimento: {investment_score:.0f}/100")
-            print(f"   🏅 Qualità Dettagliata: {quality_score_detailed}/10")
+            log(f"   🎯 Valore Intrinseco: ${valore_intrinseco:.2f}")
+            log(f"   📊 Punteggio Investimento: {investment_score:.0f}/100")
+            log(f"   🏅 Qualità Dettagliata: {quality_score_detailed}/10")
             
             # 🔥 NUOVO: Output più informativo con punteggio
             if sconto > 0 and qualita_ok:
                 if investment_score >= 80:
-                    print(f"   🔥 SCONTO: {sconto:.1f}% | Punteggio: {investment_score:.0f} | QUALITÀ ECCELLENTE! 🚀")
+                    log(f"   🔥 SCONTO: {sconto:.1f}% | Punteggio: {investment_score:.0f} | QUALITÀ ECCELLENTE! 🚀")
                 else:
-                    print(f"   🔥 SCONTO: {sconto:.1f}% | Punteggio: {investment_score:.0f} | Qualità: ✅ | Rischio: {rischio}")
+                    log(f"   🔥 SCONTO: {sconto:.1f}% | Punteggio: {investment_score:.0f} | Qualità: ✅ | Rischio: {rischio}")
             elif sconto > 0 and not qualita_ok:
-                print(f"   ⚠️  SCONTO: {sconto:.1f}% | Punteggio: {investment_score:.0f} | Qualità: ❌ | Value Trap!")
+                log(f"   ⚠️  SCONTO: {sconto:.1f}% | Punteggio: {investment_score:.0f} | Qualità: ❌ | Value Trap!")
             else:
-                print(f"   ⚠️  SOVRAPREZZO: {abs(sconto):.1f}% | Punteggio: {investment_score:.0f}")
+                log(f"   ⚠️  SOVRAPREZZO: {abs(sconto):.1f}% | Punteggio: {investment_score:.0f}")
                 
-            return {
-                'ticker': ticker,
-                'nome': safe_get(info, 'longName', ''),
-                'settore': safe_get(info, 'sector', ''),
-                'prezzo': prezzo_attuale,
-                'valore_intrinseco': valore_intrinseco,
-                'sconto': sconto,
-                'qualita_ok': qualita_ok,
-                'rischio': rischio,
-                'investment_score': investment_score,
-                'quality_score_detailed': quality_score_detailed,
-                'pe_ratio': safe_get(info, 'trailingPE'),
-                'roe': safe_get(info, 'returnOnEquity'),
-                'debito_equity': safe_get(info, 'debtToEquity')
-            }
+            risultato = RisultatoScreening(
+                ticker=ticker,
+                nome=safe_get(info, 'longName', ''),
+                settore=safe_get(info, 'sector', ''),
+                prezzo=prezzo_attuale,
+                valore_intrinseco=valore_intrinseco,
+                sconto=sconto,
+                qualita_ok=qualita_ok,
+                rischio=rischio,
+                investment_score=investment_score,
+                quality_score_detailed=quality_score_detailed,
+                pe_ratio=safe_get(info, 'trailingPE'),
+                roe=safe_get(info, 'returnOnEquity'),
+                debito_equity=safe_get(info, 'debtToEquity')
+            )
+            _conta_rescreening('ricalcolati')
+            if digest:
+                get_cache().salva_risultato(ticker, digest, risultato.to_dict())
+            return risultato
         else:
-            print(f"   ❌ Dati insufficienti per calcolo")
+            log(f"   ❌ Dati insufficienti per calcolo")
+            conta('dati_insufficienti')
             return None
             
+    except ErroreFetch as e:
+        # Già registrato dal fetch (tipo, tentativi, durata): niente print
+        conta('errori')
+        log(f"   ❌ {ticker}: {e.fallimento.tipo} dopo {e.fallimento.tentativi} tentativi")
+        return None
     except Exception as e:
-        print(f"   ❌ Errore con {ticker}: {str(e)[:50]}...")
+        conta('errori')
+        conta(f'errori_{type(e).__name__}')
+        get_fetcher().registra_fallimento(ticker, 'analisi', e, tipo='permanente')
+        log(f"   ❌ Errore con {ticker}: {str(e)[:50]}...")
         return None
 
 # ==================== LISTA AZIONI COMPLETA (160+) ====================
@@ -391,7 +671,7 @@ if __name__ == "__main__":
 
     # 🔥 NUOVO: SALVATAGGIO MIGLIORATO CON PUNTEGGI
     if risultati:
-        df = pd.DataFrame(risultati)
+        df = a_dataframe(risultati)
         
         # Aggiungi raccomandazione basata su punteggio
         def raccomandazione(row):
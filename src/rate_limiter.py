@@ -0,0 +1,53 @@
+"""
+⏱️ RATE LIMITER - Value Stock Finder
+Token bucket condiviso tra i thread: richieste/secondo + burst
+"""
+
+import time
+import threading
+
+class TokenBucket:
+    """
+    Il secchio si riempie di 'rate' gettoni al secondo fino a 'burst'.
+    Ogni richiesta di rete consuma un gettone; se il secchio è vuoto si aspetta.
+    """
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("Il rate deve essere positivo")
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self._gettoni = self.burst
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _ricarica(self):
+        adesso = time.monotonic()
+        self._gettoni = min(self.burst, self._gettoni + (adesso - self._ultimo) * self.rate)
+        self._ultimo = adesso
+
+    def acquire(self, gettoni=1):
+        """Blocca finché non ci sono gettoni disponibili, poi li consuma"""
+        while True:
+            with self._lock:
+                self._ricarica()
+                if self._gettoni >= gettoni:
+                    self._gettoni -= gettoni
+                    return
+                attesa = (gettoni - self._gettoni) / self.rate
+            time.sleep(attesa)
+
+    def prova(self, gettoni=1):
+        """Come acquire ma senza attendere: False se il secchio è vuoto"""
+        with self._lock:
+            self._ricarica()
+            if self._gettoni >= gettoni:
+                self._gettoni -= gettoni
+                return True
+            return False
+
+    def set_rate(self, rate):
+        """Cambia il rate al volo (es. rallentamento quando Yahoo limita)"""
+        with self._lock:
+            self._ricarica()
+            self.rate = float(rate)
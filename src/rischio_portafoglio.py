@@ -0,0 +1,351 @@
+"""
+🧯 RISCHIO PORTAFOGLIO - Value Stock Finder
+Rischio dell'insieme di opportunità, non del singolo titolo:
+- matrice di covarianza dei rendimenti con shrinkage di Ledoit-Wolf (verso la varianza media)
+- volatilità di portafoglio, VaR ed Expected Shortfall storici e parametrici, contributi al rischio
+- cluster di correlazione e classifica senza doppioni (es. otto banche quasi identiche = un cluster)
+
+La matrice N x N non viene mai costruita per intero: le quantità che servono (norma di Frobenius
+per lo shrinkage, prodotti Σw, correlazioni con i leader dei cluster) si calcolano a blocchi di
+colonne. Memoria ~ giorni x titoli + blocco x titoli; 3.000 titoli x 2 anni: pochi secondi.
+
+    python src/rischio_portafoglio.py --file outputs/archive/analisi_avanzata_20251029_0934.csv
+    python src/rischio_portafoglio.py --file ... --tutti --soglia 0.6 --top 15
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from statistics import NormalDist
+from backtester import scarica_panel_prezzi
+from metriche_performance import GIORNI_BORSA, rendimenti_giornalieri
+from simulatore_portafoglio import opportunita_classificate
+from strumentazione import fase
+
+RISCHIO_CONFIG = {
+    'ANNI': 2,                       # Storia usata per covarianza e VaR
+    'MIN_OSSERVAZIONI': 120,         # Titoli con meno rendimenti validi vengono esclusi
+    'BLOCCO': 512,                   # Colonne per blocco (memoria ~ BLOCCO x titoli)
+    'LIVELLI_VAR': [0.95, 0.99],
+    'PESI': 'uguale',                # 'uguale' o 'punteggio'
+    'SOGLIA_CORRELAZIONE': 0.7,      # Correlazione minima per finire nello stesso cluster
+    'MAX_PER_CLUSTER': 1,            # Titoli tenuti per cluster nella classifica senza doppioni
+    'BENCHMARK': '^GSPC',
+    'CARTELLA': 'outputs/reports'
+}
+
+# ==================== RENDIMENTI E SHRINKAGE ====================
+
+def matrice_rendimenti(panel, tickers, min_osservazioni=None):
+    """
+    Rendimenti giornalieri centrati (giorni x titoli, float64); i giorni mancanti valgono 0
+    (= rendimento medio) così non servono covarianze a coppie. Restituisce (X, medie, tickers tenuti).
+    """
+    min_osservazioni = RISCHIO_CONFIG['MIN_OSSERVAZIONI'] if min_osservazioni is None else min_osservazioni
+    rendimenti = rendimenti_giornalieri(panel.reindex(columns=tickers).to_numpy(dtype=float))[1:]
+    validi = ~np.isnan(rendimenti)
+    tenuti = validi.sum(axis=0) >= min_osservazioni
+    rendimenti, validi = rendimenti[:, tenuti], validi[:, tenuti]
+
+    medie = np.where(validi, rendimenti, 0.0).sum(axis=0) / validi.sum(axis=0)
+    centrati = np.where(validi, rendimenti - medie, 0.0)
+    return centrati, medie, [t for t, tenuto in zip(tickers, tenuti) if tenuto]
+
+def _norma_covarianza_quadra(X, blocco):
+    """
+    ||S||_F^2 con S = X'X/n, a blocchi. Se i giorni sono meno dei titoli conviene la matrice
+    di Gram giorni x giorni (stessa norma: ||X'X|| = ||XX'||), accumulata un blocco di colonne alla volta.
+    """
+    n, p = X.shape
+    if n <= p:
+        gram = np.zeros((n, n))
+        for i in range(0, p, blocco):
+            gram += X[:, i:i + blocco] @ X[:, i:i + blocco].T
+        return float((gram * gram).sum()) / n ** 2
+
+    totale = 0.0
+    for i in range(0, p, blocco):
+        xi = X[:, i:i + blocco]
+        for j in range(i, p, blocco):
+            s = xi.T @ X[:, j:j + blocco] / n
+            totale += (1.0 if i == j else 2.0) * float((s * s).sum())
+    return totale
+
+def shrinkage_ledoit_wolf(X, blocco=None):
+    """
+    Intensità di shrinkage di Ledoit-Wolf verso mu*I (mu = varianza media):
+    Σ = delta * mu * I + (1 - delta) * S. Restituisce (delta, mu, varianze campionarie).
+    """
+    blocco = blocco or RISCHIO_CONFIG['BLOCCO']
+    n, p = X.shape
+    varianze = (X * X).sum(axis=0) / n
+    mu = float(varianze.mean())
+    norma_s = _norma_covarianza_quadra(X, blocco)
+
+    d2 = norma_s - p * mu ** 2                                   # distanza di S dal target
+    b2_campione = (float(((X * X).sum(axis=1) ** 2).sum()) / n - norma_s) / n  # rumore di stima di S
+    b2 = min(max(b2_campione, 0.0), d2)
+    delta = b2 / d2 if d2 > 0 else 1.0
+    return delta, mu, varianze
+
+def covarianza_shrinkage(X, blocco=None):
+    """Matrice completa (titoli x titoli) costruita a blocchi: da usare solo quando serve davvero"""
+    blocco = blocco or RISCHIO_CONFIG['BLOCCO']
+    n, p = X.shape
+    delta, mu, _ = shrinkage_ledoit_wolf(X, blocco)
+    covarianza = np.empty((p, p))
+    for i in range(0, p, blocco):
+        covarianza[i:i + blocco] = (1 - delta) * (X[:, i:i + blocco].T @ X) / n
+    covarianza[np.diag_indices(p)] += delta * mu
+    return covarianza
+
+def covarianza_per_pesi(X, pesi, delta, mu):
+    """Σw senza costruire Σ: delta*mu*w + (1-delta) * X'(Xw)/n"""
+    return delta * mu * pesi + (1 - delta) * (X.T @ (X @ pesi)) / X.shape[0]
+
+# ==================== VOLATILITÀ, VAR, ES ====================
+
+def pesi_portafoglio(metodo, punteggi):
+    """Pesi che sommano a 1: uguali o proporzionali al punteggio"""
+    if metodo == 'punteggio' and punteggi is not None and np.nansum(punteggi) > 0:
+        pesi = np.nan_to_num(np.asarray(punteggi, dtype=float)).clip(min=0)
+    else:
+        pesi = np.ones(len(punteggi))
+    return pesi / pesi.sum()
+
+def rischio_portafoglio(X, medie, pesi, delta, mu, livelli=None):
+    """Volatilità (shrinkage), VaR/ES storici sulla serie del portafoglio e parametrici (normale)"""
+    livelli = livelli or RISCHIO_CONFIG['LIVELLI_VAR']
+    media = float(medie @ pesi)
+    serie = X @ pesi + media
+    sigma_w = covarianza_per_pesi(X, pesi, delta, mu)
+    varianza = float(pesi @ sigma_w)
+    sigma = np.sqrt(varianza)
+    normale = NormalDist()
+
+    risultato = {
+        'volatilita_giornaliera_perc': sigma * 100,
+        'volatilita_annualizzata_perc': sigma * np.sqrt(GIORNI_BORSA) * 100,
+        'volatilita_campionaria_annualizzata_perc': float(np.sqrt((serie - media) @ (serie - media) / len(serie) * GIORNI_BORSA) * 100)
+    }
+    ordinata = np.sort(serie)
+    for livello in livelli:
+        etichetta = f"{livello * 100:g}"
+        quantile = np.quantile(serie, 1 - livello)
+        coda = ordinata[:max(int(np.ceil(len(serie) * (1 - livello))), 1)]
+        z = normale.inv_cdf(livello)
+        risultato[f'var_storico_{etichetta}_perc'] = -quantile * 100
+        risultato[f'es_storico_{etichetta}_perc'] = -float(coda.mean()) * 100
+        risultato[f'var_parametrico_{etichetta}_perc'] = (z * sigma - media) * 100
+        risultato[f'es_parametrico_{etichetta}_perc'] = (sigma * normale.pdf(z) / (1 - livello) - media) * 100
+
+    # Quota del rischio totale dovuta a ogni titolo (somma = 100%)
+    risultato['contributi_rischio_perc'] = pesi * sigma_w / varianza * 100 if varianza > 0 else np.zeros_like(pesi)
+    return risultato
+
+# ==================== CLUSTER DI CORRELAZIONE ====================
+
+def cluster_correlazione(X, soglia=None, blocco=None):
+    """
+    Cluster 'a leader' nell'ordine delle colonne (la classifica): ogni titolo entra nel cluster
+    del leader precedente più correlato se la correlazione supera 'soglia', altrimenti diventa
+    leader di un nuovo cluster. Le correlazioni si calcolano solo verso i leader, un blocco alla volta.
+    Restituisce etichette (indice di colonna del leader per ogni titolo).
+    """
+    soglia = RISCHIO_CONFIG['SOGLIA_CORRELAZIONE'] if soglia is None else soglia
+    blocco = blocco or RISCHIO_CONFIG['BLOCCO']
+    n, p = X.shape
+    deviazioni = np.sqrt((X * X).sum(axis=0) / n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        Z = np.where(deviazioni > 0, X / deviazioni, 0.0)
+
+    etichette = np.full(p, -1)
+    leader = np.empty(0, dtype=int)
+    for inizio in range(0, p, blocco):
+        indici = np.arange(inizio, min(inizio + blocco, p))
+        zb = Z[:, indici]
+        # Leader dei blocchi precedenti: un prodotto matrice per tutto il blocco
+        if len(leader):
+            verso_leader = zb.T @ Z[:, leader] / n
+            migliore = verso_leader.argmax(axis=1)
+            massimo_precedenti = verso_leader[np.arange(len(indici)), migliore]
+            leader_precedente = leader[migliore]
+        else:
+            massimo_precedenti = np.full(len(indici), -np.inf)
+            leader_precedente = np.full(len(indici), -1)
+
+        # Leader nati dentro il blocco: piccolo ciclo sulla matrice blocco x blocco
+        interne = zb.T @ zb / n
+        nuovi = []
+        for k, colonna in enumerate(indici):
+            correlazione, scelto = massimo_precedenti[k], leader_precedente[k]
+            if nuovi:
+                candidati = interne[k, nuovi]
+                m = int(candidati.argmax())
+                if candidati[m] > correlazione:
+                    correlazione, scelto = candidati[m], indici[nuovi[m]]
+            if correlazione >= soglia:
+                etichette[colonna] = scelto
+            else:
+                etichette[colonna] = colonna
+                nuovi.append(k)
+        leader = np.concatenate([leader, indici[nuovi]])
+    return etichette
+
+def deduplica_classifica(opportunita, cluster_di, max_per_cluster=None):
+    """
+    Classifica senza doppioni: al massimo max_per_cluster titoli per cluster, nell'ordine dato.
+    cluster_di: ticker -> ticker leader del cluster (i titoli senza prezzi restano, ognuno da solo).
+    Restituisce (tenute, scartate) con 'cluster' = leader del gruppo per le scartate.
+    """
+    max_per_cluster = max_per_cluster or RISCHIO_CONFIG['MAX_PER_CLUSTER']
+    presenze = {}
+    tenute, scartate = [], []
+    for opp in opportunita:
+        cluster = cluster_di.get(opp['ticker'], opp['ticker'])
+        presenze[cluster] = presenze.get(cluster, 0) + 1
+        if presenze[cluster] <= max_per_cluster:
+            tenute.append(opp)
+        else:
+            scartate.append({'ticker': opp['ticker'], 'cluster': cluster})
+    return tenute, scartate
+
+# ==================== ANALISI COMPLETA ====================
+
+def analizza_rischio_panel(panel, tickers, punteggi=None, pesi=None, soglia=None, blocco=None):
+    """
+    Rischio dell'insieme 'tickers' (già in ordine di classifica) sul panel prezzi.
+    Restituisce un dizionario con riepilogo, contributi, cluster e mappa ticker -> leader.
+    """
+    pesi = pesi or RISCHIO_CONFIG['PESI']
+    blocco = blocco or RISCHIO_CONFIG['BLOCCO']
+    with fase('rischio_rendimenti'):
+        X, medie, tenuti = matrice_rendimenti(panel, tickers)
+    if len(tenuti) < 2:
+        print(f"❌ Storia prezzi sufficiente solo per {len(tenuti)} titoli")
+        return None
+
+    punteggi_tenuti = None
+    if punteggi is not None:
+        per_ticker = dict(zip(tickers, punteggi))
+        punteggi_tenuti = np.array([per_ticker[t] for t in tenuti], dtype=float)
+    w = pesi_portafoglio(pesi, punteggi_tenuti if punteggi_tenuti is not None else np.ones(len(tenuti)))
+
+    with fase('rischio_covarianza'):
+        delta, mu, _ = shrinkage_ledoit_wolf(X, blocco)
+        rischio = rischio_portafoglio(X, medie, w, delta, mu)
+    with fase('rischio_cluster'):
+        etichette = cluster_correlazione(X, soglia, blocco)
+
+    cluster_di = {t: tenuti[e] for t, e in zip(tenuti, etichette)}
+    gruppi = {}
+    for t, e in zip(tenuti, etichette):
+        gruppi.setdefault(tenuti[e], []).append(t)
+    cluster = sorted(({'leader': l, 'titoli': m, 'dimensione': len(m)} for l, m in gruppi.items() if len(m) > 1),
+                     key=lambda c: -c['dimensione'])
+
+    contributi = pd.Series(rischio.pop('contributi_rischio_perc'), index=tenuti).sort_values(ascending=False)
+    riepilogo = {
+        'titoli': len(tenuti),
+        'esclusi_storia_corta': len(tickers) - len(tenuti),
+        'giorni': X.shape[0],
+        'data_inizio': panel.index[0].strftime('%Y-%m-%d'),
+        'data_fine': panel.index[-1].strftime('%Y-%m-%d'),
+        'pesi': pesi,
+        'shrinkage': round(delta, 4),
+        **{k: round(float(v), 3) for k, v in rischio.items()},
+        'cluster': len(gruppi),
+        'cluster_con_piu_titoli': len(cluster),
+        'soglia_correlazione': RISCHIO_CONFIG['SOGLIA_CORRELAZIONE'] if soglia is None else soglia
+    }
+    return {
+        'riepilogo': riepilogo,
+        'contributi_rischio_perc': contributi.round(3),
+        'cluster': cluster,
+        'cluster_di': cluster_di
+    }
+
+def analizza_rischio_opportunita(risultati, anni=None, pesi=None, soglia=None, tutti=False):
+    """Classifica dello screener (opportunità o intero universo) -> prezzi in un download batch -> rischio"""
+    anni = anni or RISCHIO_CONFIG['ANNI']
+    if tutti:
+        classifica = sorted((r for r in risultati if r.get('investment_score') is not None),
+                            key=lambda r: -r['investment_score'])
+    else:
+        classifica = opportunita_classificate(risultati)
+    if len(classifica) < 2:
+        print("❌ Servono almeno due titoli per il rischio di portafoglio")
+        return None
+
+    tickers = [r['ticker'] for r in classifica]
+    print(f"\n🧯 RISCHIO PORTAFOGLIO: {len(tickers)} titoli | {anni} anni di storia")
+    panel, _, _ = scarica_panel_prezzi(tickers, anni, RISCHIO_CONFIG['BENCHMARK'])
+    analisi = analizza_rischio_panel(panel, tickers, [r['investment_score'] for r in classifica], pesi, soglia)
+    if analisi:
+        analisi['classifica'] = classifica
+    return analisi
+
+def mostra_rischio(analisi, top=15):
+    r = analisi['riepilogo']
+    print(f"\n📉 RISCHIO ({r['data_inizio']} → {r['data_fine']}, {r['titoli']} titoli, pesi {r['pesi']}, shrinkage {r['shrinkage']:.2f})")
+    print(f"   📊 Volatilità annua: {r['volatilita_annualizzata_perc']:.1f}% (campionaria {r['volatilita_campionaria_annualizzata_perc']:.1f}%)")
+    for livello in RISCHIO_CONFIG['LIVELLI_VAR']:
+        e = f"{livello * 100:g}"
+        print(f"   🎯 1 giorno {e}%: VaR storico {r[f'var_storico_{e}_perc']:.2f}% | ES storico {r[f'es_storico_{e}_perc']:.2f}% | "
+              f"VaR parametrico {r[f'var_parametrico_{e}_perc']:.2f}% | ES parametrico {r[f'es_parametrico_{e}_perc']:.2f}%")
+
+    print(f"\n🔥 Maggiori contributi al rischio:")
+    for ticker, quota in analisi['contributi_rischio_perc'].head(5).items():
+        print(f"   {ticker}: {quota:.1f}%")
+
+    print(f"\n🧩 Cluster (correlazione ≥ {r['soglia_correlazione']}): {r['cluster']} gruppi, {r['cluster_con_piu_titoli']} con più titoli")
+    for c in analisi['cluster'][:5]:
+        print(f"   {c['leader']} + {c['dimensione'] - 1}: {', '.join(c['titoli'][1:8])}{' ...' if c['dimensione'] > 8 else ''}")
+
+    if 'classifica' in analisi:
+        tenute, scartate = deduplica_classifica(analisi['classifica'], analisi['cluster_di'])
+        print(f"\n🏆 TOP {top} SENZA DOPPIONI ({len(scartate)} titoli scartati perché nello stesso cluster):")
+        for i, opp in enumerate(tenute[:top], 1):
+            print(f"{i}. {opp['ticker']}: {opp['sconto']:.1f}% sconto | Punteggio {opp['investment_score']:.0f} | {opp.get('settore') or ''}")
+
+def salva_rischio(analisi, nome=None):
+    """Riepilogo, contributi e cluster in JSON (outputs/reports/)"""
+    cartella = RISCHIO_CONFIG['CARTELLA']
+    os.makedirs(cartella, exist_ok=True)
+    path = os.path.join(cartella, (nome or f"rischio_{datetime.now().strftime('%Y%m%d_%H%M')}") + '.json')
+    with open(path, 'w') as f:
+        json.dump({
+            **analisi['riepilogo'],
+            'contributi_rischio_perc': analisi['contributi_rischio_perc'].to_dict(),
+            'cluster': analisi['cluster']
+        }, f, indent=2)
+    print(f"💾 Analisi del rischio salvata in: {path}")
+    return path
+
+# ==================== CLI ====================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rischio di portafoglio e cluster di correlazione delle opportunità")
+    parser.add_argument('--file', help="Screening salvato (JSON/NDJSON/CSV/Parquet); senza: screening completo")
+    parser.add_argument('--tutti', action='store_true', help="Tutto l'universo con punteggio, non solo le opportunità")
+    parser.add_argument('--anni', type=float, default=RISCHIO_CONFIG['ANNI'])
+    parser.add_argument('--pesi', default=RISCHIO_CONFIG['PESI'], choices=['uguale', 'punteggio'])
+    parser.add_argument('--soglia', type=float, default=RISCHIO_CONFIG['SOGLIA_CORRELAZIONE'])
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    if args.file:
+        from universi import carica_risultati
+        from mio_stock_finder import completa_punteggi
+        risultati = completa_punteggi(carica_risultati(args.file))
+    else:
+        from mio_stock_finder import analizza_azioni_avanzata
+        risultati = analizza_azioni_avanzata()
+
+    analisi = analizza_rischio_opportunita(risultati, args.anni, args.pesi, args.soglia, args.tutti)
+    if analisi:
+        mostra_rischio(analisi, args.top)
+        salva_rischio(analisi)
@@ -0,0 +1,181 @@
+"""
+🧾 RISULTATI - Value Stock Finder
+Record compatti e tipizzati per i risultati di screening e backtest.
+
+- RisultatoScreening / RisultatoBacktest: dataclass con __slots__ (niente __dict__ per ogni ticker),
+  leggibili come dizionari (r['sconto'], r.get(...), {**r}) per i consumatori esistenti
+- tabella_screening(): array NumPy strutturato (una riga per ticker, colonne a tipo fisso)
+  per universi enormi, ordinamenti e filtri vettoriali
+- a_dataframe() / per_json(): conversioni verso pandas e JSON
+
+Memoria misurata su 100k risultati di screening (python src/benchmark_suite.py):
+lista di dict ~66 MB, record con __slots__ ~35 MB (-47%), array strutturato ~14 MB (-79%).
+"""
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, fields, asdict
+
+class ComeDizionario:
+    """
+    Accesso stile dict sui campi del record (None = campo non valorizzato).
+    Base pubblica per i record con __slots__ anche fuori da questo modulo (es. Fallimento, StatoTicker).
+    """
+    __slots__ = ()
+
+    def __getitem__(self, campo):
+        try:
+            return getattr(self, campo)
+        except AttributeError:
+            raise KeyError(campo)
+
+    def __setitem__(self, campo, valore):
+        if campo not in self.campi():
+            raise KeyError(f"{type(self).__name__} non ha il campo '{campo}'")
+        setattr(self, campo, valore)
+
+    def __contains__(self, campo):
+        # Come il dict di to_dict(): ogni campo dichiarato è presente, anche se vale None.
+        # Per sapere se un campo è valorizzato: r.get(campo) is not None
+        return campo in self.campi()
+
+    def get(self, campo, default=None):
+        # Semantica dict: il default vale solo per i campi che il record non ha, non per i None
+        return getattr(self, campo, default)
+
+    def keys(self):
+        return self.campi()
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def campi(cls):
+        return [f.name for f in fields(cls)]
+
+    @classmethod
+    def da_dict(cls, dati):
+        """Costruisce il record da un dizionario (le chiavi che non sono campi del record vengono ignorate)"""
+        return cls(**{campo: dati[campo] for campo in cls.campi() if campo in dati})
+
+@dataclass(slots=True)
+class RisultatoScreening(ComeDizionario):
+    ticker: str
+    nome: str = ''
+    settore: str = ''
+    prezzo: float = None
+    valore_intrinseco: float = None
+    sconto: float = None
+    qualita_ok: bool = False
+    rischio: str = None
+    investment_score: float = None
+    quality_score_detailed: int = None
+    pe_ratio: float = None
+    roe: float = None
+    debito_equity: float = None
+
+@dataclass(slots=True)
+class RisultatoBacktest(ComeDizionario):
+    """Dati dello screening + performance storica + confronto con l'S&P500 e con l'ETF del settore"""
+    ticker: str
+    nome: str = ''
+    settore: str = ''
+    prezzo: float = None
+    valore_intrinseco: float = None
+    sconto: float = None
+    qualita_ok: bool = None
+    rischio: str = None
+    investment_score: float = None
+    quality_score_detailed: int = None
+    pe_ratio: float = None
+    roe: float = None
+    debito_equity: float = None
+    raccomandazione: str = None       # Presente negli screening CSV (analisi_avanzata_*.csv)
+    valore_graham: float = None       # Idem (CSV più vecchi)
+    periodo_analisi_anni: int = None
+    prezzo_iniziale: float = None
+    prezzo_attuale: float = None
+    rendimento_totale_perc: float = None
+    rendimento_annualizzato_perc: float = None
+    volatilita_annualizzata: float = None
+    max_drawdown_perc: float = None
+    sharpe_ratio: float = None
+    sortino_ratio: float = None
+    beta: float = None
+    data_inizio: str = None
+    data_fine: str = None
+    rendimento_sp500_perc: float = None
+    alpha_perc: float = None
+    battuto_sp500: bool = None
+    performance_relativa: str = None
+    tracking_error_sp500_perc: float = None
+    benchmark_settore: str = None
+    rendimento_settore_perc: float = None
+    alpha_settore_perc: float = None
+    beta_settore: float = None
+    tracking_error_settore_perc: float = None
+    battuto_settore: bool = None
+
+    @classmethod
+    def da_screening(cls, opportunita, performance):
+        """Combina dati dello screening e del backtest (stessa precedenza di {**opp, **performance})"""
+        return cls.da_dict({**opportunita, **performance})
+
+# ==================== CONVERSIONI ====================
+
+def per_json(oggetto):
+    """Da usare come json.dump(..., default=per_json): i record diventano dizionari"""
+    if isinstance(oggetto, ComeDizionario):
+        return oggetto.to_dict()
+    if isinstance(oggetto, np.generic):
+        return oggetto.item()
+    return str(oggetto)
+
+def a_dizionari(risultati):
+    """Lista di dizionari (record, dizionari o righe di un array strutturato)"""
+    if isinstance(risultati, np.ndarray):
+        return a_dataframe(risultati).astype(object).where(lambda df: df.notna(), None).to_dict('records')
+    return [r.to_dict() if isinstance(r, ComeDizionario) else dict(r) for r in risultati]
+
+def a_dataframe(risultati):
+    """DataFrame da record, dizionari o array strutturato"""
+    if isinstance(risultati, np.ndarray):
+        df = pd.DataFrame(risultati)
+        for colonna, tipo in risultati.dtype.fields.items():
+            if tipo[0].kind == 'S':
+                df[colonna] = df[colonna].str.decode('utf-8', errors='ignore')
+        return df
+    return pd.DataFrame(a_dizionari(risultati))
+
+# ==================== ARRAY STRUTTURATO ====================
+
+# Testi come byte UTF-8 a lunghezza fissa (1 byte per carattere ASCII invece dei 4 di 'U')
+DTYPE_SCREENING = np.dtype([
+    ('ticker', 'S12'),
+    ('nome', 'S48'),           # nomi più lunghi vengono troncati
+    ('settore', 'S24'),
+    ('prezzo', 'f8'),
+    ('valore_intrinseco', 'f8'),
+    ('sconto', 'f8'),
+    ('qualita_ok', '?'),
+    ('rischio', 'S5'),
+    ('investment_score', 'f8'),
+    ('quality_score_detailed', 'i1'),
+    ('pe_ratio', 'f8'),
+    ('roe', 'f8'),
+    ('debito_equity', 'f8')
+])
+
+def tabella_screening(risultati):
+    """Risultati di screening -> array strutturato (None -> NaN per i float, '' per i testi)"""
+    tabella = np.zeros(len(risultati), dtype=DTYPE_SCREENING)
+    for campo in DTYPE_SCREENING.names:
+        tipo = DTYPE_SCREENING[campo]
+        valori = [r[campo] for r in risultati]
+        if tipo.kind == 'f':
+            tabella[campo] = [np.nan if v is None else v for v in valori]
+        elif tipo.kind == 'S':
+            tabella[campo] = [b'' if v is None else str(v).encode('utf-8')[:tipo.itemsize] for v in valori]
+        else:
+            tabella[campo] = [v or 0 for v in valori]
+    return tabella
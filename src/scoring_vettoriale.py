@@ -0,0 +1,193 @@
+"""
+⚡ SCORING VETTORIALE - Value Stock Finder
+Valuation, qualità, rischio e punteggio per TUTTO l'universo in un solo passaggio NumPy/pandas.
+Stesse regole (e stessi risultati) di analizza_azione_avanzata, ma su una tabella colonnare.
+"""
+
+import numpy as np
+import pandas as pd
+from mio_stock_finder import CONFIG, PUNTEGGI_RISCHIO, azioni, get_cached_stock
+
+# Campi numerici letti da 'info' e valore di default se la chiave manca (come in safe_get)
+CAMPI_NUMERICI = {
+    'currentPrice': None,
+    'trailingEps': None,
+    'bookValue': None,
+    'trailingPE': None,
+    'earningsGrowth': 0,
+    'longTermDebt': 0,
+    'operatingCashflow': 0,
+    'returnOnEquity': 0,
+    'profitMargins': 0,
+    'debtToEquity': 0,
+    'currentRatio': 0,
+    'beta': 1
+}
+
+# Nella versione per-ticker questi campi a None fanno fallire il confronto (TypeError)
+# e il ticker viene scartato: qui lo segnaliamo con una colonna di flag
+CAMPI_RIGIDI = ['returnOnEquity', 'profitMargins', 'debtToEquity', 'operatingCashflow', 'currentRatio', 'beta']
+
+COLONNE_RISULTATO = [
+    'ticker', 'nome', 'settore', 'prezzo', 'valore_intrinseco', 'sconto', 'qualita_ok',
+    'rischio', 'investment_score', 'quality_score_detailed', 'pe_ratio', 'roe', 'debito_equity'
+]
+
+# ==================== TABELLA FONDAMENTALI ====================
+
+def costruisci_tabella(infos):
+    """
+    Converte {ticker: info} in una tabella colonnare (una riga per ticker).
+    Le colonne numeriche contengono NaN per i dati mancanti; i flag _nullo_* ricordano
+    i campi presenti ma a None, che nella versione per-ticker causano errori.
+    """
+    tickers = list(infos)
+    righe = [infos[t] for t in tickers]
+
+    tabella = pd.DataFrame.from_records(righe, columns=list(CAMPI_NUMERICI) + ['sector', 'longName'])
+    for campo in CAMPI_NUMERICI:
+        tabella[campo] = pd.to_numeric(tabella[campo], errors='coerce').astype(float)
+    tabella.index = pd.Index(tickers, name='ticker')
+
+    tabella['_nullo_rigido'] = [any(info.get(c, 0) is None for c in CAMPI_RIGIDI) for info in righe]
+    tabella['_nullo_debito'] = [info.get('longTermDebt', 0) is None for info in righe]
+    tabella['_nullo_nome'] = [info.get('longName', '') is None for info in righe]
+    tabella['_settore_presente'] = ['sector' in info for info in righe]
+    return tabella
+
+def carica_tabella(tickers=None):
+    """Tabella fondamentali dell'universo letta dalla cache (o dal provider se scaduta)"""
+    tickers = azioni if tickers is None else tickers
+    infos = {}
+    for ticker in tickers:
+        try:
+            infos[ticker] = get_cached_stock(ticker)
+        except Exception as e:
+            print(f"   ❌ Errore con {ticker}: {str(e)[:50]}...")
+    return costruisci_tabella(infos)
+
+def _colonna(tabella, campo):
+    """Colonna numerica con il default di safe_get al posto dei dati mancanti"""
+    default = CAMPI_NUMERICI[campo]
+    valori = tabella[campo].to_numpy()
+    return valori if default is None else np.where(np.isnan(valori), default, valori)
+
+# ==================== SCORING VETTORIALE ====================
+
+def calcola_punteggi(tabella, config=None):
+    """
+    Valore intrinseco, sconto, qualità, rischio e punteggi di tutte le righe in un passaggio.
+    Restituisce solo i ticker validi (come analizza_azione_avanzata), nello stesso ordine.
+    """
+    config = config or CONFIG
+
+    eps = tabella['trailingEps'].to_numpy()
+    book_val = tabella['bookValue'].to_numpy()
+    prezzo = tabella['currentPrice'].to_numpy()
+    # I settori distinti sono pochi: il matching delle stringhe si fa una volta per settore
+    settore = np.where(tabella['_settore_presente'], tabella['sector'].astype(str).str.lower(), '')
+    codici, settori_unici = pd.factorize(settore)
+    settori_unici = pd.Series(settori_unici)
+
+    def settore_contiene(pattern):
+        return settori_unici.str.contains(pattern).to_numpy()[codici]
+
+    # ---- Valuation settoriale ----
+    growth = np.minimum(_colonna(tabella, 'earningsGrowth'), 0.15)
+    tech_health = settore_contiene('technology|healthcare')
+    finanziarie = settore_contiene('financial') & ~tech_health
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        graham = np.power(22.5 * eps * book_val, 0.5)
+        valore_intrinseco = np.select(
+            [tech_health, finanziarie],
+            [graham * (1 + growth), book_val * 1.2],
+            graham
+        )
+        sconto = ((valore_intrinseco - prezzo) / valore_intrinseco) * 100
+
+    # ---- Controllo qualità (check_quality_metrics) ----
+    debito_lungo = _colonna(tabella, 'longTermDebt')
+    cash_flow = _colonna(tabella, 'operatingCashflow')
+    roe = _colonna(tabella, 'returnOnEquity')
+    margini = _colonna(tabella, 'profitMargins')
+    current_ratio = _colonna(tabella, 'currentRatio')
+    debt_to_equity = _colonna(tabella, 'debtToEquity')
+
+    punteggio = (
+        (((debito_lungo < cash_flow * 3) & (debito_lungo > 0)) | (debito_lungo == 0)).astype(int)
+        + (cash_flow > 0)
+        + (roe > 0.08)
+        + (margini > 0.05)
+        + (current_ratio > 1)
+    )
+    qualita_ok = (punteggio >= config['MIN_QUALITY_SCORE']) & ~tabella['_nullo_debito'].to_numpy()
+
+    # ---- Punteggio qualità dettagliato (calculate_quality_score) ----
+    quality_score = (
+        np.select([roe > 0.15, roe > 0.08], [2, 1], 0)
+        + np.select([margini > 0.15, margini > 0.08], [2, 1], 0)
+        + np.select([debt_to_equity < 0.5, debt_to_equity < 1.0], [2, 1], 0)
+        + np.where(cash_flow > 0, 2, 0)
+        + np.select([current_ratio > 1.5, current_ratio > 1.0], [2, 1], 0)
+    )
+
+    # ---- Analisi rischio ----
+    beta = _colonna(tabella, 'beta')
+    punteggio_rischio = (
+        np.select([beta > 1.5, beta > 1.2], [2, 1], 0)
+        + np.select([debt_to_equity > 2, debt_to_equity > 1], [2, 1], 0)
+        + settore_contiene('technology|healthcare|energy')
+    )
+    rischio = np.select([punteggio_rischio <= 1, punteggio_rischio <= 3], ['Basso', 'Medio'], 'Alto')
+
+    # ---- Punteggio investimento ----
+    investment_score = calcola_investment_score_vettoriale(sconto, qualita_ok, rischio, config['SCORING_WEIGHTS'])
+
+    # ---- Righe valide: stesse condizioni che nella versione per-ticker portano a None ----
+    dati_sufficienti = (
+        (np.nan_to_num(eps) != 0) & (np.nan_to_num(book_val) != 0) & (eps > 0)
+        & (np.nan_to_num(prezzo) != 0)
+    )
+    valido = (
+        dati_sufficienti
+        & np.isfinite(valore_intrinseco) & (valore_intrinseco != 0)
+        & ~tabella['_nullo_rigido'].to_numpy()
+        & ~tabella['_nullo_nome'].to_numpy()
+    )
+
+    risultati = pd.DataFrame({
+        'ticker': tabella.index,
+        'nome': tabella['longName'].where(tabella['longName'].notna(), ''),
+        'settore': tabella['sector'].where(tabella['_settore_presente'], ''),
+        'prezzo': prezzo,
+        'valore_intrinseco': valore_intrinseco,
+        'sconto': sconto,
+        'qualita_ok': qualita_ok,
+        'rischio': rischio,
+        'investment_score': investment_score,
+        'quality_score_detailed': quality_score,
+        'pe_ratio': tabella['trailingPE'].to_numpy(),
+        'roe': tabella['returnOnEquity'].to_numpy(),
+        'debito_equity': tabella['debtToEquity'].to_numpy()
+    }, index=tabella.index)
+    return risultati[valido].reset_index(drop=True)
+
+def calcola_investment_score_vettoriale(sconto, qualita_ok, rischio, pesi=None):
+    """Versione array di calculate_investment_score"""
+    pesi = pesi or CONFIG['SCORING_WEIGHTS']
+    value_score = np.minimum(sconto * 4, 100)
+    quality_score = np.where(qualita_ok, 100, 0)
+    livelli = list(PUNTEGGI_RISCHIO)
+    risk_score = np.select([rischio == livello for livello in livelli], [PUNTEGGI_RISCHIO[l] for l in livelli], 0)
+    return pesi['value'] * value_score + pesi['quality'] * quality_score + pesi['risk'] * risk_score
+
+# ==================== CONVERSIONE ====================
+
+def risultati_da_tabella(risultati):
+    """Lista di dizionari come quelli di analizza_azioni_avanzata (NaN -> None)"""
+    return risultati.astype(object).where(risultati.notna(), None).to_dict('records')
+
+def analizza_universo_vettoriale(tickers=None, config=None):
+    """Screening completo: fondamentali dalla cache + scoring vettoriale"""
+    return calcola_punteggi(carica_tabella(tickers), config)
@@ -0,0 +1,140 @@
+"""
+🌊 SCREENING STREAM - Value Stock Finder
+Screening in streaming: ogni risultato viene scritto subito su un file NDJSON
+(una riga JSON per ticker) e ogni ticker analizzato finisce in un file di checkpoint.
+Rilanciando con lo stesso run ID i ticker già completati vengono saltati.
+
+    outputs/screens/screening_<run_id>.ndjson       risultati
+    outputs/screens/screening_<run_id>.checkpoint   ticker analizzati (anche senza risultato,
+                                                    tranne i falliti per errori transitori: ritentati alla ripresa)
+"""
+
+import os
+import json
+from datetime import datetime
+from mio_stock_finder import analizza_azioni_stream, azioni, get_fetcher
+from risultati import per_json
+
+STREAM_CONFIG = {
+    'CARTELLA': 'outputs/screens',
+    'FSYNC_OGNI': 100       # Forza su disco ogni N righe (le righe sono comunque scritte subito)
+}
+
+# ==================== FILE APPEND-ONLY ====================
+
+def _ripara_coda(path):
+    """Un'interruzione a metà scrittura lascia una riga incompleta: la elimina"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb+') as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b'\n':
+            return
+        f.seek(0)
+        contenuto = f.read()
+        f.truncate(contenuto.rfind(b'\n') + 1)
+
+class ScrittoreNDJSON:
+    """Scrittura riga per riga in append: quello che è scritto resta anche se il processo muore"""
+
+    def __init__(self, path, fsync_ogni=None):
+        self.path = path
+        self.fsync_ogni = fsync_ogni or STREAM_CONFIG['FSYNC_OGNI']
+        self.righe = 0
+        cartella = os.path.dirname(path)
+        if cartella:
+            os.makedirs(cartella, exist_ok=True)
+        _ripara_coda(path)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def scrivi(self, record):
+        riga = record if isinstance(record, str) else json.dumps(record, default=per_json)
+        self._file.write(riga + '\n')
+        self._file.flush()
+        self.righe += 1
+        if self.righe % self.fsync_ogni == 0:
+            os.fsync(self._file.fileno())
+
+    def chiudi(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.chiudi()
+
+def leggi_ndjson(path):
+    """Generatore dei record di un file NDJSON (ignora un'eventuale ultima riga troncata)"""
+    with open(path, encoding='utf-8') as f:
+        for riga in f:
+            if not riga.endswith('\n'):
+                break
+            if riga.strip():
+                yield json.loads(riga)
+
+# ==================== RUN CON CHECKPOINT ====================
+
+def percorsi_run(run_id, cartella=None):
+    cartella = cartella or STREAM_CONFIG['CARTELLA']
+    base = os.path.join(cartella, f"screening_{run_id}")
+    return base + '.ndjson', base + '.checkpoint'
+
+def tickers_completati(run_id, cartella=None):
+    """Ticker già analizzati nel run: checkpoint + risultati (il risultato viene scritto prima del checkpoint)"""
+    path_risultati, path_checkpoint = percorsi_run(run_id, cartella)
+    completati = set()
+    if os.path.exists(path_checkpoint):
+        with open(path_checkpoint, encoding='utf-8') as f:
+            completati.update(riga.strip() for riga in f if riga.endswith('\n') and riga.strip())
+    if os.path.exists(path_risultati):
+        completati.update(r['ticker'] for r in leggi_ndjson(path_risultati))
+    return completati
+
+def esegui_screening_stream(run_id=None, tickers=None, concorrenza=None, cartella=None):
+    """
+    Screening con output incrementale. Con un run_id esistente riprende da dove si era fermato.
+    Restituisce un riepilogo del run (i risultati restano solo nel file NDJSON).
+    """
+    run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M")
+    tickers = list(azioni if tickers is None else tickers)
+    path_risultati, path_checkpoint = percorsi_run(run_id, cartella)
+
+    completati = tickers_completati(run_id, cartella)
+    da_analizzare = [t for t in tickers if t not in completati]
+    saltati = len(tickers) - len(da_analizzare)
+
+    print(f"\n🌊 SCREENING STREAM - run {run_id}")
+    print(f"📄 Output: {path_risultati}")
+    if saltati:
+        print(f"⏩ Ripresa: {saltati} ticker già completati, {len(da_analizzare)} da analizzare")
+
+    scritti = 0
+    da_ritentare = 0
+    with ScrittoreNDJSON(path_risultati) as risultati, ScrittoreNDJSON(path_checkpoint) as checkpoint:
+        if da_analizzare:
+            for ticker, risultato in analizza_azioni_stream(da_analizzare, concorrenza):
+                if risultato:
+                    risultati.scrivi(risultato)
+                    scritti += 1
+                elif get_fetcher().fallito_transitorio(ticker):
+                    # Timeout / 429 / 5xx: niente checkpoint, la ripresa lo riprova
+                    da_ritentare += 1
+                    continue
+                checkpoint.scrivi(ticker)
+
+    print(f"💾 {scritti} nuovi risultati aggiunti a: {path_risultati}")
+    if da_ritentare:
+        print(f"🔁 {da_ritentare} ticker falliti per errori transitori: rilancia con --stream --run-id {run_id} per ritentarli")
+    return {
+        'run_id': run_id,
+        'path': path_risultati,
+        'checkpoint': path_checkpoint,
+        'analizzati': len(da_analizzare),
+        'nuovi_risultati': scritti,
+        'da_ritentare': da_ritentare,
+        'saltati': saltati
+    }
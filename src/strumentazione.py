@@ -0,0 +1,128 @@
+"""
+🩺 STRUMENTAZIONE - Value Stock Finder
+Tempi per fase, istogrammi di latenza per ticker, contatori di errori e cache.
+Ogni run esporta un JSON di metriche in outputs/reports/ (e opzionalmente un profilo cProfile).
+"""
+
+import os
+import json
+import time
+import cProfile
+import threading
+import numpy as np
+from contextlib import contextmanager
+from datetime import datetime
+
+# Limiti superiori dei bucket dell'istogramma (millisecondi)
+BUCKET_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+class MetricheRun:
+    """Raccoglitore thread-safe delle metriche di un run (screening o backtest)"""
+
+    def __init__(self, nome='run'):
+        self.nome = nome
+        self.inizio = time.time()
+        self.fasi = {}       # nome -> {'secondi': totale, 'chiamate': n}
+        self.latenze = {}    # nome -> lista di secondi (una per ticker/chiamata)
+        self.contatori = {}  # nome -> intero
+        self.extra = {}      # dati liberi (es. statistiche cache)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def fase(self, nome, latenza=False):
+        """Cronometra un blocco; con latenza=True registra anche la singola durata nell'istogramma"""
+        inizio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registra(nome, time.perf_counter() - inizio, latenza)
+
+    def registra(self, nome, secondi, latenza=False):
+        with self._lock:
+            fase = self.fasi.setdefault(nome, {'secondi': 0.0, 'chiamate': 0})
+            fase['secondi'] += secondi
+            fase['chiamate'] += 1
+            if latenza:
+                self.latenze.setdefault(nome, []).append(secondi)
+
+    def conta(self, nome, quanti=1):
+        with self._lock:
+            self.contatori[nome] = self.contatori.get(nome, 0) + quanti
+
+    def riepilogo(self):
+        """Dizionario serializzabile con fasi, istogrammi e contatori"""
+        with self._lock:
+            istogrammi = {nome: _istogramma(valori) for nome, valori in self.latenze.items()}
+            return {
+                'run': self.nome,
+                'inizio': datetime.fromtimestamp(self.inizio).isoformat(timespec='seconds'),
+                'durata_totale_s': round(time.time() - self.inizio, 3),
+                'fasi': {
+                    nome: {'secondi': round(f['secondi'], 4), 'chiamate': f['chiamate']}
+                    for nome, f in sorted(self.fasi.items(), key=lambda x: -x[1]['secondi'])
+                },
+                'latenze': istogrammi,
+                'contatori': dict(self.contatori),
+                **self.extra
+            }
+
+def _istogramma(valori):
+    ms = np.array(valori) * 1000
+    conteggi, _ = np.histogram(ms, bins=[0] + BUCKET_MS + [np.inf])
+    etichette = [f"<={b}ms" for b in BUCKET_MS] + [f">{BUCKET_MS[-1]}ms"]
+    return {
+        'n': len(ms),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p90_ms': round(float(np.percentile(ms, 90)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'max_ms': round(float(ms.max()), 3),
+        'bucket': {e: int(c) for e, c in zip(etichette, conteggi) if c}
+    }
+
+# ==================== RUN ATTIVO ====================
+
+_run_attivo = MetricheRun()
+_profiler = None
+
+def get_metriche():
+    """Collettore del run in corso (sempre disponibile: le funzioni non devono controllare nulla)"""
+    return _run_attivo
+
+def fase(nome, latenza=False):
+    return _run_attivo.fase(nome, latenza)
+
+def conta(nome, quanti=1):
+    _run_attivo.conta(nome, quanti)
+
+def avvia_run(nome, profila=False):
+    """Azzera le metriche e (se richiesto) avvia cProfile"""
+    global _run_attivo, _profiler
+    _run_attivo = MetricheRun(nome)
+    if profila:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    return _run_attivo
+
+def esporta_metriche(cartella='outputs/reports', suffisso=None):
+    """Scrive metriche_<run>_<data>.json (e profilo_<run>_<data>.prof se cProfile era attivo)"""
+    global _profiler
+    suffisso = suffisso or datetime.now().strftime("%Y%m%d_%H%M")
+    os.makedirs(cartella, exist_ok=True)
+    riepilogo = _run_attivo.riepilogo()
+
+    if _profiler is not None:
+        _profiler.disable()
+        path_profilo = os.path.join(cartella, f"profilo_{_run_attivo.nome}_{suffisso}.prof")
+        _profiler.dump_stats(path_profilo)
+        riepilogo['profilo'] = path_profilo
+        _profiler = None
+        print(f"🔬 Profilo cProfile salvato in: {path_profilo}")
+
+    path = os.path.join(cartella, f"metriche_{_run_attivo.nome}_{suffisso}.json")
+    with open(path, 'w') as f:
+        json.dump(riepilogo, f, indent=2)
+
+    print(f"🩺 Metriche run salvate in: {path}")
+    for nome, dati in list(riepilogo['fasi'].items())[:6]:
+        print(f"   ⏱️  {nome:<28} {dati['secondi']:>8.2f}s ({dati['chiamate']} chiamate)")
+    return path
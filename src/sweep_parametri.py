@@ -0,0 +1,339 @@
+"""
+🧪 SWEEP PARAMETRI - Value Stock Finder
+Valuta migliaia di varianti di CONFIG (soglie e pesi dello scoring) sugli STESSI dati:
+fondamentali dalla cache e prezzi dall'archivio vengono caricati una volta sola e
+messi in memoria condivisa, da cui li leggono tutti i processi worker (nessuna copia per worker).
+
+Una configurazione seleziona le opportunità come lo screener:
+    sconto > MIN_DISCOUNT, qualità ok (MIN_QUALITY_SCORE), investment_score >= MIN_INVESTMENT_SCORE
+    (con i pesi SCORING_WEIGHTS), poi i primi TOP_K per punteggio.
+Il portafoglio (pesi uguali, buy & hold, come il backtest dell'opzione 2: fondamentali di oggi,
+prezzi degli ultimi N anni) viene confrontato con l'S&P500: rendimento, alpha, max drawdown.
+Per un test point-in-time della regola migliore usa walk_forward.py.
+
+    python src/sweep_parametri.py --casuali 5000 --processi 8
+    python src/sweep_parametri.py --griglia --universo base --anni 5
+"""
+
+import os
+import time
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from mio_stock_finder import CONFIG, PUNTEGGI_RISCHIO, azioni
+from scoring_vettoriale import carica_tabella, calcola_punteggi
+from backtester import scarica_panel_prezzi
+from metriche_performance import GIORNI_BORSA
+
+SWEEP_CONFIG = {
+    'TOP_K': 10,                   # Come backtest_opportunita (prime 10 opportunità)
+    'ANNI': 3,
+    'BENCHMARK': '^GSPC',
+    'BLOCCO': 64,                  # Configurazioni valutate insieme da un worker (un prodotto matrice)
+    'CARTELLA': 'outputs/reports',
+    'GRIGLIA': {
+        'MIN_DISCOUNT': [0, 5, 10, 15, 20, 30],
+        'MIN_QUALITY_SCORE': [2, 3, 4, 5],
+        'MIN_INVESTMENT_SCORE': [0, 50, 60, 70, 80],
+        'SCORING_WEIGHTS': [
+            {'value': 0.5, 'quality': 0.3, 'risk': 0.2},
+            {'value': 0.7, 'quality': 0.2, 'risk': 0.1},
+            {'value': 0.3, 'quality': 0.5, 'risk': 0.2},
+            {'value': 0.4, 'quality': 0.2, 'risk': 0.4}
+        ],
+        'TOP_K': [5, 10, 20]
+    }
+}
+
+# Ordine delle colonne nella matrice parametri passata ai worker
+PARAMETRI = ['MIN_DISCOUNT', 'MIN_QUALITY_SCORE', 'MIN_INVESTMENT_SCORE', 'peso_value', 'peso_quality', 'peso_risk', 'TOP_K']
+METRICHE = ['n_titoli', 'rendimento_totale_perc', 'alpha_perc', 'max_drawdown_perc', 'volatilita_annualizzata', 'sharpe_ratio']
+
+# ==================== CONFIGURAZIONI ====================
+
+def configurazione_attuale():
+    """La configurazione in uso (CONFIG) nel formato dello sweep"""
+    return {
+        'MIN_DISCOUNT': CONFIG['MIN_DISCOUNT'],
+        'MIN_QUALITY_SCORE': CONFIG['MIN_QUALITY_SCORE'],
+        'MIN_INVESTMENT_SCORE': CONFIG['MIN_INVESTMENT_SCORE'],
+        'SCORING_WEIGHTS': dict(CONFIG['SCORING_WEIGHTS']),
+        'TOP_K': SWEEP_CONFIG['TOP_K']
+    }
+
+def griglia(spazio=None):
+    """Tutte le combinazioni dei valori in 'spazio' (default SWEEP_CONFIG['GRIGLIA'])"""
+    spazio = spazio or SWEEP_CONFIG['GRIGLIA']
+    chiavi = list(spazio)
+    return [{**configurazione_attuale(), **dict(zip(chiavi, valori))} for valori in itertools.product(*spazio.values())]
+
+def campione_casuale(n, seed=0):
+    """n configurazioni casuali: soglie uniformi, pesi casuali che sommano a 1"""
+    rng = np.random.default_rng(seed)
+    pesi = np.round(rng.dirichlet([1, 1, 1], size=n), 3)
+    configurazioni = []
+    for i in range(n):
+        configurazioni.append({
+            'MIN_DISCOUNT': round(float(rng.uniform(0, 40)), 1),
+            'MIN_QUALITY_SCORE': int(rng.integers(1, 6)),
+            'MIN_INVESTMENT_SCORE': round(float(rng.uniform(0, 90)), 1),
+            'SCORING_WEIGHTS': dict(zip(['value', 'quality', 'risk'], pesi[i].tolist())),
+            'TOP_K': int(rng.choice([5, 10, 20, 50]))
+        })
+    return configurazioni
+
+def _matrice_parametri(configurazioni):
+    """Lista di configurazioni -> matrice (configurazioni x PARAMETRI)"""
+    righe = []
+    for c in configurazioni:
+        pesi = c.get('SCORING_WEIGHTS', CONFIG['SCORING_WEIGHTS'])
+        righe.append([
+            c.get('MIN_DISCOUNT', CONFIG['MIN_DISCOUNT']),
+            c.get('MIN_QUALITY_SCORE', CONFIG['MIN_QUALITY_SCORE']),
+            c.get('MIN_INVESTMENT_SCORE', CONFIG['MIN_INVESTMENT_SCORE']),
+            pesi['value'], pesi['quality'], pesi['risk'],
+            c.get('TOP_K', SWEEP_CONFIG['TOP_K'])
+        ])
+    return np.array(righe, dtype=float).reshape(-1, len(PARAMETRI))
+
+# ==================== DATI CONDIVISI ====================
+
+def prepara_dati(tickers=None, anni=None, benchmark=None):
+    """
+    Tutto quello che non dipende dalla configurazione, calcolato una volta:
+    sconto, rischio e livello di qualità per ticker, prezzi relativi (date x ticker) e benchmark.
+    """
+    tickers = azioni if tickers is None else tickers
+    anni = anni or SWEEP_CONFIG['ANNI']
+    benchmark = benchmark or SWEEP_CONFIG['BENCHMARK']
+
+    print(f"📦 Caricamento fondamentali ({len(tickers)} ticker)...")
+    tabella = carica_tabella(tickers)
+
+    # qualita_ok cresce al calare della soglia: il livello è la soglia più alta ancora superata
+    # (-1 = mai ok, es. debito non disponibile). qualita_ok(soglia) == livello >= soglia
+    livelli = [calcola_punteggi(tabella, {**CONFIG, 'MIN_QUALITY_SCORE': soglia}) for soglia in range(6)]
+    base = livelli[0]
+    livello_qualita = sum(l['qualita_ok'].to_numpy().astype(np.int8) for l in livelli) - 1
+
+    print(f"📥 Prezzi di {len(base)} ticker validi ({anni} anni)...")
+    panel, start_date, end_date = scarica_panel_prezzi(list(base['ticker']), anni, benchmark)
+    if benchmark not in panel.columns or panel.empty:
+        print(f"❌ Benchmark {benchmark} non disponibile: sweep impossibile")
+        return None
+
+    prezzi = panel.reindex(columns=list(base['ticker'])).ffill()
+    iniziali = prezzi.iloc[0].to_numpy()
+    # Buy & hold dalla prima data: senza prezzo quel giorno il titolo non si può comprare
+    investibile = ~np.isnan(iniziali)
+    relativi = np.nan_to_num(prezzi.to_numpy() / np.where(investibile, iniziali, 1.0))
+    bench = panel[benchmark].to_numpy()
+
+    esclusi = int((~investibile).sum())
+    if esclusi:
+        print(f"⚠️  {esclusi} ticker senza prezzo a inizio periodo: esclusi dallo sweep")
+
+    return {
+        'tickers': list(base['ticker']),
+        'periodo': (start_date, end_date),
+        'array': {
+            'sconto': base['sconto'].to_numpy(dtype=float),
+            'livello_qualita': livello_qualita.astype(np.int8),
+            'punteggio_rischio': base['rischio'].map(PUNTEGGI_RISCHIO).to_numpy(dtype=float),
+            'investibile': investibile,
+            'relativi': np.ascontiguousarray(relativi),
+            'benchmark': bench / bench[0]
+        }
+    }
+
+def _condividi(array):
+    """Copia gli array in blocchi di memoria condivisa: ai worker passano solo nomi e forme"""
+    blocchi, descrittori = [], {}
+    for nome, valori in array.items():
+        blocco = shared_memory.SharedMemory(create=True, size=max(valori.nbytes, 1))
+        np.ndarray(valori.shape, valori.dtype, buffer=blocco.buf)[...] = valori
+        blocchi.append(blocco)
+        descrittori[nome] = (blocco.name, valori.shape, valori.dtype.str)
+    return blocchi, descrittori
+
+_DATI = {}
+_BLOCCHI_WORKER = []
+
+def _inizializza_worker(descrittori):
+    """Nel worker: viste NumPy sulla memoria condivisa (nessuna copia)"""
+    for nome, (nome_blocco, forma, tipo) in descrittori.items():
+        blocco = shared_memory.SharedMemory(name=nome_blocco)
+        _BLOCCHI_WORKER.append(blocco)  # il blocco deve restare aperto finché il worker vive
+        _DATI[nome] = np.ndarray(forma, np.dtype(tipo), buffer=blocco.buf)
+
+# ==================== VALUTAZIONE ====================
+
+def _selezione(parametri, dati):
+    """Matrice booleana (configurazioni x ticker) dei titoli in portafoglio"""
+    sconto = dati['sconto']
+    soglia_sconto, soglia_qualita, soglia_score, peso_value, peso_quality, peso_risk, top_k = parametri.T
+
+    qualita_ok = dati['livello_qualita'][None, :] >= soglia_qualita[:, None]
+    score = (
+        peso_value[:, None] * np.minimum(sconto * 4, 100)[None, :]
+        + peso_quality[:, None] * np.where(qualita_ok, 100, 0)
+        + peso_risk[:, None] * dati['punteggio_rischio'][None, :]
+    )
+    scelti = (
+        dati['investibile'][None, :] & qualita_ok
+        & (sconto[None, :] > soglia_sconto[:, None])
+        & (score >= soglia_score[:, None])
+    )
+
+    # Primi TOP_K per punteggio (a parità di punteggio conta l'ordine dei ticker, come sorted)
+    ordine = np.argsort(np.where(scelti, -score, np.inf), axis=1, kind='stable')
+    posizione = np.empty_like(ordine)
+    np.put_along_axis(posizione, ordine, np.broadcast_to(np.arange(ordine.shape[1]), ordine.shape), axis=1)
+    return scelti & (posizione < top_k[:, None])
+
+def _valuta_blocco(parametri, dati=None):
+    """Metriche (configurazioni x METRICHE) di un blocco di configurazioni: un solo prodotto matrice"""
+    dati = dati or _DATI
+    scelti = _selezione(parametri, dati)
+    n_titoli = scelti.sum(axis=1)
+
+    # Equity pesi uguali = media dei prezzi relativi dei titoli scelti; nessun titolo = liquidità
+    pesi = scelti / np.maximum(n_titoli, 1)[:, None]
+    equity = dati['relativi'] @ pesi.T
+    equity[:, n_titoli == 0] = 1.0
+
+    rendimento = (equity[-1] - 1) * 100
+    alpha = rendimento - (dati['benchmark'][-1] - 1) * 100
+    drawdown = (equity / np.maximum.accumulate(equity, axis=0) - 1).min(axis=0) * 100
+
+    giornalieri = equity[1:] / equity[:-1] - 1
+    volatilita = giornalieri.std(axis=0, ddof=1) * np.sqrt(GIORNI_BORSA) if len(giornalieri) > 1 else np.zeros(len(n_titoli))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(volatilita > 0, giornalieri.mean(axis=0) * GIORNI_BORSA / volatilita, 0.0)
+
+    return np.column_stack([n_titoli, rendimento, alpha, drawdown, volatilita * 100, sharpe])
+
+def esegui_sweep(configurazioni, dati=None, processi=None, blocco=None, tickers=None, anni=None):
+    """
+    Valuta tutte le configurazioni e restituisce la classifica (DataFrame).
+    processi=1 valuta nel processo corrente (utile per il debug).
+    """
+    dati = dati or prepara_dati(tickers, anni)
+    if dati is None:
+        return None
+
+    parametri = _matrice_parametri(configurazioni)
+    blocco = blocco or SWEEP_CONFIG['BLOCCO']
+    pezzi = [parametri[i:i + blocco] for i in range(0, len(parametri), blocco)]
+    processi = processi or os.cpu_count() or 1
+
+    print(f"\n🧪 SWEEP: {len(parametri)} configurazioni su {len(dati['tickers'])} ticker "
+          f"| {processi} processi | blocchi da {blocco}")
+    inizio = time.perf_counter()
+
+    if processi == 1:
+        metriche = [_valuta_blocco(p, dati['array']) for p in pezzi]
+    else:
+        blocchi, descrittori = _condividi(dati['array'])
+        try:
+            with ProcessPoolExecutor(max_workers=processi, initializer=_inizializza_worker, initargs=(descrittori,)) as pool:
+                metriche = list(pool.map(_valuta_blocco, pezzi))
+        finally:
+            for b in blocchi:
+                b.close()
+                b.unlink()
+
+    durata = time.perf_counter() - inizio
+    print(f"⏱️  {len(parametri)} configurazioni in {durata:.1f}s ({len(parametri) / max(durata, 1e-9):,.0f}/s)")
+    return classifica_configurazioni(parametri, np.vstack(metriche) if metriche else np.empty((0, len(METRICHE))))
+
+def classifica_configurazioni(parametri, metriche):
+    """Ordina per alpha (decrescente) e, a parità, per drawdown meno profondo; segna la frontiera di Pareto"""
+    tabella = pd.DataFrame(parametri, columns=PARAMETRI)
+    for colonna in ('MIN_QUALITY_SCORE', 'TOP_K'):
+        tabella[colonna] = tabella[colonna].astype(int)
+    tabella[METRICHE] = metriche
+    tabella['n_titoli'] = tabella['n_titoli'].astype(int)
+    tabella[METRICHE[1:]] = tabella[METRICHE[1:]].round(2)
+
+    tabella = tabella.sort_values(['alpha_perc', 'max_drawdown_perc'], ascending=False, kind='stable').reset_index(drop=True)
+    # Pareto: nessun'altra configurazione ha alpha più alto E drawdown meno profondo
+    migliore_drawdown = tabella['max_drawdown_perc'].cummax().shift(fill_value=-np.inf)
+    tabella['pareto'] = tabella['max_drawdown_perc'] > migliore_drawdown
+    tabella.insert(0, 'posizione', np.arange(1, len(tabella) + 1))
+    return tabella
+
+def titoli_selezionati(configurazione, dati):
+    """Ticker in portafoglio per una configurazione"""
+    scelti = _selezione(_matrice_parametri([configurazione]), dati['array'])[0]
+    return [t for t, s in zip(dati['tickers'], scelti) if s]
+
+def configurazione_da_riga(riga):
+    """Riga della classifica -> configurazione (stesso formato di griglia/campione_casuale)"""
+    return {
+        'MIN_DISCOUNT': float(riga['MIN_DISCOUNT']),
+        'MIN_QUALITY_SCORE': int(riga['MIN_QUALITY_SCORE']),
+        'MIN_INVESTMENT_SCORE': float(riga['MIN_INVESTMENT_SCORE']),
+        'SCORING_WEIGHTS': {'value': riga['peso_value'], 'quality': riga['peso_quality'], 'risk': riga['peso_risk']},
+        'TOP_K': int(riga['TOP_K'])
+    }
+
+def salva_classifica(tabella, filename=None):
+    if filename is None:
+        os.makedirs(SWEEP_CONFIG['CARTELLA'], exist_ok=True)
+        filename = os.path.join(SWEEP_CONFIG['CARTELLA'], f"sweep_{datetime.now().strftime('%Y%m%d_%H%M')}.csv")
+    tabella.to_csv(filename, index=False)
+    print(f"💾 Classifica sweep salvata in: {filename}")
+    return filename
+
+# ==================== CLI ====================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep parallelo dei parametri di CONFIG")
+    gruppo = parser.add_mutually_exclusive_group()
+    gruppo.add_argument('--griglia', action='store_true', help="Tutte le combinazioni di SWEEP_CONFIG['GRIGLIA']")
+    gruppo.add_argument('--casuali', type=int, default=2000, help="Numero di configurazioni casuali (default 2000)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processi', type=int, help="Processi worker (default: tutti i core)")
+    parser.add_argument('--anni', type=int, default=SWEEP_CONFIG['ANNI'])
+    parser.add_argument('--universo', help="Universo in data/universi/ (default: lista integrata)")
+    parser.add_argument('--top', type=int, default=15, help="Righe della classifica da mostrare")
+    args = parser.parse_args(argv)
+
+    tickers = None
+    if args.universo:
+        from universi import carica_universo
+        tickers = carica_universo(args.universo)
+        if tickers is None:
+            return
+
+    configurazioni = griglia() if args.griglia else campione_casuale(args.casuali, args.seed)
+    configurazioni.append(configurazione_attuale())  # riferimento: CONFIG in uso
+
+    dati = prepara_dati(tickers, args.anni)
+    if dati is None:
+        return
+    tabella = esegui_sweep(configurazioni, dati, processi=args.processi)
+
+    pd.set_option('display.width', 200)
+    print(f"\n🏆 MIGLIORI CONFIGURAZIONI (alpha vs {SWEEP_CONFIG['BENCHMARK']}, poi drawdown):")
+    print(tabella.head(args.top).to_string(index=False))
+
+    attuale = _matrice_parametri([configurazione_attuale()])[0]
+    uguali = (tabella[PARAMETRI].to_numpy() == attuale).all(axis=1)
+    if uguali.any():
+        riga = tabella[uguali].iloc[0]
+        print(f"\n📍 CONFIG attuale: posizione {riga['posizione']}/{len(tabella)} | "
+              f"Alpha {riga['alpha_perc']:.1f}% | Drawdown {riga['max_drawdown_perc']:.1f}%")
+
+    migliore = configurazione_da_riga(tabella.iloc[0])
+    print(f"🥇 Titoli della configurazione migliore: {', '.join(titoli_selezionati(migliore, dati)) or 'nessuno (liquidità)'}")
+    salva_classifica(tabella)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+🌐 UNIVERSI - Value Stock Finder
+Universi di ticker da file in data/universi/ (CSV con tag o testo semplice),
+suddivisione deterministica in shard per più processi/macchine e unione dei risultati.
+
+    data/universi/base.csv          ticker,categoria        (colonne extra = tag filtrabili)
+    data/universi/russell3000.txt   un ticker per riga      (# per i commenti)
+
+Uso con il main integrator:
+    python main_integrator.py --universo russell3000 --shard 1/4     # uno per processo/host
+    python main_integrator.py --unisci outputs/screens/*_shard*      # classifica unica
+"""
+
+import os
+import csv
+import json
+import zlib
+
+UNIVERSI_CONFIG = {
+    'CARTELLA': 'data/universi'
+}
+
+# ==================== CARICAMENTO ====================
+
+def percorso_universo(nome):
+    """Accetta un percorso o il nome di un file in data/universi/ (estensione facoltativa)"""
+    if os.path.exists(nome):
+        return nome
+    for estensione in ('', '.csv', '.txt'):
+        path = os.path.join(UNIVERSI_CONFIG['CARTELLA'], nome + estensione)
+        if os.path.exists(path):
+            return path
+    return None
+
+def universi_disponibili():
+    cartella = UNIVERSI_CONFIG['CARTELLA']
+    if not os.path.isdir(cartella):
+        return []
+    return sorted(os.path.splitext(f)[0] for f in os.listdir(cartella) if f.endswith(('.csv', '.txt')))
+
+def leggi_universo(nome):
+    """Righe dell'universo come dizionari {'ticker': ..., <tag>: ...}, nell'ordine del file"""
+    path = percorso_universo(nome)
+    if path is None:
+        print(f"❌ Universo '{nome}' non trovato (disponibili: {', '.join(universi_disponibili()) or 'nessuno'})")
+        return None
+
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            righe = [{k.strip().lower(): (v or '').strip() for k, v in r.items()} for r in csv.DictReader(f)]
+        else:
+            righe = [{'ticker': r.split('#')[0].strip()} for r in f]
+
+    visti = set()
+    universo = []
+    for riga in righe:
+        ticker = riga.get('ticker', '').upper()
+        if ticker and ticker not in visti:
+            visti.add(ticker)
+            universo.append({**riga, 'ticker': ticker})
+    return universo
+
+def carica_universo(nome, filtri=None):
+    """
+    Lista di ticker dell'universo, opzionalmente filtrata per tag
+    (es. {'categoria': 'tecnologia'}; confronto senza maiuscole, più valori separati da virgola).
+    """
+    righe = leggi_universo(nome)
+    if righe is None:
+        return None
+    for tag, valore in (filtri or {}).items():
+        ammessi = {v.strip().lower() for v in str(valore).split(',')}
+        righe = [r for r in righe if r.get(tag.lower(), '').lower() in ammessi]
+    return [r['ticker'] for r in righe]
+
+def parse_filtri(espressioni):
+    """['categoria=tecnologia', ...] -> {'categoria': 'tecnologia'}"""
+    filtri = {}
+    for espressione in espressioni or []:
+        tag, _, valore = espressione.partition('=')
+        if not valore:
+            raise ValueError(f"Filtro non valido '{espressione}': usa tag=valore")
+        filtri[tag.strip()] = valore.strip()
+    return filtri
+
+# ==================== SHARDING ====================
+
+def parse_shard(testo):
+    """'2/4' -> (2, 4): shard numerati da 1 a N"""
+    try:
+        indice, totale = (int(x) for x in testo.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard non valido '{testo}': usa i/N (es. 2/4)")
+    if totale < 1 or not 1 <= indice <= totale:
+        raise ValueError(f"Shard non valido '{testo}': serve 1 <= i <= N")
+    return indice, totale
+
+def shard_di(ticker, totale):
+    """Shard (1..N) del ticker: hash stabile, non dipende dall'ordine né dal resto dell'universo"""
+    return zlib.crc32(ticker.encode()) % totale + 1
+
+def filtra_shard(tickers, indice, totale):
+    """Ticker assegnati allo shard i di N (ordine originale conservato)"""
+    return [t for t in tickers if shard_di(t, totale) == indice]
+
+# ==================== UNIONE ====================
+
+def carica_risultati(path):
+    """Risultati di screening da JSON (lista), NDJSON, CSV (outputs/archive) o Parquet"""
+    if path.endswith(('.parquet', '.csv')):
+        if path.endswith('.csv'):
+            import pandas as pd
+            df = pd.read_csv(path)  # tipi dedotti: sconto float, qualita_ok bool, ...
+        else:
+            from formato_colonnare import carica_colonnare
+            df = carica_colonnare([path]).drop(columns='data_run')
+        return df.astype(object).where(df.notna(), None).to_dict('records')
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.ndjson'):
+            return [json.loads(r) for r in f if r.endswith('\n') and r.strip()]
+        return json.load(f)
+
+def classifica(risultati):
+    """Ordine canonico: investment_score decrescente, a parità di punteggio per ticker"""
+    return sorted(risultati, key=lambda r: (-r['investment_score'], r['ticker']))
+
+def unisci_shard(paths, output=None):
+    """
+    Unisce gli output degli shard in un'unica classifica.
+    Il risultato è identico a classifica() applicata allo screening dello stesso universo in un solo processo.
+    """
+    paths = [p for p in paths if p.endswith(('.json', '.ndjson', '.parquet'))]  # es. ignora i .checkpoint dello streaming
+    per_ticker = {}
+    for path in paths:
+        for risultato in carica_risultati(path):
+            ticker = risultato['ticker']
+            if ticker in per_ticker and per_ticker[ticker] != risultato:
+                print(f"⚠️  {ticker} presente in più shard con valori diversi: tengo l'ultimo ({path})")
+            per_ticker[ticker] = risultato
+
+    unito = classifica(per_ticker.values())
+    print(f"🔗 Uniti {len(paths)} file: {len(unito)} risultati")
+
+    if output:
+        cartella = os.path.dirname(output)
+        if cartella:
+            os.makedirs(cartella, exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(unito, f, indent=2)
+        print(f"💾 Classifica unita salvata in: {output}")
+    return unito
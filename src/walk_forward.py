@@ -0,0 +1,201 @@
+"""
+🚶 WALK-FORWARD BACKTEST - Value Stock Finder
+Backtest point-in-time della strategia di screening:
+a ogni data di ribilanciamento lo screening viene rifatto con i fondamentali
+disponibili QUEL giorno (snapshot in cache) e il prezzo di QUEL giorno (archivio prezzi),
+si comprano i top-K titoli (pesi uguali) e si tengono fino al ribilanciamento successivo.
+
+Lo stato viene salvato su disco: aggiungere una nuova data calcola solo l'ultimo passo.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from mio_stock_finder import CONFIG, get_cache
+from scoring_vettoriale import costruisci_tabella, calcola_punteggi
+from backtester import get_archivio
+
+WALK_FORWARD_CONFIG = {
+    'TOP_K': 10,
+    'BENCHMARK': '^GSPC',
+    'STATO_PATH': 'data/walk_forward_stato.json',   # Fuori da outputs/: non è un risultato da indicizzare
+    'CAPITALE_INIZIALE': 100.0
+}
+
+# ==================== SCREENING POINT-IN-TIME ====================
+
+def screening_alla_data(giorno, prezzi_giorno, top_k, config=None):
+    """
+    Rifà lo screening a 'giorno': fondamentali dall'ultimo snapshot <= giorno,
+    prezzo = chiusura del giorno. Stesse regole di analizza_azione_avanzata (via scoring vettoriale).
+    """
+    config = config or CONFIG
+    snapshot = get_cache().snapshot_al(giorno, tickers=prezzi_giorno.index)
+
+    infos = {}
+    for ticker, info in snapshot.items():
+        prezzo = prezzi_giorno.get(ticker)
+        if prezzo is None or np.isnan(prezzo):
+            continue  # senza prezzo quel giorno non si può comprare
+        info = {**info, 'currentPrice': float(prezzo)}
+        eps = info.get('trailingEps')
+        if isinstance(eps, (int, float)) and eps > 0:
+            info['trailingPE'] = float(prezzo) / eps
+        infos[ticker] = info
+
+    if not infos:
+        return []
+
+    risultati = calcola_punteggi(costruisci_tabella(infos), config)
+    opportunita = risultati[(risultati['sconto'] > config['MIN_DISCOUNT']) & risultati['qualita_ok']]
+    opportunita = opportunita.sort_values('investment_score', ascending=False, kind='stable')
+    return list(opportunita['ticker'].head(top_k))
+
+# ==================== STATO INCREMENTALE ====================
+
+def _impronta_parametri(top_k, benchmark, tickers, config):
+    """Se cambiano regole, universo o top-K lo stato salvato non è più valido"""
+    chiave = json.dumps({
+        'top_k': top_k,
+        'benchmark': benchmark,
+        'tickers': sorted(tickers),
+        'config': {k: config[k] for k in ('MIN_DISCOUNT', 'MIN_QUALITY_SCORE', 'SCORING_WEIGHTS')}
+    }, sort_keys=True)
+    return hashlib.sha1(chiave.encode()).hexdigest()
+
+def _carica_stato(path, impronta):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            stato = json.load(f)
+        if stato.get('impronta') == impronta:
+            return stato
+        print("♻️  Parametri cambiati: walk-forward ricalcolato da zero")
+    return {'impronta': impronta, 'passi': [], 'curva': []}
+
+def _salva_stato(path, stato):
+    if not path:
+        return
+    cartella = os.path.dirname(path)
+    if cartella:
+        os.makedirs(cartella, exist_ok=True)
+    temporaneo = path + '.tmp'
+    with open(temporaneo, 'w') as f:
+        json.dump(stato, f, indent=2)
+    os.replace(temporaneo, path)
+
+# ==================== MOTORE ====================
+
+def _valuta_segmento(panel, titoli, inizio, fine, valore, valore_benchmark, benchmark):
+    """Equity del portafoglio (pesi uguali, buy & hold) e del benchmark tra due ribilanciamenti"""
+    finestra = panel.loc[inizio:fine]
+
+    base = finestra.iloc[0]
+    if titoli:
+        relativi = finestra[titoli] / base[titoli]
+        equity = valore * relativi.mean(axis=1)
+    else:
+        equity = pd.Series(valore, index=finestra.index)  # nessun titolo: liquidità
+
+    bench = valore_benchmark * finestra[benchmark] / base[benchmark]
+    return pd.DataFrame({'strategia': equity, 'benchmark': bench})
+
+def esegui_walk_forward(date_ribilanciamento, tickers=None, top_k=None, config=None, stato_path=None):
+    """
+    Equity curve della strategia vs benchmark ribilanciando alle date indicate.
+    I passi già calcolati (stessi parametri) vengono riusati: si ricalcola solo
+    l'ultimo segmento aperto più le date nuove.
+    """
+    config = config or CONFIG
+    top_k = top_k or WALK_FORWARD_CONFIG['TOP_K']
+    benchmark = WALK_FORWARD_CONFIG['BENCHMARK']
+    stato_path = WALK_FORWARD_CONFIG['STATO_PATH'] if stato_path is None else stato_path
+
+    date_ribilanciamento = sorted({pd.Timestamp(d).strftime('%Y-%m-%d') for d in date_ribilanciamento})
+    if not date_ribilanciamento:
+        print("❌ Nessuna data di ribilanciamento")
+        return None
+    if tickers is None:
+        tickers = sorted(get_cache().snapshot_al(date_ribilanciamento[-1]))
+
+    impronta = _impronta_parametri(top_k, benchmark, tickers, config)
+    stato = _carica_stato(stato_path, impronta)
+
+    # Passi ancora validi: prefisso comune tra date salvate e date richieste
+    calcolati = 0
+    for passo, giorno in zip(stato['passi'], date_ribilanciamento):
+        if passo['data'] != giorno:
+            break
+        calcolati += 1
+    # L'ultimo segmento era aperto (fino all'ultimo prezzo): va sempre ricalcolato
+    da_rifare = max(calcolati - 1, 0)
+    stato['passi'] = stato['passi'][:da_rifare + 1] if calcolati else []
+
+    # La curva resta valida fino all'inizio del primo passo da rifare (quel punto è il capitale di partenza)
+    # (nessun passo in comune: la curva salvata è di un altro run e si riparte dal capitale iniziale)
+    primo_giorno = date_ribilanciamento[da_rifare]
+    stato['curva'] = [p for p in stato['curva'] if p[0] <= primo_giorno] if calcolati else []
+
+    print(f"\n🚶 WALK-FORWARD: {len(date_ribilanciamento)} ribilanciamenti | top {top_k} | "
+          f"{len(date_ribilanciamento) - da_rifare} passi da calcolare")
+
+    # Prezzi dall'archivio locale (solo la coda mancante viene scaricata)
+    archivio = get_archivio()
+    richiesti = list(dict.fromkeys(list(tickers) + [benchmark]))
+    fine = datetime.now()
+    # Qualche giorno prima: se la data cade in un festivo serve l'ultima chiusura precedente
+    inizio_prezzi = pd.Timestamp(primo_giorno) - pd.Timedelta(days=10)
+    archivio.aggiorna(richiesti, inizio_prezzi, fine)
+    panel = archivio.panel(richiesti, inizio_prezzi, fine).ffill()
+    if benchmark not in panel.columns or panel.empty:
+        print("❌ Prezzi del benchmark non disponibili")
+        return None
+
+    if stato['curva']:
+        valore, valore_benchmark = stato['curva'][-1][1], stato['curva'][-1][2]
+    else:
+        valore = valore_benchmark = WALK_FORWARD_CONFIG['CAPITALE_INIZIALE']
+
+    for indice in range(da_rifare, len(date_ribilanciamento)):
+        giorno = date_ribilanciamento[indice]
+        prossimo = date_ribilanciamento[indice + 1] if indice + 1 < len(date_ribilanciamento) else None
+
+        prezzi_disponibili = panel.loc[:giorno]
+        if prezzi_disponibili.empty:
+            print(f"⚠️  {giorno}: nessun prezzo disponibile, passo saltato")
+            if indice >= len(stato['passi']):
+                stato['passi'].append({'data': giorno, 'titoli': []})
+            continue
+        inizio = prezzi_disponibili.index[-1]  # ultimo giorno di borsa <= data ribilanciamento
+
+        if indice < len(stato['passi']):
+            titoli = stato['passi'][indice]['titoli']  # selezione già nota, cambia solo la fine
+        else:
+            titoli = screening_alla_data(giorno, prezzi_disponibili.iloc[-1].drop(benchmark), top_k, config)
+            stato['passi'].append({'data': giorno, 'titoli': titoli})
+            print(f"   📅 {giorno}: {len(titoli)} titoli -> {', '.join(titoli) if titoli else 'liquidità'}")
+
+        segmento = _valuta_segmento(panel, titoli, inizio, prossimo, valore, valore_benchmark, benchmark)
+        righe = segmento if not stato['curva'] else segmento.iloc[1:]  # il primo punto è la fine del segmento precedente
+        stato['curva'].extend(
+            [d.strftime('%Y-%m-%d'), round(float(s), 6), round(float(b), 6)]
+            for d, s, b in righe.itertuples()
+        )
+        valore, valore_benchmark = stato['curva'][-1][1], stato['curva'][-1][2]
+
+    _salva_stato(stato_path, stato)
+
+    curva = pd.DataFrame(stato['curva'], columns=['data', 'strategia', 'benchmark']).set_index('data')
+    if not curva.empty:
+        capitale = WALK_FORWARD_CONFIG['CAPITALE_INIZIALE']
+        rend_strategia = (curva['strategia'].iloc[-1] / capitale - 1) * 100
+        rend_benchmark = (curva['benchmark'].iloc[-1] / capitale - 1) * 100
+        print(f"📈 Strategia: {rend_strategia:>6.1f}% | S&P500: {rend_benchmark:>6.1f}% | "
+              f"Alpha: {rend_strategia - rend_benchmark:>6.1f}%")
+    return {'curva': curva, 'passi': stato['passi']}
+
+def date_mensili(inizio, fine=None):
+    """Primo giorno lavorativo di ogni mese tra inizio e fine"""
+    return [d.strftime('%Y-%m-%d') for d in pd.date_range(inizio, fine or datetime.now(), freq='BMS')]
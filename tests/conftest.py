@@ -0,0 +1,46 @@
+"""
+Test degli invarianti su dati sintetici (SyntheticProvider): offline, deterministici,
+ogni test in una cartella temporanea con data/ e outputs/ propri.
+
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+os.environ.setdefault('VSF_PROVIDER', 'synthetic')
+
+import pytest
+import pandas as pd
+import data_provider
+import mio_stock_finder
+import backtester
+
+CARTELLE = ['data', 'outputs/screens', 'outputs/archive', 'outputs/backtests', 'outputs/reports']
+
+@pytest.fixture(autouse=True)
+def ambiente(tmp_path, monkeypatch):
+    """Cartella di lavoro temporanea, provider sintetico e singleton dei moduli azzerati"""
+    monkeypatch.chdir(tmp_path)
+    for cartella in CARTELLE:
+        os.makedirs(cartella)
+    # Mercato sintetico che finisce ieri: le finestre 'ultimi N anni' hanno sempre dati
+    ieri = pd.Timestamp.now().normalize() - pd.Timedelta(days=1)
+    monkeypatch.setattr(data_provider, '_provider_attivo', data_provider.SyntheticProvider(data_fine=ieri))
+    monkeypatch.setattr(mio_stock_finder, '_cache', None)
+    monkeypatch.setattr(mio_stock_finder, '_fetcher', None)
+    monkeypatch.setattr(backtester, '_archivio', None)
+    monkeypatch.setattr(backtester, '_benchmark_caricati', {})
+    yield tmp_path
+    if mio_stock_finder._cache is not None:
+        mio_stock_finder._cache.chiudi()
+
+@pytest.fixture
+def provider():
+    return data_provider.get_provider()
+
+@pytest.fixture
+def universo():
+    """Universo sintetico piccolo ma con tutti i casi (validi, scartati, senza qualità)"""
+    return data_provider.genera_universo(120)
@@ -0,0 +1,65 @@
+"""Alert daemon: ricalcolo per tick, server TCP e ricarica dei valori intrinseci quando la sorgente cambia"""
+
+import json
+import time
+import socket
+import threading
+import pytest
+from alert_daemon import AlertDaemon, avvia_server, sorveglia_sorgente, interpreta_riga
+from universi import carica_risultati
+
+def _risultato(ticker, valore_intrinseco, prezzo):
+    return {'ticker': ticker, 'nome': ticker, 'valore_intrinseco': valore_intrinseco, 'prezzo': prezzo,
+            'qualita_ok': True, 'rischio': 'BASSO'}
+
+def _attendi(condizione, secondi=5):
+    limite = time.time() + secondi
+    while time.time() < limite:
+        if condizione():
+            return True
+        time.sleep(0.02)
+    return False
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = AlertDaemon([_risultato('PFE', 40.0, 40.0)], cartella=str(tmp_path / 'alerts'))
+    yield daemon
+    daemon.chiudi()
+
+def test_soglie_con_isteresi(daemon):
+    assert [a['tipo'] for a in daemon.aggiorna('PFE', 30.0)] == ['nuova_opportunita', 'opportunita_eccezionale']
+    assert daemon.aggiorna('PFE', 29.0) == []
+    assert [a['tipo'] for a in daemon.aggiorna('PFE', 45.0)] == ['fine_opportunita']
+    assert daemon.aggiorna('XYZ', 10.0) == []
+    assert daemon.riepilogo()['ignorati'] == 1
+
+def test_server_tcp_aggiorna_il_daemon(daemon):
+    server = avvia_server(daemon, 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with socket.create_connection(server.server_address, timeout=5) as conn:
+            conn.sendall(b'PFE,30\n{"ticker": "PFE", "prezzo": 31}\nriga non valida\n')
+        assert _attendi(lambda: daemon.statistiche['tick'] == 2)
+        assert daemon.stati['PFE'].prezzo == 31.0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_ricarica_quando_il_file_cambia(daemon, tmp_path):
+    path = str(tmp_path / 'screening.json')
+    with open(path, 'w') as f:
+        json.dump([_risultato('PFE', 40.0, 40.0)], f)
+    fermo = sorveglia_sorgente(daemon, lambda: carica_risultati(path), path, ogni=0.02)
+    try:
+        time.sleep(0.1)
+        with open(path, 'w') as f:
+            json.dump([_risultato('PFE', 60.0, 40.0), _risultato('KO', 70.0, 60.0)], f)
+        assert _attendi(lambda: 'KO' in daemon.stati)
+        assert daemon.stati['PFE'].valore_intrinseco == 60.0
+    finally:
+        fermo.set()
+
+def test_interpreta_riga():
+    assert interpreta_riga('pfe 24.1') == ('PFE', 24.1)
+    assert interpreta_riga('{"ticker": "ko", "price": 60}') == ('KO', 60.0)
+    assert interpreta_riga('# commento') is None
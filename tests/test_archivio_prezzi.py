@@ -0,0 +1,74 @@
+"""Archivio memmap: l'aggiornamento incrementale della coda equivale a un archivio scaricato da zero"""
+
+import pandas as pd
+from data_provider import DataProvider, crea_panel
+from archivio_prezzi import ArchivioPrezzi
+
+class ProviderConBuchi(DataProvider):
+    """Inoltra al provider sintetico ma per i ticker in 'vuoti' non restituisce barre"""
+
+    def __init__(self, sorgente, vuoti):
+        self.sorgente = sorgente
+        self.vuoti = set(vuoti)
+
+    def get_history(self, ticker, start, end):
+        return self.sorgente.get_history(ticker, start, end)
+
+    def get_prezzi(self, tickers, start, end):
+        panel = self.sorgente.get_prezzi(tickers, start, end)
+        return crea_panel({t: panel[t] for t in panel.columns if t not in self.vuoti}, tickers)
+
+def _finestra(anni):
+    fine = pd.Timestamp.now().normalize()
+    return str((fine - pd.DateOffset(years=anni)).date()), str(fine.date())
+
+def test_aggiornamento_della_coda_uguale_al_download_completo(tmp_path, provider, universo):
+    tickers = universo[:20]
+    start, end = _finestra(2)
+    meta = str((pd.Timestamp(end) - pd.Timedelta(days=90)).date())
+
+    incrementale = ArchivioPrezzi(str(tmp_path / 'incrementale'))
+    assert incrementale.aggiorna(tickers, start, meta, provider)['completi'] == len(tickers)
+    statistiche = incrementale.aggiorna(tickers, start, end, provider)
+    assert statistiche['incrementali'] == len(tickers)
+    assert statistiche['completi'] == 0
+
+    completo = ArchivioPrezzi(str(tmp_path / 'completo'))
+    completo.aggiorna(tickers, start, end, provider)
+
+    pd.testing.assert_frame_equal(incrementale.panel(tickers, start, end), completo.panel(tickers, start, end))
+    # Una seconda chiamata sulla stessa finestra non scarica niente
+    assert incrementale.aggiorna(tickers, start, end, provider) == {'completi': 0, 'incrementali': 0, 'aggiustati': 0, 'mancanti': 0}
+
+def test_archivio_riaperto_legge_le_stesse_barre(tmp_path, provider, universo):
+    tickers = universo[:5]
+    start, end = _finestra(1)
+    archivio = ArchivioPrezzi(str(tmp_path / 'prezzi'))
+    archivio.aggiorna(tickers, start, end, provider)
+    riaperto = ArchivioPrezzi(str(tmp_path / 'prezzi'))
+    pd.testing.assert_frame_equal(riaperto.panel(tickers, start, end), archivio.panel(tickers, start, end))
+
+def test_download_vuoto_non_avanza_la_copertura(tmp_path, provider, universo):
+    tickers = universo[:4]
+    start, end = _finestra(2)
+    meta = str((pd.Timestamp(end) - pd.Timedelta(days=90)).date())
+    archivio = ArchivioPrezzi(str(tmp_path / 'prezzi'))
+    archivio.aggiorna(tickers, start, meta, provider)
+    coperto = archivio._indice[tickers[0]]['coperto_fino']
+
+    statistiche = archivio.aggiorna(tickers, start, end, ProviderConBuchi(provider, [tickers[0]]))
+    assert statistiche['mancanti'] == 1
+    assert archivio._indice[tickers[0]]['coperto_fino'] == coperto
+
+    # Al run successivo il ticker viene ritentato e l'archivio si ricongiunge
+    assert archivio.aggiorna(tickers, start, end, provider)['incrementali'] == 1
+    completo = ArchivioPrezzi(str(tmp_path / 'completo'))
+    completo.aggiorna(tickers, start, end, provider)
+    pd.testing.assert_frame_equal(archivio.panel(tickers, start, end), completo.panel(tickers, start, end))
+
+def test_ticker_nuovo_senza_dati_non_entra_nell_indice(tmp_path, provider, universo):
+    start, end = _finestra(1)
+    archivio = ArchivioPrezzi(str(tmp_path / 'prezzi'))
+    statistiche = archivio.aggiorna(universo[:3], start, end, ProviderConBuchi(provider, universo[:1]))
+    assert statistiche == {'completi': 2, 'incrementali': 0, 'aggiustati': 0, 'mancanti': 1}
+    assert universo[0] not in archivio._indice
@@ -0,0 +1,107 @@
+"""Cache dei fondamentali: TTL per gruppo, rinnovo del solo prezzo, LRU, invalidazione"""
+
+import time
+import pytest
+from cache_fondamentali import CacheFondamentali
+
+INFO = {'currentPrice': 100.0, 'marketCap': 1e9, 'bookValue': 40.0, 'sector': 'Technology'}
+
+class Contatore:
+    def __init__(self):
+        self.info = self.prezzo = 0
+
+    def carica(self, ticker):
+        self.info += 1
+        return dict(INFO)
+
+    def carica_prezzo(self, ticker, info):
+        self.prezzo += 1
+        return {'currentPrice': info['currentPrice'] * 1.1}
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CacheFondamentali(str(tmp_path / 'cache.sqlite'), max_tickers=5)
+    yield cache
+    cache.chiudi()
+
+def _scadi(cache, gruppo):
+    cache._conn.execute("UPDATE info SET aggiornato = aggiornato - 1e9 WHERE gruppo = ?", (gruppo,))
+
+def test_hit_dopo_il_primo_download(cache):
+    contatore = Contatore()
+    assert cache.get('AAA', contatore.carica) == INFO
+    assert cache.get('AAA', contatore.carica) == INFO
+    assert contatore.info == 1
+    assert (cache.stats['hit'], cache.stats['miss']) == (1, 1)
+
+def test_prezzo_scaduto_rinnova_solo_il_prezzo(cache):
+    contatore = Contatore()
+    cache.get('AAA', contatore.carica, contatore.carica_prezzo)
+    _scadi(cache, 'prezzo')
+
+    info = cache.get('AAA', contatore.carica, contatore.carica_prezzo)
+    assert (contatore.info, contatore.prezzo) == (1, 1)
+    assert info['currentPrice'] == pytest.approx(110.0)
+    assert info['bookValue'] == INFO['bookValue']
+    assert cache.stats['parziali'] == 1
+    assert cache.hit_rate() == pytest.approx(0.0)
+    # Il prezzo rinnovato è di nuovo valido: nessun altro download
+    assert cache.get('AAA', contatore.carica, contatore.carica_prezzo)['currentPrice'] == pytest.approx(110.0)
+    assert (contatore.info, contatore.prezzo) == (1, 1)
+    assert cache.hit_rate() == pytest.approx(100 / 3)
+
+def test_fondamentali_scaduti_scaricano_tutto(cache):
+    contatore = Contatore()
+    cache.get('AAA', contatore.carica, contatore.carica_prezzo)
+    _scadi(cache, 'fondamentali')
+    cache.get('AAA', contatore.carica, contatore.carica_prezzo)
+    assert (contatore.info, contatore.prezzo) == (2, 0)
+
+def test_senza_storico_recente_si_torna_al_download_completo(cache):
+    contatore = Contatore()
+    cache.get('AAA', contatore.carica, lambda ticker, info: None)
+    _scadi(cache, 'prezzo')
+    cache.get('AAA', contatore.carica, lambda ticker, info: None)
+    assert contatore.info == 2
+
+def _conteggi(cache):
+    return {tabella: cache._conn.execute(f"SELECT COUNT(DISTINCT ticker) FROM {tabella}").fetchone()[0]
+            for tabella in ('info', 'tickers', 'risultati', 'snapshot')}
+
+def test_lru_rispetta_il_limite_e_conserva_gli_snapshot(cache):
+    contatore = Contatore()
+    for i in range(12):
+        ticker = f"T{i:02d}"
+        cache.get(ticker, contatore.carica)
+        cache.salva_risultato(ticker, 'digest', {'ticker': ticker})
+        cache.flush()
+        time.sleep(0.001)
+
+    assert len(cache) == 5
+    assert _conteggi(cache) == {'info': 5, 'tickers': 5, 'risultati': 5, 'snapshot': 12}
+    assert cache.risultato_precedente('T00') is None
+    assert cache.risultato_precedente('T11') is not None
+
+def test_invalida_toglie_anche_i_risultati(cache):
+    contatore = Contatore()
+    cache.get('AAA', contatore.carica)
+    cache.salva_risultato('AAA', 'digest', {'ticker': 'AAA'})
+    cache.flush()
+    assert cache.risultato_precedente('AAA') is not None
+
+    cache.invalida('AAA')
+    assert cache.risultato_precedente('AAA') is None
+    assert _conteggi(cache)['risultati'] == 0
+    assert _conteggi(cache)['snapshot'] == 1
+
+def test_snapshot_point_in_time_e_potatura(cache):
+    cache.importa_snapshot('2000-01-03', {'AAA': {'bookValue': 1}})
+    cache.importa_snapshot('2001-01-03', {'AAA': {'bookValue': 2}})
+    cache.importa_snapshot('2002-01-03', {'AAA': {'bookValue': 3}})
+    assert cache.snapshot_al('2001-06-30')['AAA']['bookValue'] == 2
+
+    # Tutti più vecchi del limite: resta solo l'ultimo, così la vista point-in-time non cambia
+    cache._pota_snapshot(365 * 20)
+    date = [d for (d,) in cache._conn.execute("SELECT DISTINCT data FROM snapshot ORDER BY data")]
+    assert date == ['2002-01-03']
+    assert cache.snapshot_al('2030-01-01')['AAA']['bookValue'] == 3
@@ -0,0 +1,76 @@
+"""Dashboard: risposte pre-calcolate con ETag, 304 sulle richieste condizionali, ricarica sui file nuovi"""
+
+import json
+import threading
+import http.client
+import pytest
+import dashboard
+from dashboard import Catalogo, crea_server
+
+def _scrivi_screening(nome, prezzo):
+    risultati = [
+        {'ticker': 'PFE', 'nome': 'Pfizer', 'settore': 'Healthcare', 'prezzo': prezzo, 'valore_intrinseco': 40.0,
+         'sconto': (40.0 - prezzo) / 40.0 * 100, 'investment_score': 70.0, 'qualita_ok': True, 'rischio': 'BASSO'},
+        {'ticker': '^GSPC', 'nome': 'S&P 500', 'settore': 'Index', 'prezzo': 5000.0, 'valore_intrinseco': 4000.0,
+         'sconto': -25.0, 'investment_score': 10.0, 'qualita_ok': False, 'rischio': 'MEDIO'}
+    ]
+    with open(f"outputs/screens/{nome}", 'w') as f:
+        json.dump(risultati, f)
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setitem(dashboard.DASHBOARD_CONFIG, 'CONTROLLO_OGNI_S', 0)
+    _scrivi_screening('screening_20250101_0900.json', 30.0)
+    server = crea_server('127.0.0.1', 0, Catalogo())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _get(server, percorso, intestazioni=None):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    conn.request('GET', percorso, headers=intestazioni or {})
+    risposta = conn.getresponse()
+    corpo = risposta.read()
+    conn.close()
+    return risposta.status, dict(risposta.getheaders()), corpo
+
+def test_etag_e_304(server):
+    stato, intestazioni, corpo = _get(server, '/')
+    assert stato == 200
+    assert corpo and intestazioni['ETag']
+
+    stato, intestazioni_304, corpo = _get(server, '/', {'If-None-Match': intestazioni['ETag']})
+    assert (stato, corpo) == (304, b'')
+    assert intestazioni_304['ETag'] == intestazioni['ETag']
+    assert _get(server, '/', {'If-None-Match': '"altro", ' + intestazioni['ETag']})[0] == 304
+    assert _get(server, '/', {'If-None-Match': '"altro"'})[0] == 200
+    assert _get(server, '/', {'If-Modified-Since': intestazioni['Last-Modified']})[0] == 304
+
+def test_file_nuovo_cambia_etag(server):
+    _, prima, _ = _get(server, '/api/screening')
+    _scrivi_screening('screening_20250201_0900.json', 35.0)
+    stato, dopo, corpo = _get(server, '/api/screening', {'If-None-Match': prima['ETag']})
+    assert stato == 200
+    assert dopo['ETag'] != prima['ETag']
+    assert json.loads(corpo)['file'].endswith('screening_20250201_0900.json')
+
+def test_storico_ticker(server):
+    _scrivi_screening('screening_20250201_0900.json', 35.0)
+    stato, _, corpo = _get(server, '/api/ticker/pfe')
+    assert stato == 200
+    storico = json.loads(corpo)
+    assert storico['ticker'] == 'PFE'
+    assert [p['prezzo'] for p in storico['screening']] == [30.0, 35.0]
+    assert _get(server, '/ticker/PFE')[0] == 200
+
+def test_ticker_codificato_nell_url(server):
+    stato, _, corpo = _get(server, '/api/ticker/%5EGSPC')
+    assert stato == 200
+    storico = json.loads(corpo)
+    assert storico['ticker'] == '^GSPC'
+    assert [p['prezzo'] for p in storico['screening']] == [5000.0]
+
+def test_percorso_sconosciuto(server):
+    assert _get(server, '/non/esiste')[0] == 404
@@ -0,0 +1,47 @@
+"""Metriche vettoriali: il panel dà gli stessi numeri del calcolo ticker per ticker (pandas)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from metriche_performance import calcola_metriche, rendimenti_giornalieri, GIORNI_BORSA, COLONNE_METRICHE
+
+@pytest.fixture
+def panel(provider, universo):
+    fine = pd.Timestamp.now().normalize()
+    panel = provider.get_prezzi(universo[:20] + ['^GSPC'], str((fine - pd.DateOffset(years=3)).date()), str(fine.date()))
+    # Buchi sparsi: titoli sospesi qualche giorno
+    buchi = np.random.default_rng(0).random(panel.shape) < 0.02
+    buchi[:, -1] = False
+    return panel.mask(buchi)
+
+def test_panel_uguale_a_pandas_per_ticker(panel):
+    metriche = calcola_metriche(panel, benchmark='^GSPC')
+    assert len(metriche) > 0
+    for ticker in metriche.index:
+        serie = panel[ticker].dropna()
+        rendimenti = serie.pct_change().dropna()
+        riga = metriche.loc[ticker]
+        assert riga['rendimento_totale_perc'] == pytest.approx((serie.iloc[-1] / serie.iloc[0] - 1) * 100, rel=1e-10)
+        assert riga['volatilita_annualizzata'] == pytest.approx(rendimenti.std() * np.sqrt(GIORNI_BORSA) * 100, rel=1e-8)
+        assert riga['max_drawdown_perc'] == pytest.approx((serie / serie.cummax() - 1).min() * 100, rel=1e-10)
+        assert riga['n_osservazioni'] == len(serie)
+
+        # Beta sui soli giorni con entrambi i rendimenti
+        benchmark = panel['^GSPC'].pct_change(fill_method=None)
+        comuni = pd.concat([rendimenti, benchmark], axis=1, sort=True).dropna()
+        beta = comuni.cov().iloc[0, 1] / comuni.iloc[:, 1].var()
+        assert riga['beta'] == pytest.approx(beta, rel=1e-8)
+
+def test_colonna_da_sola_uguale_al_panel(panel):
+    metriche = calcola_metriche(panel)
+    ticker = metriche.index[0]
+    pd.testing.assert_series_equal(calcola_metriche(panel[[ticker]]).loc[ticker], metriche.loc[ticker])
+
+def test_rendimenti_saltano_i_buchi():
+    prezzi = np.array([[10.0], [np.nan], [11.0], [12.1]])
+    np.testing.assert_allclose(rendimenti_giornalieri(prezzi)[:, 0], [np.nan, np.nan, 0.1, 0.1])
+
+def test_panel_vuoto():
+    assert list(calcola_metriche(pd.DataFrame()).columns) == COLONNE_METRICHE
+    corto = pd.DataFrame({'A': [1.0, 1.1]}, index=pd.bdate_range('2025-01-01', periods=2))
+    assert calcola_metriche(corto).empty
@@ -0,0 +1,36 @@
+"""Ledoit-Wolf a blocchi contro la formula densa (matrice N x N esplicita)"""
+
+import numpy as np
+import pytest
+from rischio_portafoglio import shrinkage_ledoit_wolf, covarianza_shrinkage, covarianza_per_pesi
+
+def _ledoit_wolf_denso(X):
+    n, p = X.shape
+    S = X.T @ X / n
+    mu = np.trace(S) / p
+    d2 = ((S - mu * np.eye(p)) ** 2).sum()
+    b2 = sum(((np.outer(x, x) - S) ** 2).sum() for x in X) / n ** 2
+    delta = min(b2, d2) / d2
+    return delta, mu, delta * mu * np.eye(p) + (1 - delta) * S
+
+@pytest.mark.parametrize('giorni,titoli', [(40, 90), (250, 30)])  # ramo Gram (n <= p) e ramo a blocchi
+def test_shrinkage_uguale_alla_formula_densa(giorni, titoli):
+    rng = np.random.default_rng(giorni)
+    fattore = rng.normal(size=(giorni, 1))
+    X = 0.01 * (fattore @ rng.normal(size=(1, titoli)) + rng.normal(size=(giorni, titoli)))
+    X -= X.mean(axis=0)
+
+    delta_atteso, mu_atteso, sigma_attesa = _ledoit_wolf_denso(X)
+    delta, mu, varianze = shrinkage_ledoit_wolf(X, blocco=16)
+    assert delta == pytest.approx(delta_atteso, rel=1e-10)
+    assert mu == pytest.approx(mu_atteso, rel=1e-12)
+    np.testing.assert_allclose(varianze, np.diag(X.T @ X / giorni), rtol=1e-12)
+    assert 0 <= delta <= 1
+
+    np.testing.assert_allclose(covarianza_shrinkage(X, blocco=16), sigma_attesa, rtol=1e-10, atol=1e-16)
+    pesi = rng.dirichlet(np.ones(titoli))
+    np.testing.assert_allclose(covarianza_per_pesi(X, pesi, delta, mu), sigma_attesa @ pesi, rtol=1e-10)
+
+def test_blocco_non_cambia_lo_shrinkage():
+    X = np.random.default_rng(1).normal(size=(60, 50))
+    assert shrinkage_ledoit_wolf(X, blocco=7)[0] == pytest.approx(shrinkage_ledoit_wolf(X, blocco=512)[0], rel=1e-12)
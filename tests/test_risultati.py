@@ -0,0 +1,25 @@
+"""Record con __slots__: stessa lettura di un dizionario (stesse chiavi di to_dict())"""
+
+import json
+import pytest
+from risultati import RisultatoScreening, RisultatoBacktest, per_json, a_dizionari
+
+def test_lettura_come_dizionario():
+    r = RisultatoScreening('PFE', prezzo=24.1, sconto=None)
+    d = r.to_dict()
+    assert r['prezzo'] == d['prezzo'] == 24.1
+    # get con la semantica di dict.get: il default vale solo per le chiavi assenti
+    for campo in ('prezzo', 'sconto', 'inesistente'):
+        assert r.get(campo, 'default') == d.get(campo, 'default')
+        assert (campo in r) == (campo in d)
+    assert 'sconto' in r and r.get('sconto') is None
+    with pytest.raises(KeyError):
+        r['inesistente']
+    with pytest.raises(KeyError):
+        r['inesistente'] = 1
+
+def test_conversioni():
+    r = RisultatoBacktest.da_screening({'ticker': 'KO', 'sconto': 10.0, 'extra': 1}, {'alpha_perc': 2.0})
+    assert r.get('extra') is None and r['alpha_perc'] == 2.0
+    assert json.loads(json.dumps([r], default=per_json))[0] == r.to_dict()
+    assert a_dizionari([r, {'ticker': 'X'}]) == [r.to_dict(), {'ticker': 'X'}]
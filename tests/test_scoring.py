@@ -0,0 +1,64 @@
+"""Scoring per-ticker vs vettoriale e rescreening incrementale: stessi risultati, campo per campo"""
+
+import pytest
+import mio_stock_finder
+from scoring_vettoriale import carica_tabella, calcola_punteggi, risultati_da_tabella, COLONNE_RISULTATO
+
+def _per_ticker(risultati):
+    return {r['ticker']: {c: r[c] for c in COLONNE_RISULTATO} for r in risultati}
+
+def _uguali(a, b):
+    assert a.keys() == b.keys()
+    for ticker in a:
+        for campo in COLONNE_RISULTATO:
+            atteso, valore = a[ticker][campo], b[ticker][campo]
+            if isinstance(atteso, float) and valore is not None:
+                assert valore == pytest.approx(atteso, rel=1e-12, abs=1e-12), (ticker, campo)
+            else:
+                assert valore == atteso, (ticker, campo)
+
+def test_scoring_vettoriale_uguale_al_per_ticker(universo):
+    per_ticker = mio_stock_finder.analizza_azioni_avanzata(universo, concorrenza=1)
+    vettoriale = risultati_da_tabella(calcola_punteggi(carica_tabella(universo)))
+
+    assert len(per_ticker) > 0
+    assert [r['ticker'] for r in per_ticker] == [r['ticker'] for r in vettoriale]
+    _uguali(_per_ticker(per_ticker), _per_ticker(vettoriale))
+
+def test_screening_concorrente_uguale_al_seriale(universo):
+    seriale = mio_stock_finder.analizza_azioni_avanzata(universo, concorrenza=1)
+    concorrente = mio_stock_finder.analizza_azioni_avanzata(universo, concorrenza=8)
+    _uguali(_per_ticker(seriale), _per_ticker(concorrente))
+
+def test_contatori_rescreening_esatti_con_i_thread(universo):
+    primo = mio_stock_finder.analizza_azioni_avanzata(universo, concorrenza=8)
+    assert mio_stock_finder.STATISTICHE_RESCREENING == {'riusati': 0, 'ricalcolati': len(primo)}
+    secondo = mio_stock_finder.analizza_azioni_avanzata(universo, concorrenza=8)
+    assert mio_stock_finder.STATISTICHE_RESCREENING == {'riusati': len(secondo), 'ricalcolati': 0}
+
+def test_rescreening_riusa_il_digest_e_aggiorna_solo_il_prezzo(universo, provider, monkeypatch):
+    infos = {t: provider.get_info(t) for t in universo}
+    monkeypatch.setattr(mio_stock_finder, 'get_cached_stock', lambda t: infos[t])
+    mio_stock_finder.analizza_azioni_avanzata(universo, concorrenza=1)
+
+    # Solo il prezzo cambia: fondamentali identici -> risultato riusato
+    for info in infos.values():
+        if info.get('currentPrice'):
+            info['currentPrice'] *= 1.1
+    incrementale = mio_stock_finder.analizza_azioni_avanzata(universo, concorrenza=1)
+    assert mio_stock_finder.STATISTICHE_RESCREENING['riusati'] == len(incrementale)
+    assert mio_stock_finder.STATISTICHE_RESCREENING['ricalcolati'] == 0
+
+    monkeypatch.setitem(mio_stock_finder.CONFIG, 'RESCREENING_INCREMENTALE', False)
+    completo = mio_stock_finder.analizza_azioni_avanzata(universo, concorrenza=1)
+    _uguali(_per_ticker(completo), _per_ticker(incrementale))
+
+def test_rescreening_ricalcola_se_cambiano_i_fondamentali(universo, provider, monkeypatch):
+    infos = {t: provider.get_info(t) for t in universo}
+    monkeypatch.setattr(mio_stock_finder, 'get_cached_stock', lambda t: infos[t])
+    primo = mio_stock_finder.analizza_azioni_avanzata(universo, concorrenza=1)
+
+    cambiato = primo[0]['ticker']
+    infos[cambiato] = {**infos[cambiato], 'bookValue': infos[cambiato]['bookValue'] * 2}
+    mio_stock_finder.analizza_azioni_avanzata(universo, concorrenza=1)
+    assert mio_stock_finder.STATISTICHE_RESCREENING['ricalcolati'] == 1
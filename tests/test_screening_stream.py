@@ -0,0 +1,80 @@
+"""Streaming NDJSON con checkpoint e sharding: ripresa e unione danno lo stesso risultato di un run unico"""
+
+import os
+import json
+from screening_stream import esegui_screening_stream, leggi_ndjson, percorsi_run, ScrittoreNDJSON
+from universi import filtra_shard, unisci_shard, classifica
+
+def _per_ticker(path):
+    return {r['ticker']: r for r in leggi_ndjson(path)}
+
+def test_ripresa_dopo_interruzione_uguale_al_run_completo(universo):
+    tickers = universo[:40]
+    completo = esegui_screening_stream('completo', tickers, concorrenza=4)
+
+    # Run interrotto a metà: stesso run_id rilanciato sull'intero universo
+    esegui_screening_stream('ripreso', tickers[:20], concorrenza=4)
+    ripresa = esegui_screening_stream('ripreso', tickers, concorrenza=4)
+    assert ripresa['saltati'] == 20
+    assert ripresa['analizzati'] == 20
+
+    assert _per_ticker(ripresa['path']) == _per_ticker(completo['path'])
+    with open(ripresa['checkpoint']) as f:
+        assert sorted(r.strip() for r in f) == sorted(tickers)
+
+    # Rilanciato a run finito non rianalizza niente
+    assert esegui_screening_stream('ripreso', tickers, concorrenza=4)['analizzati'] == 0
+
+def test_riga_troncata_viene_scartata_e_riparata(universo):
+    tickers = universo[:10]
+    run = esegui_screening_stream('troncato', tickers, concorrenza=2)
+    righe = list(leggi_ndjson(run['path']))
+    assert righe
+
+    # Simula un crash a metà scrittura dell'ultima riga e la perdita del suo checkpoint
+    with open(run['path'], 'rb') as f:
+        contenuto = f.read()
+    with open(run['path'], 'wb') as f:
+        f.write(contenuto[:-10])
+    ultimo = righe[-1]['ticker']
+    path_checkpoint = run['checkpoint']
+    with open(path_checkpoint) as f:
+        rimasti = [r for r in f if r.strip() != ultimo]
+    with open(path_checkpoint, 'w') as f:
+        f.writelines(rimasti)
+
+    assert [r['ticker'] for r in leggi_ndjson(run['path'])] == [r['ticker'] for r in righe[:-1]]
+    ripresa = esegui_screening_stream('troncato', tickers, concorrenza=2)
+    assert ripresa['analizzati'] == 1
+    assert _per_ticker(run['path']) == {r['ticker']: r for r in righe}
+    with open(run['path'], 'rb') as f:
+        assert f.read().endswith(b'\n')
+
+def test_scrittore_ripara_la_coda(tmp_path):
+    path = str(tmp_path / 'x.ndjson')
+    with open(path, 'w') as f:
+        f.write(json.dumps({'ticker': 'A'}) + '\n{"ticker": "B", "sco')
+    with ScrittoreNDJSON(path) as scrittore:
+        scrittore.scrivi({'ticker': 'C'})
+    assert [r['ticker'] for r in leggi_ndjson(path)] == ['A', 'C']
+
+def test_shard_uniti_uguali_al_run_unico(universo):
+    tickers = universo[:60]
+    unico = esegui_screening_stream('unico', tickers, concorrenza=4)
+
+    totale = 3
+    percorsi = []
+    assegnati = []
+    for indice in range(1, totale + 1):
+        shard = filtra_shard(tickers, indice, totale)
+        assegnati += shard
+        percorsi.append(esegui_screening_stream(f"shard{indice}", shard, concorrenza=2)['path'])
+    # Partizione: ogni ticker in uno e un solo shard
+    assert sorted(assegnati) == sorted(tickers)
+
+    percorsi += [percorsi_run('shard1')[1]]  # il checkpoint nella lista viene ignorato
+    output = os.path.join('outputs', 'screens', 'unito.json')
+    unito = unisci_shard(percorsi, output)
+    assert unito == classifica(leggi_ndjson(unico['path']))
+    with open(output) as f:
+        assert json.load(f) == unito
@@ -0,0 +1,61 @@
+"""Simulatore di portafoglio: invarianti dell'equity, dei costi e dei pesi target"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from simulatore_portafoglio import simula, date_ribilanciamento, volatilita_mobile
+
+@pytest.fixture
+def prezzi(provider, universo):
+    fine = pd.Timestamp.now().normalize()
+    panel = provider.get_prezzi(universo[:15], str((fine - pd.DateOffset(years=2)).date()), str(fine.date()))
+    return panel.dropna(axis=1, how='all')
+
+@pytest.mark.parametrize('ribilanciamento', [0, 'mensile', 'trimestrale', 21])
+def test_titolo_singolo_senza_costi_segue_il_prezzo(prezzi, ribilanciamento):
+    serie = prezzi.iloc[:, [0]].dropna()
+    simulazione = simula(serie, 'uguale', ribilanciamento, costi_bps=0, slippage_bps=0)
+    attesa = serie.iloc[:, 0] / serie.iloc[0, 0]
+    np.testing.assert_allclose(simulazione['equity'].to_numpy(), attesa.to_numpy(), rtol=1e-12)
+
+def test_buy_and_hold_uguale_alla_media_dei_prezzi_relativi(prezzi):
+    prezzi = prezzi.dropna(axis=1, subset=[prezzi.index[0]])
+    simulazione = simula(prezzi, 'uguale', 0, costi_bps=0, slippage_bps=0)
+    attesa = (prezzi.ffill() / prezzi.iloc[0]).mean(axis=1)
+    np.testing.assert_allclose(simulazione['equity'].to_numpy(), attesa.to_numpy(), rtol=1e-12)
+
+def test_costi_riducono_l_equity(prezzi):
+    senza = simula(prezzi, 'uguale', 'mensile', costi_bps=0, slippage_bps=0)
+    con = simula(prezzi, 'uguale', 'mensile', costi_bps=10, slippage_bps=5)
+    assert senza['costi_perc'] == 0
+    assert con['costi_perc'] > 0
+    assert (con['equity'] <= senza['equity'] + 1e-12).all()
+    # Il primo acquisto paga (costi + slippage) sull'intero capitale
+    assert con['turnover'].iloc[0] == pytest.approx(1.0)
+
+@pytest.mark.parametrize('pesi', ['uguale', 'punteggio', 'inversa_volatilita'])
+def test_pesi_target_sommano_a_uno(prezzi, pesi):
+    punteggi = np.linspace(10, 90, prezzi.shape[1])
+    simulazione = simula(prezzi, pesi, 'trimestrale', punteggi=punteggi, costi_bps=0, slippage_bps=0)
+    np.testing.assert_allclose(simulazione['pesi'].sum(axis=1), 1.0)
+    assert (simulazione['pesi'].to_numpy() >= 0).all()
+
+def test_date_ribilanciamento():
+    date = pd.bdate_range('2024-01-01', '2024-12-31')
+    assert list(date_ribilanciamento(date, 0)) == [0]
+    assert list(date_ribilanciamento(date, None)) == [0]
+    mensili = date_ribilanciamento(date, 'mensile')
+    assert len(mensili) == 12
+    assert all(date[i].day <= 3 for i in mensili)
+    assert list(date_ribilanciamento(date, 100)) == [0, 100, 200]
+
+def test_volatilita_mobile_uguale_a_pandas(prezzi):
+    attesa = prezzi.pct_change(fill_method=None).rolling(21, min_periods=2).std()
+    np.testing.assert_allclose(volatilita_mobile(prezzi.to_numpy(), 21)[30:], attesa.to_numpy()[30:], rtol=1e-8)
+
+def test_senza_ribilanciamento_resta_buy_and_hold(universo, capsys):
+    from simulatore_portafoglio import simula_opportunita
+    from mio_stock_finder import analizza_azioni_avanzata
+    simulazione = simula_opportunita(analizza_azioni_avanzata(universo), anni=1, ribilanciamento=0)
+    assert simulazione['riepilogo']['ribilanciamenti'] == 1
+    assert 'ribilanciamento nessuno' in capsys.readouterr().out
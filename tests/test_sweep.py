@@ -0,0 +1,47 @@
+"""Sweep parametri: stesso risultato in un processo o in più processi con memoria condivisa"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from data_provider import genera_universo
+from sweep_parametri import (esegui_sweep, prepara_dati, campione_casuale, configurazione_attuale,
+                             _matrice_parametri, _valuta_blocco, PARAMETRI, METRICHE)
+
+@pytest.fixture
+def dati():
+    dati = prepara_dati(genera_universo(60), anni=2)
+    assert dati is not None
+    return dati
+
+def test_processi_paralleli_uguali_al_seriale(dati):
+    configurazioni = campione_casuale(200)
+    seriale = esegui_sweep(configurazioni, dati=dati, processi=1)
+    parallelo = esegui_sweep(configurazioni, dati=dati, processi=2, blocco=16)
+    pd.testing.assert_frame_equal(seriale, parallelo)
+
+def test_dimensione_blocco_non_cambia_il_risultato(dati):
+    configurazioni = campione_casuale(50, seed=3)
+    pd.testing.assert_frame_equal(esegui_sweep(configurazioni, dati=dati, processi=1, blocco=7),
+                                  esegui_sweep(configurazioni, dati=dati, processi=1, blocco=64))
+
+def test_metriche_uguali_alla_selezione_esplicita(dati):
+    """Una configurazione valutata a mano: filtri, primi TOP_K per score, equity a pesi uguali"""
+    configurazione = configurazione_attuale()
+    parametri = _matrice_parametri([configurazione])
+    soglia_sconto, soglia_qualita, soglia_score, pv, pq, pr, top_k = parametri[0]
+    a = dati['array']
+
+    candidati = []
+    for i in range(len(dati['tickers'])):
+        qualita_ok = a['livello_qualita'][i] >= soglia_qualita
+        score = pv * min(a['sconto'][i] * 4, 100) + pq * (100 if qualita_ok else 0) + pr * a['punteggio_rischio'][i]
+        if a['investibile'][i] and qualita_ok and a['sconto'][i] > soglia_sconto and score >= soglia_score:
+            candidati.append((-score, i))
+    scelti = [i for _, i in sorted(candidati)[:int(top_k)]]
+
+    equity = a['relativi'][:, scelti].mean(axis=1) if scelti else np.ones(len(a['relativi']))
+    metriche = dict(zip(METRICHE, _valuta_blocco(parametri, a)[0]))
+    assert metriche['n_titoli'] == len(scelti)
+    assert metriche['rendimento_totale_perc'] == pytest.approx((equity[-1] - 1) * 100)
+    assert metriche['alpha_perc'] == pytest.approx((equity[-1] - a['benchmark'][-1]) * 100)
+    assert metriche['max_drawdown_perc'] == pytest.approx((equity / np.maximum.accumulate(equity) - 1).min() * 100)